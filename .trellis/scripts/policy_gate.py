@@ -206,8 +206,8 @@ class PolicyGate:
             from secret_scan import SecretScanner
             scanner = SecretScanner(self.repo_root)
 
-            # Scan staged changes
-            findings = scanner.scan_staged()
+            # Scan the lines the staged changes add
+            findings = scanner.scan_staged(added_only=True)
             findings = scanner.filter_baseline(findings)
 
             if not findings:
@@ -13,22 +13,40 @@ Usage:
     # Scan all changed files (compared to base branch)
     python3 secret_scan.py --diff main
 
+    # Scan only the lines a diff adds, straight from git
+    python3 secret_scan.py --staged --added-only
+
     # Scan specific files
     python3 secret_scan.py --files file1.py file2.py
 
+    # Scan with 4 worker processes (default: one per CPU)
+    python3 secret_scan.py --diff main --jobs 4
+
+    # Rescan every file instead of reusing cached results
+    python3 secret_scan.py --diff main --no-cache
+
     # Update baseline
     python3 secret_scan.py --update-baseline
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
+import mmap
+import os
 import re
+import struct
 import subprocess
 import sys
+import tempfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 # Handle Windows encoding
 if sys.platform == "win32":
@@ -52,6 +70,510 @@ class SecretFinding:
     is_baseline: bool = False
 
 
+@dataclass
+class CompiledPattern:
+    """A secret pattern compiled once per scanner."""
+    name: str
+    severity: str
+    regex: re.Pattern[str]
+    whole_buffer: bool
+
+
+# =============================================================================
+# Pattern Matching
+# =============================================================================
+
+# Line breaks recognised by str.splitlines(); findings keep its line numbering
+LINE_BREAK_RE = re.compile(r"\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+OTHER_BREAK_RE = re.compile(r"[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+# Constructs that match differently at a line end than before a "\n":
+# \A, \Z and \z mean "line start/end" per line, negative lookarounds see
+# the line break as a character, and ^/$ outside MULTILINE (switched off
+# by (?-m:...)) only match at the buffer ends. Patterns using any of them
+# run per line.
+LINE_SENSITIVE_RE = re.compile(r"\\[AZz]|\(\?<?!|\(\?[a-zA-Z]*-[a-zA-Z]*m")
+
+
+class SecretPatternSet:
+    """Secret patterns compiled once and matched against whole files.
+
+    Each pattern makes one pass over the file, which lets the regex engine
+    use its literal-prefix search, instead of one call per line. Lines a
+    pass hits are then matched line by line, so findings (line numbers,
+    captured groups as matched text, overlapping patterns) are the same as
+    scanning every line with every pattern.
+    """
+
+    def __init__(self, patterns: list[dict[str, str]]):
+        """Compile patterns, skipping invalid ones.
+
+        Args:
+            patterns: Pattern dicts with name, pattern and severity
+        """
+        self.patterns: list[CompiledPattern] = []
+        for pattern_info in patterns:
+            try:
+                regex = re.compile(pattern_info["pattern"], re.MULTILINE)
+            except re.error:
+                continue
+            self.patterns.append(CompiledPattern(
+                name=pattern_info["name"],
+                severity=pattern_info.get("severity", "medium"),
+                regex=regex,
+                whole_buffer=not LINE_SENSITIVE_RE.search(pattern_info["pattern"]),
+            ))
+
+    def find(self, content: str) -> list[tuple[int, CompiledPattern, str]]:
+        """Find secrets in file content.
+
+        Args:
+            content: Decoded file content
+
+        Returns:
+            (line number, pattern, matched text) in line order, then
+            pattern order
+        """
+        if OTHER_BREAK_RE.search(content):
+            content = LINE_BREAK_RE.sub("\n", content)
+        lines: list[str] | None = None
+        line_starts: list[int] | None = None
+        hits: list[tuple[int, int, CompiledPattern, str]] = []
+
+        for index, pattern in enumerate(self.patterns):
+            # None: run the pattern on every line
+            hit_lines: set[int] | None = None
+            if pattern.whole_buffer:
+                hit_lines = set()
+                for match in pattern.regex.finditer(content):
+                    if line_starts is None:
+                        line_starts = [0] + [
+                            m.end() for m in re.finditer("\n", content)
+                        ]
+                    first = bisect_right(line_starts, match.start())
+                    last = bisect_right(line_starts, match.end())
+                    hit_lines.update(range(first, last + 1))
+                if not hit_lines:
+                    continue
+            if lines is None:
+                lines = content.splitlines()
+            numbers = (
+                range(1, len(lines) + 1) if hit_lines is None else sorted(hit_lines)
+            )
+            for line_num in numbers:
+                if line_num > len(lines):
+                    break
+                for match in pattern.regex.findall(lines[line_num - 1]):
+                    hits.append((line_num, index, pattern, str(match)))
+
+        hits.sort(key=lambda hit: hit[:2])
+        return [(line_num, pattern, text) for line_num, _, pattern, text in hits]
+
+    def find_lines(
+        self, numbered_lines: list[tuple[int, str]]
+    ) -> list[tuple[int, CompiledPattern, str]]:
+        """Find secrets in selected lines of a file, e.g. lines a diff adds.
+
+        Args:
+            numbered_lines: (line number, text) pairs, in file order
+
+        Returns:
+            Same as find(), numbered with the given line numbers
+        """
+        # A line holding other line breaks is several lines to find()
+        numbers: list[int] = []
+        for line_num, text in numbered_lines:
+            numbers.extend([line_num] * len((text + "\n").splitlines()))
+        content = "\n".join(text for _, text in numbered_lines)
+        return [
+            (numbers[index - 1], pattern, match)
+            for index, pattern, match in self.find(content)
+        ]
+
+
+# =============================================================================
+# Diff Parsing
+# =============================================================================
+
+HUNK_HEADER_RE = re.compile(rb"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+def unquote_git_path(raw: bytes) -> bytes:
+    """Undo git's C-style quoting of unusual paths (\"b/a\\tb\")."""
+    if not raw.startswith(b'"'):
+        return raw
+    return raw[1:-1].decode("unicode_escape").encode("latin-1")
+
+
+def iter_added_lines(
+    lines: Iterator[bytes],
+) -> Iterator[tuple[str, list[tuple[int, str]] | None]]:
+    """Parse `git diff -U0` output into the lines each file adds.
+
+    Args:
+        lines: Raw diff output lines
+
+    Yields:
+        (repo-relative path, [(line number, text)]) per changed file; the
+        list is None when the added text is not UTF-8
+    """
+    path: str | None = None
+    added: list[tuple[int, str]] | None = []
+    next_line = 0
+    in_hunk = False
+
+    for raw in lines:
+        if raw.startswith(b"diff --git "):
+            if path is not None:
+                yield path, added
+            path = None
+            added = []
+            in_hunk = False
+            continue
+        if not in_hunk:
+            if raw.startswith(b"+++ "):
+                # Git ends unquoted paths containing spaces with a tab
+                target = unquote_git_path(raw[4:].rstrip(b"\n").removesuffix(b"\t"))
+                if target.startswith(b"b/"):
+                    path = target[2:].decode("utf-8", errors="surrogateescape")
+                continue
+            if not raw.startswith(b"@@"):
+                continue
+        match = HUNK_HEADER_RE.match(raw)
+        if match:
+            next_line = int(match.group(1))
+            in_hunk = True
+            continue
+        if raw.startswith(b"+"):
+            if added is not None:
+                try:
+                    text = raw[1:].rstrip(b"\n").decode("utf-8")
+                    added.append((next_line, text))
+                except UnicodeDecodeError:
+                    added = None
+            next_line += 1
+
+    if path is not None:
+        yield path, added
+
+
+# =============================================================================
+# Parallel Scanning
+# =============================================================================
+
+# Below this many bytes in total, starting worker processes costs more than
+# the scan itself
+MIN_PARALLEL_BYTES = 1 << 20
+# Chunks per worker: enough to even out uneven file sizes
+CHUNKS_PER_JOB = 4
+
+_worker_scanner: SecretScanner | None = None
+
+
+def _init_scan_worker(scanner: SecretScanner) -> None:
+    """Keep one scanner per worker process instead of one per chunk."""
+    global _worker_scanner
+    _worker_scanner = scanner
+
+
+def _scan_chunk(
+    chunk: list[tuple[int, Path]],
+) -> list[tuple[int, tuple[list[SecretFinding], str | None]]]:
+    """Scan a chunk of (input index, path) pairs in a worker process."""
+    assert _worker_scanner is not None
+    return [(index, _worker_scanner.scan_contents(path)) for index, path in chunk]
+
+
+def chunk_by_size(
+    files: list[Path], jobs: int
+) -> tuple[list[list[tuple[int, Path]]], int]:
+    """Split files into chunks of roughly equal byte size.
+
+    Args:
+        files: Files to scan, in output order
+        jobs: Number of worker processes
+
+    Returns:
+        Tuple of (chunks of (input index, path), total bytes)
+    """
+    sizes = []
+    for file_path in files:
+        try:
+            sizes.append(file_path.stat().st_size)
+        except OSError:
+            sizes.append(0)
+    total = sum(sizes)
+    target = max(1, total // (jobs * CHUNKS_PER_JOB))
+
+    chunks: list[list[tuple[int, Path]]] = []
+    current: list[tuple[int, Path]] = []
+    current_bytes = 0
+    for index, (file_path, size) in enumerate(zip(files, sizes)):
+        current.append((index, file_path))
+        current_bytes += size
+        if current_bytes >= target:
+            chunks.append(current)
+            current = []
+            current_bytes = 0
+    if current:
+        chunks.append(current)
+    return chunks, total
+
+
+# =============================================================================
+# Scan Cache
+# =============================================================================
+
+SCAN_CACHE_FILE = ".secret-scan-cache.json"
+# Part of the cache key: bump when matching changes what a file yields
+SCAN_CACHE_VERSION = 1
+# Oldest entries are dropped beyond this
+SCAN_CACHE_MAX_ENTRIES = 100_000
+
+
+def git_blob_id(data: bytes) -> str:
+    """Object id git gives a blob with this content."""
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ScanCache:
+    """Findings per file content, persisted under .trellis/.
+
+    Entries are keyed by blob id; the file as a whole belongs to one
+    pattern set and starts out empty when the patterns change.
+    """
+
+    def __init__(self, path: Path, patterns_key: str):
+        """Initialize scan cache.
+
+        Args:
+            path: Cache file path
+            patterns_key: Hash of the pattern set the findings came from
+        """
+        self.path = path
+        self.patterns_key = patterns_key
+        self.entries: dict[str, list[list[Any]]] = {}
+        self.dirty = False
+
+    def load(self) -> None:
+        """Load entries, unless the file is missing, corrupt or stale."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if (
+            isinstance(data, dict)
+            and data.get("patterns") == self.patterns_key
+            and isinstance(data.get("blobs"), dict)
+        ):
+            self.entries = data["blobs"]
+
+    def get(self, blob_id: str) -> list[list[Any]] | None:
+        """Cached [line, type, severity, matched_text] rows for a blob."""
+        return self.entries.get(blob_id)
+
+    def put(self, blob_id: str, rows: list[list[Any]]) -> None:
+        """Record the findings rows for a blob."""
+        self.entries[blob_id] = rows
+        self.dirty = True
+
+    def save(self) -> None:
+        """Write the cache if it changed; failures only cost a rescan."""
+        if not self.dirty:
+            return
+        excess = len(self.entries) - SCAN_CACHE_MAX_ENTRIES
+        if excess > 0:
+            for blob_id in list(islice(self.entries, excess)):
+                del self.entries[blob_id]
+        payload = json.dumps(
+            {"patterns": self.patterns_key, "blobs": self.entries},
+            separators=(",", ":"),
+        )
+        # A unique temp name, so concurrent scans never write the same file
+        try:
+            fd, temp_name = tempfile.mkstemp(
+                prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent
+            )
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(payload)
+            os.replace(temp_name, self.path)
+        except OSError:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            return
+        self.dirty = False
+
+
+# =============================================================================
+# Baseline Index
+# =============================================================================
+
+BASELINE_INDEX_FILE = ".secrets-baseline.idx"
+BASELINE_INDEX_MAGIC = b"SBKBIDX2"
+# Magic, sha1 of the baseline file, slot count
+BASELINE_INDEX_HEADER = struct.Struct("<8s20sQ")
+BASELINE_INDEX_SLOT = struct.Struct("<Q")
+
+
+def baseline_key(file: str, line: int) -> int:
+    """Nonzero 64-bit key of a baseline (file, line) entry."""
+    digest = hashlib.blake2b(
+        f"{file}\0{line}".encode("utf-8", errors="surrogatepass"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little") | 1
+
+
+def parse_baseline_entries(data: bytes) -> set[tuple[str, int]] | None:
+    """Parse the (file, line_number) entries of a detect-secrets baseline.
+
+    Args:
+        data: Contents of .secrets.baseline
+
+    Returns:
+        Set of entries, or None if the contents cannot be parsed
+    """
+    try:
+        baseline = json.loads(data.decode("utf-8"))
+    except ValueError:
+        return None
+
+    results = baseline.get("results") if isinstance(baseline, dict) else None
+    entries = set()
+    if not isinstance(results, dict):
+        return entries
+    for file, secrets in results.items():
+        if not isinstance(secrets, list):
+            continue
+        for secret in secrets:
+            line = secret.get("line_number") if isinstance(secret, dict) else None
+            if isinstance(line, float) and line.is_integer():
+                line = int(line)
+            if isinstance(line, int):
+                entries.add((file, int(line)))
+    return entries
+
+
+class BaselineIndex:
+    """Baseline (file, line) entries with O(1) membership tests.
+
+    Backed either by a set parsed from the baseline JSON or by a
+    memory-mapped sidecar holding an open-addressing table of
+    baseline_key() values, which needs no parsing at startup.
+    """
+
+    def __init__(
+        self,
+        entries: set[tuple[str, int]] | None = None,
+        table: mmap.mmap | None = None,
+    ):
+        """Initialize baseline index.
+
+        Args:
+            entries: Entries parsed from the baseline JSON
+            table: Mapped sidecar, already checked by open_table()
+        """
+        self.entries = entries
+        self.table = table
+        self.mask = 0
+        if table is not None:
+            self.mask = BASELINE_INDEX_HEADER.unpack_from(table)[2] - 1
+
+    def __contains__(self, entry: tuple[str, int]) -> bool:
+        """Check whether a (file, line) pair is in the baseline."""
+        if self.entries is not None:
+            return entry in self.entries
+        key = baseline_key(*entry)
+        slot = (key >> 1) & self.mask
+        while True:
+            stored = BASELINE_INDEX_SLOT.unpack_from(
+                self.table, BASELINE_INDEX_HEADER.size + slot * BASELINE_INDEX_SLOT.size
+            )[0]
+            if stored == key:
+                return True
+            if stored == 0:
+                return False
+            slot = (slot + 1) & self.mask
+
+    @staticmethod
+    def open_table(path: Path, digest: bytes) -> mmap.mmap | None:
+        """Map a sidecar table if it was built from this baseline content.
+
+        The content hash, unlike size and mtime, also catches edits that
+        keep both (a same-length change with the mtime restored).
+
+        Args:
+            path: Sidecar path
+            digest: sha1 of the baseline file
+
+        Returns:
+            Mapped table, or None if missing, corrupt or stale
+        """
+        try:
+            with open(path, "rb") as f:
+                table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(table) >= BASELINE_INDEX_HEADER.size:
+            magic, table_digest, slots = BASELINE_INDEX_HEADER.unpack_from(table)
+            if (
+                magic == BASELINE_INDEX_MAGIC
+                and table_digest == digest
+                and slots > 0
+                and slots & (slots - 1) == 0
+                and len(table)
+                == BASELINE_INDEX_HEADER.size + slots * BASELINE_INDEX_SLOT.size
+            ):
+                return table
+        table.close()
+        return None
+
+    @staticmethod
+    def write_table(
+        path: Path, entries: set[tuple[str, int]], digest: bytes
+    ) -> None:
+        """Write a sidecar table; failures only cost a JSON parse next time.
+
+        Args:
+            path: Sidecar path
+            entries: Entries parsed from the baseline JSON
+            digest: sha1 of the baseline content the entries came from
+        """
+        slots = 8
+        while slots < 2 * len(entries):
+            slots *= 2
+        mask = slots - 1
+        table = [0] * slots
+        for entry in entries:
+            key = baseline_key(*entry)
+            slot = (key >> 1) & mask
+            while table[slot] not in (0, key):
+                slot = (slot + 1) & mask
+            table[slot] = key
+
+        try:
+            fd, temp_name = tempfile.mkstemp(
+                prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+            )
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(BASELINE_INDEX_HEADER.pack(BASELINE_INDEX_MAGIC, digest, slots))
+                f.write(struct.pack(f"<{slots}Q", *table))
+            os.replace(temp_name, path)
+        except OSError:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+
+
 # =============================================================================
 # Secret Scanner Class
 # =============================================================================
@@ -106,15 +628,32 @@ class SecretScanner:
         "poetry.lock",
     ]
 
-    def __init__(self, repo_root: Path):
+    def __init__(self, repo_root: Path, jobs: int = 1, use_cache: bool = True):
         """Initialize secret scanner.
 
         Args:
             repo_root: Path to repository root
+            jobs: Worker processes for scanning files (1 scans in-process)
+            use_cache: Reuse findings for unchanged file contents from
+                .trellis/.secret-scan-cache.json
         """
         self.repo_root = repo_root
+        self.jobs = jobs
+        self.use_cache = use_cache
         self._policy = None
         self._detect_secrets_available = None
+        self._pattern_set: SecretPatternSet | None = None
+        self._cache: ScanCache | None = None
+        self._baseline: BaselineIndex | None = None
+        self._baseline_loaded = False
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Worker processes only scan; the caches stay with the parent."""
+        state = self.__dict__.copy()
+        state["_cache"] = None
+        state["_baseline"] = None
+        state["_baseline_loaded"] = False
+        return state
 
     @property
     def policy(self):
@@ -151,6 +690,67 @@ class SecretScanner:
             ]
         return self.DEFAULT_PATTERNS
 
+    @property
+    def pattern_set(self) -> SecretPatternSet:
+        """Secret patterns, compiled on first use."""
+        if self._pattern_set is None:
+            self._pattern_set = SecretPatternSet(self.get_patterns())
+        return self._pattern_set
+
+    @property
+    def cache(self) -> ScanCache | None:
+        """Scan cache, or None if disabled or the repo has no .trellis/."""
+        trellis_dir = self.repo_root / ".trellis"
+        if self._cache is None and self.use_cache and trellis_dir.is_dir():
+            patterns_key = hashlib.sha256(
+                json.dumps(
+                    [SCAN_CACHE_VERSION, self.get_patterns()], sort_keys=True
+                ).encode("utf-8")
+            ).hexdigest()
+            self._cache = ScanCache(trellis_dir / SCAN_CACHE_FILE, patterns_key)
+            self._cache.load()
+        return self._cache
+
+    def index_blob_ids(self) -> dict[str, str]:
+        """Blob ids of tracked files whose working copy matches the index.
+
+        Git already knows these from its stat cache, so such files need
+        neither reading nor hashing to find their cache entry.
+
+        Returns:
+            Dict of repo-relative POSIX path to blob id (empty outside git)
+        """
+        try:
+            staged = subprocess.run(
+                ["git", "ls-files", "--stage", "-z"],
+                capture_output=True,
+                cwd=self.repo_root,
+            )
+            modified = subprocess.run(
+                ["git", "diff-files", "--name-only", "-z"],
+                capture_output=True,
+                cwd=self.repo_root,
+            )
+        except OSError:
+            return {}
+        if staged.returncode != 0 or modified.returncode != 0:
+            return {}
+
+        changed = set(modified.stdout.split(b"\0"))
+        blob_ids = {}
+        for entry in staged.stdout.split(b"\0"):
+            info, _, path = entry.partition(b"\t")
+            fields = info.split()
+            # Regular files only: a symlink's blob is its target path
+            if len(fields) != 3 or fields[0] not in (b"100644", b"100755"):
+                continue
+            if fields[2] != b"0" or path in changed:
+                continue
+            blob_ids[path.decode("utf-8", errors="surrogateescape")] = (
+                fields[1].decode("ascii")
+            )
+        return blob_ids
+
     def get_exclude_paths(self) -> list[str]:
         """Get paths to exclude from scanning."""
         if self.policy and self.policy.secret_exclude_paths:
@@ -158,11 +758,22 @@ class SecretScanner:
         return self.DEFAULT_EXCLUDES
 
     def should_exclude(self, file_path: str) -> bool:
-        """Check if a file should be excluded from scanning."""
+        """Check if a file should be excluded from scanning.
+
+        Paths under the repository are matched in repo-relative form, so
+        the exclude globs behave the same for absolute paths (file scans)
+        and git paths (added-line scans).
+        """
         import fnmatch
 
         excludes = self.get_exclude_paths()
-        path_str = str(file_path).replace("\\", "/")
+        path = Path(file_path)
+        if path.is_absolute():
+            try:
+                path = path.relative_to(self.repo_root)
+            except ValueError:
+                pass
+        path_str = str(path).replace("\\", "/")
 
         for pattern in excludes:
             if fnmatch.fnmatch(path_str, pattern):
@@ -181,64 +792,205 @@ class SecretScanner:
         Returns:
             List of SecretFinding objects
         """
+        return self.scan_contents(file_path)[0]
+
+    def scan_contents(
+        self, file_path: Path
+    ) -> tuple[list[SecretFinding], str | None]:
+        """Scan a single file for secrets, noting what content was scanned.
+
+        Args:
+            file_path: Path to file to scan
+
+        Returns:
+            Tuple of (findings, blob id of the content read, or None if the
+            file was not read or the cache is off)
+        """
         findings = []
 
         if self.should_exclude(str(file_path)):
-            return findings
+            return findings, None
 
         if not file_path.is_file():
-            return findings
+            return findings, None
+
+        try:
+            data = file_path.read_bytes()
+        except OSError:
+            return findings, None
+        blob_id = git_blob_id(data) if self.use_cache else None
 
         # Skip binary files
         try:
-            content = file_path.read_text(encoding="utf-8")
-        except (UnicodeDecodeError, OSError):
-            return findings
+            content = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return findings, blob_id
+
+        for line_num, pattern, match in self.pattern_set.find(content):
+            findings.append(SecretFinding(
+                file=str(file_path.relative_to(self.repo_root)),
+                line=line_num,
+                type=pattern.name,
+                severity=pattern.severity,
+                # Truncate matched text for display
+                matched_text=match[:50],
+            ))
+
+        return findings, blob_id
+
+    def scan_files(self, files: list[Path]) -> list[SecretFinding]:
+        """Scan multiple files for secrets.
 
-        patterns = self.get_patterns()
+        Files whose content is in the scan cache are not scanned again;
+        clean tracked files are looked up by their git index blob id
+        without being read. With more than one job, the remaining files are
+        scanned in worker processes. Findings are merged back in input
+        order, so the result is the same as scanning every file in-process.
 
-        for line_num, line in enumerate(content.splitlines(), 1):
-            for pattern_info in patterns:
+        Args:
+            files: List of file paths to scan
+
+        Returns:
+            List of SecretFinding objects
+        """
+        files = [Path(file_path) for file_path in files]
+        cache = self.cache
+        index_ids = self.index_blob_ids() if cache is not None else {}
+
+        per_file: list[list[SecretFinding]] = [[] for _ in files]
+        pending = []
+        for index, file_path in enumerate(files):
+            if cache is not None and not self.should_exclude(str(file_path)):
                 try:
-                    matches = re.findall(pattern_info["pattern"], line)
-                    for match in matches:
-                        # Truncate matched text for display
-                        matched_text = str(match)[:50] if len(str(match)) > 50 else str(match)
-                        findings.append(SecretFinding(
+                    rel_path = file_path.relative_to(self.repo_root).as_posix()
+                except ValueError:
+                    rel_path = ""
+                blob_id = index_ids.get(rel_path)
+                rows = cache.get(blob_id) if blob_id is not None else None
+                if rows is not None:
+                    per_file[index] = [
+                        SecretFinding(
                             file=str(file_path.relative_to(self.repo_root)),
                             line=line_num,
-                            type=pattern_info["name"],
-                            severity=pattern_info.get("severity", "medium"),
+                            type=name,
+                            severity=severity,
                             matched_text=matched_text,
-                        ))
-                except re.error:
+                        )
+                        for line_num, name, severity, matched_text in rows
+                    ]
                     continue
+            pending.append(index)
+
+        results = None
+        if self.jobs > 1 and len(pending) > 1:
+            results = self._scan_files_parallel([files[i] for i in pending])
+        if results is None:
+            results = [self.scan_contents(files[i]) for i in pending]
+
+        for index, (findings, blob_id) in zip(pending, results):
+            per_file[index] = findings
+            if cache is not None and blob_id is not None:
+                cache.put(blob_id, [
+                    [f.line, f.type, f.severity, f.matched_text] for f in findings
+                ])
+        if cache is not None:
+            cache.save()
+
+        return [finding for findings in per_file for finding in findings]
+
+    def _scan_files_parallel(
+        self, files: list[Path]
+    ) -> list[tuple[list[SecretFinding], str | None]] | None:
+        """Scan files in a process pool.
 
-        return findings
+        Returns:
+            scan_contents() results in input order, or None when the scan
+            is too small to be worth it or worker processes are unavailable
+        """
+        chunks, total_bytes = chunk_by_size(files, self.jobs)
+        if total_bytes < MIN_PARALLEL_BYTES or len(chunks) < 2:
+            return None
 
-    def scan_files(self, files: list[Path]) -> list[SecretFinding]:
-        """Scan multiple files for secrets.
+        # Load policy and compile patterns once, before the scanner is
+        # copied into the workers
+        self.get_exclude_paths()
+        _ = self.pattern_set
+
+        per_file: list[tuple[list[SecretFinding], str | None]] = [
+            ([], None) for _ in files
+        ]
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(self.jobs, len(chunks)),
+                initializer=_init_scan_worker,
+                initargs=(self,),
+            ) as pool:
+                for results in pool.map(_scan_chunk, chunks):
+                    for index, result in results:
+                        per_file[index] = result
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            return None
+
+        return per_file
+
+    def scan_added_lines(self, diff_args: list[str]) -> list[SecretFinding] | None:
+        """Scan only the lines a git diff adds.
+
+        The diff is streamed from `git diff -U0 --text`, so neither whole
+        files nor the working tree are read, and old lines are never flagged
+        again. --text keeps files git would call binary (a NUL byte, a
+        `binary` or `-diff` attribute) from collapsing into "Binary files
+        differ" with no added lines to scan.
 
         Args:
-            files: List of file paths to scan
+            diff_args: Arguments selecting the diff (e.g. ["--cached"])
 
         Returns:
-            List of SecretFinding objects
+            List of SecretFinding objects, or None if git failed
         """
-        all_findings = []
-
-        for file_path in files:
-            findings = self.scan_file(Path(file_path))
-            all_findings.extend(findings)
+        try:
+            process = subprocess.Popen(
+                ["git", "-c", "core.quotePath=false", "diff", *diff_args,
+                 "-U0", "--text", "--no-color", "--no-ext-diff",
+                 "--no-textconv", "--diff-filter=ACMR"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=self.repo_root,
+            )
+        except OSError:
+            return None
 
-        return all_findings
+        findings = []
+        assert process.stdout is not None
+        with process.stdout:
+            for path, added in iter_added_lines(process.stdout):
+                if not added or self.should_exclude(path):
+                    continue
+                for line_num, pattern, match in self.pattern_set.find_lines(added):
+                    findings.append(SecretFinding(
+                        file=str(Path(path)),
+                        line=line_num,
+                        type=pattern.name,
+                        severity=pattern.severity,
+                        matched_text=match[:50],
+                    ))
+
+        if process.wait() != 0:
+            return None
+        return findings
 
-    def scan_staged(self) -> list[SecretFinding]:
+    def scan_staged(self, added_only: bool = False) -> list[SecretFinding]:
         """Scan staged git changes.
 
+        Args:
+            added_only: Scan only the lines the staged diff adds
+
         Returns:
             List of SecretFinding objects
         """
+        if added_only:
+            return self.scan_added_lines(["--cached"]) or []
+
         # Get staged files
         result = subprocess.run(
             ["git", "diff", "--cached", "--name-only", "--diff-filter=ACMR"],
@@ -258,15 +1010,25 @@ class SecretScanner:
 
         return self.scan_files(files)
 
-    def scan_diff(self, base_branch: str = "main") -> list[SecretFinding]:
+    def scan_diff(
+        self, base_branch: str = "main", added_only: bool = False
+    ) -> list[SecretFinding]:
         """Scan files changed compared to base branch.
 
         Args:
             base_branch: Base branch to compare against
+            added_only: Scan only the lines the diff adds
 
         Returns:
             List of SecretFinding objects
         """
+        if added_only:
+            findings = self.scan_added_lines([f"origin/{base_branch}"])
+            if findings is None:
+                # Try without origin/
+                findings = self.scan_added_lines([base_branch])
+            return findings or []
+
         # Get changed files
         result = subprocess.run(
             ["git", "diff", f"origin/{base_branch}", "--name-only", "--diff-filter=ACMR"],
@@ -366,32 +1128,53 @@ class SecretScanner:
         Returns:
             List of new (non-baseline) findings
         """
-        baseline_file = self.repo_root / ".secrets.baseline"
-
-        if not baseline_file.exists():
+        baseline = self.baseline
+        if baseline is None:
             return findings
 
-        try:
-            with open(baseline_file, "r", encoding="utf-8") as f:
-                baseline = json.load(f)
-
-            baseline_secrets = baseline.get("results", {})
-            new_findings = []
+        return [
+            finding for finding in findings
+            if (finding.file, finding.line) not in baseline
+        ]
 
-            for finding in findings:
-                file_secrets = baseline_secrets.get(finding.file, [])
-                is_in_baseline = any(
-                    secret.get("line_number") == finding.line
-                    for secret in file_secrets
-                )
+    @property
+    def baseline(self) -> BaselineIndex | None:
+        """Entries of .secrets.baseline, loaded once per scanner.
 
-                if not is_in_baseline:
-                    new_findings.append(finding)
+        With the cache enabled, the entries are kept in a memory-mapped
+        sidecar under .trellis/, rebuilt whenever the baseline file's
+        content hash changes; hashing is much cheaper than parsing.
 
-            return new_findings
+        Returns:
+            BaselineIndex, or None if there is no readable baseline
+        """
+        if self._baseline_loaded:
+            return self._baseline
+        self._baseline_loaded = True
 
-        except Exception:
-            return findings
+        baseline_file = self.repo_root / ".secrets.baseline"
+        try:
+            data = baseline_file.read_bytes()
+        except OSError:
+            return None
+        digest = hashlib.sha1(data).digest()
+
+        sidecar = None
+        trellis_dir = self.repo_root / ".trellis"
+        if self.use_cache and trellis_dir.is_dir():
+            sidecar = trellis_dir / BASELINE_INDEX_FILE
+            table = BaselineIndex.open_table(sidecar, digest)
+            if table is not None:
+                self._baseline = BaselineIndex(table=table)
+                return self._baseline
+
+        entries = parse_baseline_entries(data)
+        if entries is None:
+            return None
+        if sidecar is not None:
+            BaselineIndex.write_table(sidecar, entries, digest)
+        self._baseline = BaselineIndex(entries=entries)
+        return self._baseline
 
 
 # =============================================================================
@@ -451,11 +1234,33 @@ def main() -> int:
     parser.add_argument("--update-baseline", action="store_true", help="Update detect-secrets baseline")
     parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
     parser.add_argument("--fail-on-secrets", action="store_true", help="Exit with error if secrets found")
+    parser.add_argument(
+        "--added-only",
+        action="store_true",
+        help="With --staged/--diff, scan only the lines the diff adds",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Rescan every file and read the baseline JSON instead of using cached results",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Worker processes for scanning files (default: one per CPU; 1 disables)",
+    )
 
     args = parser.parse_args()
+    if args.jobs < 0:
+        parser.error("--jobs must be a non-negative integer")
 
     repo_root = get_repo_root()
-    scanner = SecretScanner(repo_root)
+    scanner = SecretScanner(
+        repo_root,
+        jobs=args.jobs or os.cpu_count() or 1,
+        use_cache=not args.no_cache,
+    )
 
     if args.update_baseline:
         success = scanner.update_baseline()
@@ -464,14 +1269,14 @@ def main() -> int:
     findings = []
 
     if args.staged:
-        findings = scanner.scan_staged()
+        findings = scanner.scan_staged(args.added_only)
     elif args.diff:
-        findings = scanner.scan_diff(args.diff)
+        findings = scanner.scan_diff(args.diff, args.added_only)
     elif args.files:
         findings = scanner.scan_files([Path(f) for f in args.files])
     else:
         # Default: scan staged
-        findings = scanner.scan_staged()
+        findings = scanner.scan_staged(args.added_only)
 
     # Filter out baseline secrets
     findings = scanner.filter_baseline(findings)
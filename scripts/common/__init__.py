@@ -0,0 +1,6 @@
+"""
+Common Python helpers shared by the SBK semantic backends.
+
+The backends are executed as scripts (``python scripts/semantic-index.py``),
+so ``scripts/`` is on ``sys.path`` and this package imports as ``common``.
+"""
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Iterable, TextIO
+
+from .semantic_daemon import request_args
+
+ParserFactory = Callable[[type[argparse.ArgumentParser]], argparse.ArgumentParser]
+Runner = Callable[[argparse.Namespace], dict]
+# Sees every well-formed request before the first one runs, e.g. to resolve
+# all symbols up front and scan the tree once for the whole batch.
+Preparer = Callable[[list[argparse.Namespace]], None]
+
+
+def read_requests(source: str) -> Iterable[tuple[int, str]]:
+    # "-" reads stdin; yields (1-based line number, raw line) for non-blank lines.
+    if source == "-":
+        handle: TextIO = sys.stdin
+        owned = False
+    else:
+        path = Path(source)
+        if not path.is_file():
+            raise ValueError(f"batch file not found: {path}")
+        handle = path.open("r", encoding="utf8")
+        owned = True
+    try:
+        for number, raw in enumerate(handle, start=1):
+            if raw.strip():
+                yield (number, raw)
+    finally:
+        if owned:
+            handle.close()
+
+
+def run_batch(
+    source: str,
+    build_parser: ParserFactory,
+    repo_root: Path,
+    run: Runner,
+    out: TextIO,
+    prepare: Preparer | None = None,
+) -> int:
+    # Each request is one JSON object: {"operation", "file", "line", "column", ...}
+    # with the same keys as the daemon params; relative files resolve against
+    # the repo root. Every request yields exactly one output line, in order:
+    # {"line", "id"?, "result"} or {"line", "id"?, "error"}. Returns the number
+    # of failed requests.
+    parsed: list[tuple[dict, argparse.Namespace | None]] = []
+    for number, raw in read_requests(source):
+        record: dict = {"line": number}
+        try:
+            request = json.loads(raw)
+            if not isinstance(request, dict):
+                raise ValueError("batch request must be a JSON object")
+            params = dict(request)
+            if "id" in params:
+                record["id"] = params.pop("id")
+            operation = params.pop("operation", None)
+            if not isinstance(operation, str):
+                raise ValueError("batch request must name an operation")
+            parsed.append(
+                (record, request_args(build_parser, operation, params, repo_root))
+            )
+        except Exception as exc:  # noqa: BLE001
+            record["error"] = str(exc)
+            parsed.append((record, None))
+
+    if prepare is not None:
+        prepare([args for _, args in parsed if args is not None])
+
+    failures = 0
+    for record, args in parsed:
+        if args is not None:
+            try:
+                record["result"] = run(args)
+            except Exception as exc:  # noqa: BLE001
+                record["error"] = str(exc)
+        if "error" in record:
+            failures += 1
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+    return failures
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, NoReturn
+
+from .semantic_text import write_text_atomic
+
+
+DAEMON_DIR = Path(".sbk") / "semantic-daemon"
+# sun_path holds ~104-108 bytes depending on the platform; sockets for deeper
+# repo roots live in the temp dir instead (the info file records the path).
+MAX_SOCKET_PATH = 100
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+OPERATION_FAILED = -32000
+
+# Request params map 1:1 onto the backend CLI flags of the same name.
+REQUEST_FLAGS = {
+    "file",
+    "line",
+    "column",
+    "newName",
+    "dryRun",
+    "maxResults",
+    "language",
+}
+
+Handler = Callable[[str, dict], dict]
+# Plans a refresh of the session's index without touching it; returns the
+# step that applies it (run under the request lock), or None if nothing
+# changed. The flag allows walking the tree when git cannot answer.
+Poller = Callable[[bool], Callable[[], None] | None]
+
+
+class JsonRpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class RequestArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str) -> NoReturn:
+        raise JsonRpcError(INVALID_PARAMS, message)
+
+
+def info_path(repo_root: Path, backend: str) -> Path:
+    return repo_root / DAEMON_DIR / f"{backend}.json"
+
+
+def socket_path_for(repo_root: Path, backend: str) -> Path:
+    root = repo_root.resolve()
+    candidate = root / DAEMON_DIR / f"{backend}.sock"
+    if len(str(candidate)) <= MAX_SOCKET_PATH:
+        return candidate
+    digest = hashlib.sha1(str(root).encode("utf8")).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"sbk-{backend}-{digest}.sock"
+
+
+def request_args(
+    build_parser: Callable[[type[argparse.ArgumentParser]], argparse.ArgumentParser],
+    method: str,
+    params: Any,
+    repo_root: Path,
+) -> argparse.Namespace:
+    # Relative file params resolve against the daemon's repo root, since the
+    # client's working directory is unknown here. Any socket client can send
+    # requests, so files outside the repo root (absolute paths, `..`,
+    # symlinks leading out) are rejected.
+    if not isinstance(params, dict):
+        raise JsonRpcError(INVALID_PARAMS, "params must be an object")
+    argv = ["--operation", method, "--targetRepoRoot", str(repo_root)]
+    for key, value in params.items():
+        if key not in REQUEST_FLAGS:
+            raise JsonRpcError(INVALID_PARAMS, f"unsupported parameter '{key}'")
+        if key == "file":
+            value = str(repo_file(repo_root, str(value)))
+        if isinstance(value, bool):
+            if value:
+                argv.append(f"--{key}")
+            continue
+        argv.extend((f"--{key}", str(value)))
+    return build_parser(RequestArgumentParser).parse_args(argv)
+
+
+def repo_file(repo_root: Path, value: str) -> Path:
+    root = repo_root.resolve()
+    file = (root / value).resolve()
+    try:
+        file.relative_to(root)
+    except ValueError:
+        raise JsonRpcError(
+            INVALID_PARAMS, f"file is outside the repository: {value}"
+        ) from None
+    return file
+
+
+def call(socket_path: Path, method: str, params: dict, timeout: float = 60.0) -> Any:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(str(socket_path))
+        request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        client.sendall((json.dumps(request) + "\n").encode("utf8"))
+        with client.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ValueError("semantic daemon closed the connection without a reply")
+    response = json.loads(line)
+    if "error" in response:
+        raise ValueError(response["error"].get("message", "semantic daemon error"))
+    return response.get("result")
+
+
+def is_running(socket_path: Path) -> bool:
+    try:
+        call(socket_path, "ping", {}, timeout=2.0)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def settle(apply: Callable[[], None] | None) -> None:
+    if apply is not None:
+        apply()
+
+
+def serve(
+    repo_root: Path,
+    backend: str,
+    operations: set[str],
+    handle: Handler,
+    poll: Poller,
+    interval: float,
+    options: dict[str, Any],
+) -> None:
+    # One resident process per (repo, backend). Refreshes are planned without
+    # the request lock and only applied under it, so answers always come
+    # from a consistent index and no request waits behind a stat walk. Each
+    # request first asks git what changed (no walk); the watcher re-plans
+    # every `interval` seconds and walks the tree only outside git. Applied
+    # renames splice files at indexed positions, so they may walk too.
+    if not hasattr(socket, "AF_UNIX"):
+        raise ValueError("semantic daemon requires Unix domain socket support")
+    path = socket_path_for(repo_root, backend)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        if is_running(path):
+            raise ValueError(f"semantic daemon already running on {path}")
+        path.unlink()
+
+    settle(poll(True))
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def dispatch(raw: bytes) -> dict:
+        request_id = None
+        try:
+            try:
+                message = json.loads(raw)
+            except ValueError as exc:
+                raise JsonRpcError(PARSE_ERROR, f"invalid JSON: {exc}") from exc
+            if not isinstance(message, dict) or not isinstance(
+                message.get("method"), str
+            ):
+                raise JsonRpcError(INVALID_REQUEST, "request must name a method")
+            request_id = message.get("id")
+            method = message["method"]
+            if method == "ping":
+                result: Any = {
+                    "backend": backend,
+                    "pid": os.getpid(),
+                    "repoRoot": str(repo_root.resolve()),
+                    "options": options,
+                }
+            elif method == "shutdown":
+                threading.Thread(target=server.shutdown, daemon=True).start()
+                result = {"stopping": True}
+            elif method in operations:
+                params = message.get("params", {})
+                writes = (
+                    method == "rename"
+                    and isinstance(params, dict)
+                    and not params.get("dryRun")
+                )
+                apply = poll(writes)
+                with lock:
+                    settle(apply)
+                    result = handle(method, params)
+            else:
+                raise JsonRpcError(METHOD_NOT_FOUND, f"unknown method '{method}'")
+            return {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except JsonRpcError as exc:
+            error = {"code": exc.code, "message": str(exc)}
+        except Exception as exc:  # noqa: BLE001
+            error = {"code": OPERATION_FAILED, "message": str(exc)}
+        return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            for raw in self.rfile:
+                if not raw.strip():
+                    continue
+                reply = json.dumps(dispatch(raw)) + "\n"
+                self.wfile.write(reply.encode("utf8"))
+                self.wfile.flush()
+
+    def watch() -> None:
+        while not stop.wait(interval):
+            try:
+                apply = poll(True)
+                if apply is not None:
+                    with lock:
+                        apply()
+            except Exception:  # noqa: BLE001
+                # The next request plans again and reports the failure.
+                continue
+
+    server = socketserver.ThreadingUnixStreamServer(str(path), RequestHandler)
+    server.daemon_threads = True
+    info = info_path(repo_root, backend)
+    info.parent.mkdir(parents=True, exist_ok=True)
+    ignore_file = info.parent / ".gitignore"
+    if not ignore_file.exists():
+        ignore_file.write_text("*\n", encoding="utf8")
+    write_text_atomic(
+        info,
+        json.dumps(
+            {
+                "backend": backend,
+                "pid": os.getpid(),
+                "socket": str(path),
+                "repoRoot": str(repo_root.resolve()),
+                "options": options,
+                "startedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            },
+            indent=2,
+        ),
+    )
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+        for leftover in (path, info):
+            try:
+                leftover.unlink()
+            except OSError:
+                pass
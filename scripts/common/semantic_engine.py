@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import io
+import re
+import tokenize
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from .semantic_store import (
+    GitSnapshot,
+    PathFilter,
+    RefreshPlan,
+    Scanner,
+    SymbolIndexStore,
+)
+from .semantic_text import LineIndex
+from .semantic_walk import SOURCE_SCAN, SourceTree
+
+REFRESH_STAT = "stat"
+REFRESH_GIT = "git"
+
+# Directories no backend looks into, whatever the language.
+IGNORE_DIRS = {
+    ".git",
+    "node_modules",
+    ".venv",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".metrics",
+    ".trellis",
+    ".codex",
+    ".agents",
+    ".claude",
+    "dist",
+    "build",
+    "target",
+}
+
+# Word-bounded identifiers, i.e. exactly the spans `\b{symbol}\b` can match.
+INDEX_TOKEN_RE = re.compile(r"\b[A-Za-z_][A-Za-z0-9_]*\b")
+IDENTIFIERS_VERSION = "identifiers/2"
+PYTHON_NAMES_VERSION = "python-names/3"
+
+# Posting key prefix for top-level definitions. "!" never starts an
+# identifier, so these keys never collide with a symbol lookup.
+DEFINITION_PREFIX = "!def:"
+# Unindented top-level definitions; `name` is the defined identifier.
+GO_DEFINITION_RE = re.compile(
+    r"^(?:func[ \t]+(?:\([^)\n]*\)[ \t]*)?|type[ \t]+|var[ \t]+|const[ \t]+)"
+    r"(?P<name>[A-Za-z_][A-Za-z0-9_]*)",
+    re.MULTILINE,
+)
+JAVA_DEFINITION_RE = re.compile(
+    r"^(?:(?:public|protected|private|abstract|final|static|sealed|non-sealed"
+    r"|strictfp)[ \t]+)*(?:class|interface|enum|record|@interface)[ \t]+"
+    r"(?P<name>[A-Za-z_][A-Za-z0-9_]*)",
+    re.MULTILINE,
+)
+RUST_DEFINITION_RE = re.compile(
+    r"^(?:pub(?:\([^)\n]*\))?[ \t]+)?"
+    r"(?:(?:async|const|unsafe|extern(?:[ \t]+\"[^\"\n]*\")?)[ \t]+)*"
+    r"(?:fn|struct|enum|union|trait|type|const|static|mod|macro_rules!)[ \t]+"
+    r"(?:mut[ \t]+)?(?P<name>[A-Za-z_][A-Za-z0-9_]*)",
+    re.MULTILINE,
+)
+
+
+def index_identifiers(
+    content: str, definitions: re.Pattern[str] | None = None
+) -> dict[str, list[int]]:
+    # Go/Java/Rust postings are flat [offset, line, column, ...] triples per
+    # identifier; names matched by `definitions` also get a triple under
+    # DEFINITION_PREFIX + name.
+    postings: dict[str, list[int]] = {}
+    lines = LineIndex(content)
+    for match in INDEX_TOKEN_RE.finditer(content):
+        start = match.start()
+        line, column = lines.line_col(start)
+        postings.setdefault(match.group(), []).extend((start, line, column))
+    if definitions is not None:
+        for match in definitions.finditer(content):
+            start = match.start("name")
+            line, column = lines.line_col(start)
+            postings.setdefault(DEFINITION_PREFIX + match.group("name"), []).extend(
+                (start, line, column)
+            )
+    return postings
+
+
+def is_attribute_leaf(tokens: list[tokenize.TokenInfo], index: int) -> bool:
+    probe = index - 1
+    while probe >= 0:
+        candidate = tokens[probe]
+        if candidate.type in (
+            tokenize.INDENT,
+            tokenize.DEDENT,
+            tokenize.NL,
+            tokenize.NEWLINE,
+            tokenize.COMMENT,
+            tokenize.ENCODING,
+            tokenize.ENDMARKER,
+        ):
+            probe -= 1
+            continue
+        return candidate.string == "."
+    return False
+
+
+def index_name_tokens(content: str) -> dict[str, list[int]]:
+    # Python postings are flat [line, col, is_attribute, ...] triples per
+    # NAME token; NAME tokens never span lines, so the end column is
+    # col + len(name).
+    tokens = list(tokenize.generate_tokens(io.StringIO(content).readline))
+    postings: dict[str, list[int]] = {}
+    for index, token in enumerate(tokens):
+        if token.type != tokenize.NAME:
+            continue
+        postings.setdefault(token.string, []).extend(
+            (token.start[0], token.start[1], int(is_attribute_leaf(tokens, index)))
+        )
+    return postings
+
+
+@dataclass(frozen=True)
+class LanguageSpec:
+    # A language's tokenizer and the index shard holding its postings.
+    # `entry_points` matches names a runtime or test framework calls by
+    # convention, which the safe-delete report never lists.
+    name: str
+    suffixes: tuple[str, ...]
+    scanner: Scanner
+    scanner_version: str
+    shard: str
+    entry_points: re.Pattern[str]
+
+
+LANGUAGES = {
+    spec.name: spec
+    for spec in (
+        LanguageSpec(
+            "go",
+            (".go",),
+            partial(index_identifiers, definitions=GO_DEFINITION_RE),
+            IDENTIFIERS_VERSION,
+            "symbol-go",
+            re.compile(r"main|init|_|(?:Test|Benchmark|Example|Fuzz)\w*"),
+        ),
+        LanguageSpec(
+            "java",
+            (".java",),
+            partial(index_identifiers, definitions=JAVA_DEFINITION_RE),
+            IDENTIFIERS_VERSION,
+            "symbol-java",
+            re.compile(r"\w*Test|\w*Tests|Main"),
+        ),
+        LanguageSpec(
+            "rust",
+            (".rs",),
+            partial(index_identifiers, definitions=RUST_DEFINITION_RE),
+            IDENTIFIERS_VERSION,
+            "symbol-rust",
+            re.compile(r"main|tests?"),
+        ),
+        LanguageSpec(
+            "python",
+            (".py",),
+            index_name_tokens,
+            PYTHON_NAMES_VERSION,
+            "python-tokens",
+            re.compile(r"_|__\w+__|main|test\w*|Test\w*|setUp\w*|tearDown\w*"),
+        ),
+    )
+}
+SUFFIX_LANGUAGES = {
+    suffix: spec for spec in LANGUAGES.values() for suffix in spec.suffixes
+}
+
+
+def language_of(name: str) -> LanguageSpec | None:
+    # Language of a file name, by extension.
+    dot = name.rfind(".")
+    if dot == -1:
+        return None
+    return SUFFIX_LANGUAGES.get(name[dot:])
+
+
+def split_languages(tree: SourceTree) -> dict[str, list[Path]]:
+    # One walk serves every language; each keeps the walk's path order.
+    by_language: dict[str, list[Path]] = {name: [] for name in LANGUAGES}
+    for file in tree.files():
+        spec = language_of(file.name)
+        if spec is not None:
+            by_language[spec.name].append(file)
+    return by_language
+
+
+class SemanticEngine:
+    # Indexing for one repo root behind every language front end. The tree is
+    # walked once for all registered suffixes and each file is dispatched to
+    # its language's tokenizer. Postings persist as one shard per language
+    # under .sbk/semantic-index/, so a query loads and refreshes only the
+    # shard of the language it asks about. The walk and the shards are
+    # reused until invalidated.
+    def __init__(
+        self,
+        repo_root: Path,
+        refresh_mode: str,
+        jobs: int,
+        file_source: str = SOURCE_SCAN,
+    ) -> None:
+        self.repo_root = repo_root
+        self.refresh_mode = refresh_mode
+        self.jobs = jobs
+        self.file_source = file_source
+        self.tree = self._new_tree()
+        self.by_language: dict[str, list[Path]] | None = None
+        self.shards: dict[str, SymbolIndexStore] = {}
+        self.fresh: set[str] = set()
+
+    def _new_tree(self) -> SourceTree:
+        return SourceTree(
+            self.repo_root, tuple(SUFFIX_LANGUAGES), IGNORE_DIRS, self.file_source
+        )
+
+    def invalidate(self) -> None:
+        # The tree may have changed: walk and re-check it on the next use.
+        self.tree = self._new_tree()
+        self.by_language = None
+        self.fresh.clear()
+
+    def files(self, language: str) -> list[Path]:
+        if self.by_language is None:
+            self.by_language = split_languages(self.tree)
+        return self.by_language[language]
+
+    def accepts(self, language: str, tree: SourceTree | None = None) -> PathFilter:
+        suffixes = LANGUAGES[language].suffixes
+        view = tree or self.tree
+        return lambda rel: rel.endswith(suffixes) and view.accepts(rel)
+
+    def refresh_store(self, store: SymbolIndexStore, language: str) -> None:
+        # Brings a store over one language's files up to date with the tree:
+        # the language's shard, or a side store such as the Python import
+        # graph or a syntax index.
+        refreshed = None
+        if self.refresh_mode == REFRESH_GIT:
+            refreshed = store.refresh_from_git(self.accepts(language), self.jobs)
+        if refreshed is None:
+            store.refresh(self.files(language), self.jobs)
+        store.save()
+
+    def shard(self, language: str) -> SymbolIndexStore:
+        store = self.shards.get(language)
+        if store is None:
+            spec = LANGUAGES[language]
+            store = SymbolIndexStore(
+                self.repo_root, spec.shard, spec.scanner, spec.scanner_version
+            )
+            store.load()
+            self.shards[language] = store
+        if language not in self.fresh:
+            self.refresh_store(store, language)
+            self.fresh.add(language)
+        return store
+
+    def loaded(self, language: str) -> SymbolIndexStore | None:
+        # The shard if it is already loaded and fresh, without touching disk.
+        if language in self.fresh:
+            return self.shards.get(language)
+        return None
+
+    def lookup(self, language: str, symbol: str) -> list[tuple[Path, list[int]]]:
+        return self.shard(language).lookup(symbol)
+
+    def poll(
+        self, extra: list[tuple[SymbolIndexStore, str]], walk: bool
+    ) -> Callable[[], None] | None:
+        # Plans a refresh of the loaded shards and the `extra` stores against
+        # a new view of the tree without changing any of them, so a daemon
+        # runs it outside its request lock. Git answers where it can; the
+        # tree is walked only if `walk` allows it or a shard is stale. Returns
+        # the step that applies the plans, or None if nothing would change.
+        shards = self.shards.copy()
+        stale = any(language not in self.fresh for language in shards)
+        walk = walk or stale
+        tree = self._new_tree()
+        git = GitSnapshot(self.repo_root)
+        by_language: dict[str, list[Path]] | None = None
+        plans: list[tuple[SymbolIndexStore, RefreshPlan]] = []
+        stores = [(store, language) for language, store in shards.items()]
+        for store, language in stores + extra:
+            plan = store.plan_from_git(self.accepts(language, tree), git)
+            if plan is None:
+                if not walk:
+                    continue
+                if by_language is None:
+                    by_language = split_languages(tree)
+                plan = store.plan(by_language[language], git)
+            if not plan.empty():
+                plans.append((store, plan))
+        if not plans and not stale:
+            return None
+
+        def apply() -> None:
+            self.tree = tree
+            self.by_language = by_language
+            for store, plan in plans:
+                store.apply(plan, self.jobs)
+                store.save()
+            self.fresh.update(shards)
+
+        return apply
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+# Unsigned 32-bit cells, as in the name table cache.
+TYPECODE = "I" if array("I").itemsize == 4 else "L"
+
+
+class MatchRow(NamedTuple):
+    # One match, materialized only while it is being reported. `offset` is
+    # the character offset in the file where the backend needs one, else 0;
+    # `flag` is backend-defined (Python: attribute access).
+    file: Path
+    line: int
+    column: int
+    offset: int
+    flag: bool
+
+
+class MatchTable:
+    # Matches of one symbol in columnar form: each file is interned once and
+    # every match costs four 32-bit cells plus one bit, instead of an object
+    # holding its own Path. Rows keep insertion order, so a file's matches
+    # stay contiguous when files are added one after another.
+    __slots__ = ("files", "file_ids", "lines", "columns", "offsets", "flags", "_ids")
+
+    def __init__(self) -> None:
+        self.files: list[Path] = []
+        self.file_ids = array(TYPECODE)
+        self.lines = array(TYPECODE)
+        self.columns = array(TYPECODE)
+        self.offsets = array(TYPECODE)
+        self.flags = bytearray()
+        self._ids: dict[Path, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __getstate__(self) -> tuple:
+        # Tables travel between worker processes; the id map is rebuilt on
+        # arrival rather than shipped.
+        return (
+            self.files,
+            self.file_ids,
+            self.lines,
+            self.columns,
+            self.offsets,
+            self.flags,
+        )
+
+    def __setstate__(self, state: tuple) -> None:
+        (
+            self.files,
+            self.file_ids,
+            self.lines,
+            self.columns,
+            self.offsets,
+            self.flags,
+        ) = state
+        self._ids = {file: index for index, file in enumerate(self.files)}
+
+    def file_id(self, file: Path) -> int:
+        index = self._ids.get(file)
+        if index is None:
+            index = len(self.files)
+            self._ids[file] = index
+            self.files.append(file)
+        return index
+
+    def add(
+        self, file: Path, line: int, column: int, offset: int = 0, flag: bool = False
+    ) -> None:
+        count = len(self.lines)
+        self.file_ids.append(self.file_id(file))
+        self.lines.append(line)
+        self.columns.append(column)
+        self.offsets.append(offset)
+        if count % 8 == 0:
+            self.flags.append(0)
+        if flag:
+            self.flags[count >> 3] |= 1 << (count & 7)
+
+    def extend(self, rows: Iterable[MatchRow]) -> MatchTable:
+        for row in rows:
+            self.add(row.file, row.line, row.column, row.offset, row.flag)
+        return self
+
+    def merge(self, other: MatchTable) -> MatchTable:
+        # Appends another table's rows column by column.
+        count = len(self.lines)
+        remap = [self.file_id(file) for file in other.files]
+        self.file_ids.extend(remap[index] for index in other.file_ids)
+        self.lines.extend(other.lines)
+        self.columns.extend(other.columns)
+        self.offsets.extend(other.offsets)
+        if count % 8 == 0:
+            self.flags.extend(other.flags)
+            return self
+        self.flags.extend(bytes((len(self.lines) + 7) // 8 - len(self.flags)))
+        for index in range(len(other.lines)):
+            if other.flag(index):
+                position = count + index
+                self.flags[position >> 3] |= 1 << (position & 7)
+        return self
+
+    def flag(self, index: int) -> bool:
+        return bool(self.flags[index >> 3] & (1 << (index & 7)))
+
+    def flagged(self) -> int:
+        return sum(bin(byte).count("1") for byte in self.flags)
+
+    def rows(self) -> Iterator[MatchRow]:
+        files = self.files
+        for index in range(len(self.lines)):
+            yield MatchRow(
+                files[self.file_ids[index]],
+                self.lines[index],
+                self.columns[index],
+                self.offsets[index],
+                self.flag(index),
+            )
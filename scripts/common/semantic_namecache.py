@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .semantic_store import INDEX_DIR, decode_source
+
+# Same contract as a store Scanner: decoded content -> {name: flat postings}.
+# The cache stores [line, col, flag, ...] triples per name.
+Builder = Callable[[str], dict[str, list[int]]]
+Occurrence = tuple[int, int, bool]
+
+MAGIC = b"SBKN"
+FORMAT_VERSION = 1
+# magic, format version, builder tag bytes, name count, names bytes, data ints
+HEADER = struct.Struct("<4sHHIII")
+# Unsigned 32-bit cells; "I" is 4 bytes on every platform CPython supports,
+# "L" is the fallback where it is not.
+TYPECODE = "I" if array("I").itemsize == 4 else "L"
+LITTLE_ENDIAN = array(TYPECODE, [1]).tobytes()[0] == 1
+
+
+def int_array(raw: bytes = b"") -> array:
+    cells = array(TYPECODE)
+    cells.frombytes(raw)
+    if not LITTLE_ENDIAN:
+        cells.byteswap()
+    return cells
+
+
+def array_bytes(cells: array) -> bytes:
+    if LITTLE_ENDIAN:
+        return cells.tobytes()
+    swapped = array(TYPECODE, cells)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+class NameTable:
+    # Occurrences of every name in one file, grouped by name: names[i] owns
+    # the triples data[offsets[i]:offsets[i + 1]].
+    __slots__ = ("names", "offsets", "data", "_ids")
+
+    def __init__(self, names: list[str], offsets: array, data: array) -> None:
+        self.names = names
+        self.offsets = offsets
+        self.data = data
+        self._ids: dict[str, int] | None = None
+
+    @classmethod
+    def from_postings(cls, postings: dict[str, list[int]]) -> NameTable:
+        names = sorted(postings)
+        offsets = array(TYPECODE, [0])
+        data = array(TYPECODE)
+        for name in names:
+            data.extend(postings[name])
+            offsets.append(len(data))
+        return cls(names, offsets, data)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes, tag: str) -> NameTable | None:
+        # None when the blob is truncated, foreign or built by another builder.
+        if len(raw) < HEADER.size:
+            return None
+        magic, version, tag_size, count, names_size, data_size = HEADER.unpack_from(
+            raw
+        )
+        cell = array(TYPECODE).itemsize
+        expected = HEADER.size + tag_size + names_size + (count + 1 + data_size) * cell
+        if magic != MAGIC or version != FORMAT_VERSION or len(raw) != expected:
+            return None
+        position = HEADER.size
+        if raw[position : position + tag_size] != tag.encode("utf8"):
+            return None
+        position += tag_size
+        blob = raw[position : position + names_size].decode("utf8")
+        names = blob.split("\n") if count else []
+        position += names_size
+        offsets = int_array(raw[position : position + (count + 1) * cell])
+        position += (count + 1) * cell
+        data = int_array(raw[position:])
+        if len(names) != count:
+            return None
+        return cls(names, offsets, data)
+
+    def to_bytes(self, tag: str) -> bytes:
+        tag_bytes = tag.encode("utf8")
+        blob = "\n".join(self.names).encode("utf8")
+        header = HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            len(tag_bytes),
+            len(self.names),
+            len(blob),
+            len(self.data),
+        )
+        return b"".join(
+            (header, tag_bytes, blob, array_bytes(self.offsets), array_bytes(self.data))
+        )
+
+    def occurrences(self, name: str) -> list[Occurrence]:
+        if self._ids is None:
+            self._ids = {item: index for index, item in enumerate(self.names)}
+        index = self._ids.get(name)
+        if index is None:
+            return []
+        data = self.data
+        return [
+            (data[cell], data[cell + 1], bool(data[cell + 2]))
+            for cell in range(self.offsets[index], self.offsets[index + 1], 3)
+        ]
+
+    def at(self, line: int, column: int) -> tuple[str, int, bool] | None:
+        # (name, start col, flag) of the occurrence covering line:column.
+        data = self.data
+        for index, name in enumerate(self.names):
+            for cell in range(self.offsets[index], self.offsets[index + 1], 3):
+                if data[cell] != line:
+                    continue
+                start = data[cell + 1]
+                if start <= column < start + len(name):
+                    return (name, start, bool(data[cell + 2]))
+        return None
+
+
+class NameTableCache:
+    # One binary NameTable per distinct file content under
+    # .sbk/semantic-index/<name>/<sha1>.bin. Entries are immutable and keyed
+    # by content alone, so they serve every path with that content; retain()
+    # drops those for content the current tree no longer holds, so content
+    # that only exists on another branch is rebuilt after a checkout. A torn
+    # or foreign entry simply reads as a miss and is rebuilt. `added` records
+    # that this instance built an entry since the last retain().
+    def __init__(self, repo_root: Path, name: str, builder: Builder, tag: str) -> None:
+        self.directory = repo_root / INDEX_DIR / name
+        self.builder = builder
+        self.tag = tag
+        self.added = False
+
+    def entry_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.bin"
+
+    def table(self, raw: bytes) -> tuple[str, NameTable]:
+        digest = hashlib.sha1(raw).hexdigest()
+        path = self.entry_path(digest)
+        try:
+            cached = NameTable.from_bytes(path.read_bytes(), self.tag)
+        except OSError:
+            cached = None
+        if cached is not None:
+            return (digest, cached)
+        try:
+            postings = self.builder(decode_source(raw))
+        except Exception:  # noqa: BLE001
+            # Undecodable or untokenizable content has no names; caching the
+            # empty table keeps it from being retried until it changes.
+            postings = {}
+        table = NameTable.from_postings(postings)
+        self._write(path, table.to_bytes(self.tag))
+        self.added = True
+        return (digest, table)
+
+    def retain(self, digests: Iterable[str]) -> None:
+        # Drop entries for contents no longer present in the tree.
+        keep = {f"{digest}.bin" for digest in digests}
+        self.added = False
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name.endswith(".bin") and entry.name not in keep:
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    continue
+
+    def _write(self, path: Path, payload: bytes) -> None:
+        # No fsync: a lost or torn entry only costs a rebuild.
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            ignore_file = self.directory.parent / ".gitignore"
+            if not ignore_file.exists():
+                ignore_file.write_text("*\n", encoding="utf8")
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=f".{path.name}.", suffix=".tmp", dir=self.directory
+            )
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(payload)
+            os.replace(tmp_name, path)
+        except OSError:
+            # Read-only checkouts still answer from the freshly built table.
+            return
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# With fewer files per worker than this, pool start-up costs more than the
+# scan it parallelizes, so small inputs stay on the serial path.
+MIN_ITEMS_PER_JOB = 8
+
+
+def ordered_map(fn: Callable[[T], R], items: list[T], jobs: int) -> list[R]:
+    # Results are returned in input order, so merged output is identical to
+    # the serial path. `fn` must be a picklable module-level callable.
+    return list(ordered_imap(fn, items, jobs))
+
+
+def ordered_imap(fn: Callable[[T], R], items: list[T], jobs: int) -> Iterator[R]:
+    # Lazy ordered_map: each result is yielded, in input order, as soon as it
+    # and every earlier one are ready.
+    if jobs <= 1 or len(items) < MIN_ITEMS_PER_JOB * 2:
+        for item in items:
+            yield fn(item)
+        return
+    workers = min(jobs, len(items) // MIN_ITEMS_PER_JOB)
+    chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(fn, items, chunksize=chunksize)
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .semantic_parallel import ordered_map
+from .semantic_store import INDEX_DIR, RACY_WINDOW_NS
+
+# Raw file bytes -> every word (UTF-8 encoded) an exact search could match
+# in the file. Extra words only cost false positives; a missing one hides a
+# match.
+Extractor = Callable[[bytes], Iterable[bytes]]
+
+MAGIC = b"SBKW"
+FORMAT_VERSION = 1
+# magic, format version, extractor tag bytes, entry count, snapshot ns
+HEADER = struct.Struct("<4sHHIq")
+# path bytes, mtime ns, size, sha1, filter bytes
+ENTRY = struct.Struct("<Hqq20sI")
+# Four probes at ten bits per word: about 1.2% false positives per file.
+HASHES = 4
+BITS_PER_WORD = 10
+MIN_FILTER_BYTES = 8
+SECOND_HASH_SEED = 0x5BD1E995
+
+
+def word_hashes(word: bytes) -> tuple[int, int]:
+    # Double hashing: probe i of a filter is (h1 + i * h2) mod its size.
+    return (zlib.crc32(word), zlib.crc32(word, SECOND_HASH_SEED) | 1)
+
+
+def probes(hashes: tuple[int, int], mask: int) -> list[int]:
+    first, step = hashes
+    return [(first + index * step) & mask for index in range(HASHES)]
+
+
+def build_filter(words: Iterable[bytes]) -> bytes:
+    unique = set(words)
+    size = MIN_FILTER_BYTES
+    while size * 8 < len(unique) * BITS_PER_WORD:
+        size *= 2
+    bits = bytearray(size)
+    mask = size * 8 - 1
+    for word in unique:
+        for position in probes(word_hashes(word), mask):
+            bits[position >> 3] |= 1 << (position & 7)
+    return bytes(bits)
+
+
+def may_contain(bits: bytes, hashes: tuple[int, int]) -> bool:
+    for position in probes(hashes, len(bits) * 8 - 1):
+        if not bits[position >> 3] & (1 << (position & 7)):
+            return False
+    return True
+
+
+def read_and_filter(
+    task: tuple[str, bytes | None, Extractor]
+) -> tuple[bytes, bytes | None] | None:
+    # Worker step of a refresh: None for unreadable files, a None filter when
+    # the content hash still matches, else the fresh filter.
+    path, known_digest, extract = task
+    try:
+        raw = Path(path).read_bytes()
+    except OSError:
+        return None
+    digest = hashlib.sha1(raw).digest()
+    if digest == known_digest:
+        return (digest, None)
+    try:
+        words = extract(raw)
+    except Exception:  # noqa: BLE001
+        words = ()
+    return (digest, build_filter(words))
+
+
+class WordFilterStore:
+    # One Bloom filter per source file over the words it contains, persisted
+    # as a single binary file under .sbk/semantic-index/. A query keeps only
+    # the files whose filter may hold one of its words, so exact matching
+    # reads a handful of candidates instead of the whole tree. Files are
+    # re-checked by mtime/size (content hash inside the racy window), the
+    # same way the symbol index store does.
+    def __init__(
+        self, repo_root: Path, name: str, extract: Extractor, tag: str
+    ) -> None:
+        self.repo_root = repo_root
+        self.root_prefix = str(repo_root).rstrip(os.sep) + os.sep
+        self.path = repo_root / INDEX_DIR / f"{name}.bloom"
+        self.extract = extract
+        self.tag = tag
+        # rel -> (mtime ns, size, sha1, filter)
+        self.entries: dict[str, tuple[int, int, bytes, bytes]] = {}
+        # (file, rel) of the last refresh, in order.
+        self.order: list[tuple[Path, str]] = []
+        self.snapshot_ns = 0
+        self.dirty = False
+
+    def load(self) -> None:
+        try:
+            raw = self.path.read_bytes()
+        except OSError:
+            return
+        try:
+            self._decode(raw)
+        except (struct.error, UnicodeDecodeError, ValueError):
+            self.entries = {}
+            self.snapshot_ns = 0
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        tag = self.tag.encode("utf8")
+        parts = [
+            HEADER.pack(
+                MAGIC, FORMAT_VERSION, len(tag), len(self.entries), self.snapshot_ns
+            ),
+            tag,
+        ]
+        for rel in sorted(self.entries):
+            mtime_ns, size, digest, bits = self.entries[rel]
+            encoded = rel.encode("utf8")
+            parts.append(ENTRY.pack(len(encoded), mtime_ns, size, digest, len(bits)))
+            parts.append(encoded)
+            parts.append(bits)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            ignore_file = self.path.parent / ".gitignore"
+            if not ignore_file.exists():
+                ignore_file.write_text("*\n", encoding="utf8")
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent
+            )
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(b"".join(parts))
+                os.replace(tmp_name, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            # The filters are an accelerator only; a read-only checkout still
+            # answers queries from the in-memory refresh.
+            return
+        self.dirty = False
+
+    def refresh(self, files: list[Path], jobs: int = 1) -> None:
+        snapshot_ns = time.time_ns()
+        racy_after = self.snapshot_ns - RACY_WINDOW_NS
+        seen: set[str] = set()
+        tasks: list[tuple[str, os.stat_result]] = []
+        self.order = [(file, self._relative(file)) for file in files]
+        for file, rel in self.order:
+            try:
+                st = file.stat()
+            except OSError:
+                continue
+            seen.add(rel)
+            entry = self.entries.get(rel)
+            if (
+                entry is not None
+                and entry[0] == st.st_mtime_ns
+                and entry[1] == st.st_size
+                and st.st_mtime_ns < racy_after
+            ):
+                continue
+            tasks.append((rel, st))
+        results = ordered_map(
+            read_and_filter,
+            [
+                (
+                    str(self.repo_root / rel),
+                    self.entries[rel][2] if rel in self.entries else None,
+                    self.extract,
+                )
+                for rel, _ in tasks
+            ],
+            jobs,
+        )
+        for (rel, st), result in zip(tasks, results):
+            if result is None:
+                seen.discard(rel)
+                continue
+            digest, bits = result
+            if bits is None:
+                bits = self.entries[rel][3]
+            self.entries[rel] = (st.st_mtime_ns, st.st_size, digest, bits)
+            self.dirty = True
+        for rel in [item for item in self.entries if item not in seen]:
+            del self.entries[rel]
+            self.dirty = True
+        self.snapshot_ns = snapshot_ns
+
+    def candidates(self, words: Iterable[str]) -> list[Path]:
+        # The refreshed files, in order, that may contain one of the words;
+        # files without a filter are always kept.
+        hashes = [word_hashes(word.encode("utf8")) for word in set(words)]
+        kept: list[Path] = []
+        for file, rel in self.order:
+            entry = self.entries.get(rel)
+            if entry is None or any(may_contain(entry[3], item) for item in hashes):
+                kept.append(file)
+        return kept
+
+    def _relative(self, file: Path) -> str:
+        # String slicing instead of Path.relative_to, which dominates a warm
+        # query over a large tree.
+        text = str(file)
+        prefix = self.root_prefix
+        if text.startswith(prefix):
+            rel = text[len(prefix) :]
+            return rel if os.sep == "/" else rel.replace(os.sep, "/")
+        return file.relative_to(self.repo_root).as_posix()
+
+    def digests(self) -> set[str]:
+        return {entry[2].hex() for entry in self.entries.values()}
+
+    def _decode(self, raw: bytes) -> None:
+        magic, version, tag_size, count, snapshot_ns = HEADER.unpack_from(raw)
+        position = HEADER.size
+        tag = raw[position : position + tag_size].decode("utf8")
+        if magic != MAGIC or version != FORMAT_VERSION or tag != self.tag:
+            raise ValueError("foreign word filter file")
+        position += tag_size
+        entries: dict[str, tuple[int, int, bytes, bytes]] = {}
+        for _ in range(count):
+            rel_size, mtime_ns, size, digest, bits_size = ENTRY.unpack_from(
+                raw, position
+            )
+            position += ENTRY.size
+            rel = raw[position : position + rel_size].decode("utf8")
+            position += rel_size
+            bits = raw[position : position + bits_size]
+            position += bits_size
+            if (
+                len(bits) != bits_size
+                or bits_size < MIN_FILTER_BYTES
+                or bits_size & (bits_size - 1)
+            ):
+                raise ValueError("truncated word filter file")
+            entries[rel] = (mtime_ns, size, digest, bits)
+        if position != len(raw):
+            raise ValueError("trailing bytes in word filter file")
+        self.entries = entries
+        self.snapshot_ns = snapshot_ns
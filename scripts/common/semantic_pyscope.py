@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import ast
+import keyword
+import symtable
+from typing import Callable, Iterable, Mapping, Union
+
+# Binding outcomes besides a concrete function-like Scope.
+BINDING_MODULE = "module"
+BINDING_CLASS = "class"
+BINDING_UNBOUND = "unbound"
+
+# How a module-level name came to be bound in its module.
+ORIGIN_DEFINED = "defined"
+ORIGIN_FROM = "from"
+ORIGIN_MODULE = "module"
+
+# Posting key for files ast cannot parse; none of the binding keys is a
+# valid identifier, so they never collide with a NAME-token lookup.
+UNPARSED_KEY = "!unparsed"
+# Key prefix of module-level bindings: DEF_PREFIX + name.
+DEF_PREFIX = "def:"
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+COMPREHENSION_NAMES = {
+    ast.ListComp: "listcomp",
+    ast.SetComp: "setcomp",
+    ast.DictComp: "dictcomp",
+    ast.GeneratorExp: "genexpr",
+}
+COMPREHENSION_NODES = tuple(COMPREHENSION_NAMES)
+
+Position = tuple[int, int]
+Span = tuple[Position, Position]
+# (line, col, is_attribute) of one NAME token; col counts characters.
+Occurrence = tuple[int, int, bool]
+
+
+# =============================================================================
+# Module binding summaries (persisted next to the NAME-token postings)
+# =============================================================================
+
+
+def module_level_bindings(tree: ast.Module) -> list[tuple[str, int]]:
+    # Names bound at module scope, without descending into function, class,
+    # lambda or comprehension bodies.
+    found: list[tuple[str, int]] = []
+    pending: list[ast.AST] = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            found.append((node.name, node.lineno))
+            continue
+        if isinstance(node, (ast.Lambda, *COMPREHENSION_NODES)):
+            continue
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            found.append((node.id, node.lineno))
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            found.append((node.name, node.lineno))
+        pending.extend(ast.iter_child_nodes(node))
+    return found
+
+
+def index_module_bindings(content: str) -> dict[str, list[int]]:
+    # def:<name>           bound at module level (or declared global anywhere)
+    # from:<module>:<name> `from <module> import <name>`; relative modules keep
+    #                      their leading dots and are resolved per file later
+    # named:<name>         any `from ... import <name>`, including "*"
+    # import:<module>      `import <module>`, with or without an alias
+    # Values are the source lines, ascending.
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return {UNPARSED_KEY: [0]}
+    keys: dict[str, list[int]] = {}
+
+    def add(key: str, line: int) -> None:
+        keys.setdefault(key, []).append(line)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                add(f"import:{alias.name}", node.lineno)
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            for alias in node.names:
+                add(f"from:{module}:{alias.name}", node.lineno)
+                add(f"named:{alias.name}", node.lineno)
+        elif isinstance(node, ast.Global):
+            for name in node.names:
+                add(DEF_PREFIX + name, node.lineno)
+    for name, line in module_level_bindings(tree):
+        add(DEF_PREFIX + name, line)
+    for lines in keys.values():
+        lines.sort()
+    return keys
+
+
+def module_names(rel: str) -> list[str]:
+    # Dotted names a repo-relative file may be imported as: the full path
+    # and every suffix of it, so `src/pkg/mod.py` answers to `src.pkg.mod`,
+    # `pkg.mod` and `mod` alike.
+    if not rel.endswith(".py"):
+        return []
+    parts = rel[: -len(".py")].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return [".".join(parts[start:]) for start in range(len(parts))]
+
+
+def resolve_import_module(rel: str, module: str) -> str | None:
+    # Absolute dotted name of a (possibly relative) module as written in the
+    # repo-relative file `rel`.
+    level = len(module) - len(module.lstrip("."))
+    if level == 0:
+        return module or None
+    package = rel.split("/")[:-1]
+    if level - 1 > len(package):
+        return None
+    base = package[: len(package) - (level - 1)]
+    rest = module[level:]
+    return ".".join(base + (rest.split(".") if rest else [])) or None
+
+
+def from_imports(keys: list[str], name: str) -> list[str]:
+    # Modules (as written) a file's `from <module> import <name>` keys name.
+    modules: list[str] = []
+    suffix = f":{name}"
+    for key in keys:
+        if key.startswith("from:") and key.endswith(suffix):
+            modules.append(key[len("from:") : -len(suffix)])
+    return modules
+
+
+def related_files(
+    postings: Mapping[str, Mapping[str, list[int]]],
+    file_keys: Callable[[str], list[str]],
+    target_rel: str,
+    symbol: str,
+    origin: str | None,
+) -> set[str]:
+    # Files that can refer to the module-level `symbol` as seen from
+    # target_rel. Modules defining, importing or re-exporting it are joined
+    # through the module names they define or import from; the component
+    # holding target_rel (and `origin`, the module it was imported from, if
+    # any) is kept, plus every module importing one of those whole, which
+    # may reach the symbol as an attribute. Unparsable files always count.
+    importers = set(postings.get(f"named:{symbol}", {}))
+    importers.update(postings.get("named:*", {}))
+    participants = set(postings.get(DEF_PREFIX + symbol, {})) | importers
+    participants.add(target_rel)
+
+    parent: dict[object, object] = {}
+
+    def find(item: object) -> object:
+        parent.setdefault(item, item)
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(left: object, right: object) -> None:
+        parent[find(left)] = find(right)
+
+    for rel in participants:
+        for name in module_names(rel):
+            union(rel, ("module", name))
+        if rel not in importers:
+            continue
+        keys = file_keys(rel)
+        for module in from_imports(keys, symbol) + from_imports(keys, "*"):
+            resolved = resolve_import_module(rel, module)
+            if resolved is not None:
+                union(rel, ("module", resolved))
+    if origin is not None:
+        resolved = resolve_import_module(target_rel, origin)
+        if resolved is not None:
+            union(target_rel, ("module", resolved))
+
+    root = find(target_rel)
+    component = {rel for rel in participants if find(rel) == root}
+    related = set(component)
+    for rel in component:
+        for name in module_names(rel):
+            related.update(postings.get(f"import:{name}", {}))
+            package, _, leaf = name.rpartition(".")
+            if not package:
+                continue
+            for other in postings.get(f"named:{leaf}", {}):
+                for module in from_imports(file_keys(other), leaf):
+                    if resolve_import_module(other, module) == package:
+                        related.add(other)
+    related.update(postings.get(UNPARSED_KEY, {}))
+    return related
+
+
+# =============================================================================
+# Scope resolution within one module
+# =============================================================================
+
+
+class Scope:
+    __slots__ = ("node", "parent", "table", "spans", "depth", "is_class", "children")
+
+    def __init__(
+        self,
+        node: ast.AST | None,
+        parent: Scope | None,
+        table: symtable.SymbolTable,
+        spans: list[Span],
+    ) -> None:
+        self.node = node
+        self.parent = parent
+        self.table = table
+        self.spans = spans
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.is_class = isinstance(node, ast.ClassDef)
+        # Child symbol tables not yet paired with an ast node, by (name, line).
+        self.children: dict[tuple[str, int], list[symtable.SymbolTable]] = {}
+        for child in table.get_children():
+            key = (child.get_name(), child.get_lineno())
+            self.children.setdefault(key, []).append(child)
+
+    def contains(self, position: Position) -> bool:
+        return any(start <= position < end for start, end in self.spans)
+
+
+Binding = Union[Scope, str]
+
+
+def node_span(node: ast.AST) -> Span:
+    return (
+        (node.lineno, node.col_offset),  # type: ignore[attr-defined]
+        (node.end_lineno, node.end_col_offset),  # type: ignore[attr-defined]
+    )
+
+
+def scope_key(node: ast.AST) -> tuple[str, int] | None:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return (node.name, node.lineno)
+    if isinstance(node, ast.Lambda):
+        return ("lambda", node.lineno)
+    if isinstance(node, COMPREHENSION_NODES):
+        return (COMPREHENSION_NAMES[type(node)], node.lineno)
+    return None
+
+
+def split_scope(node: ast.AST) -> tuple[list[ast.AST], list[ast.AST], list[Span]]:
+    # (children evaluated by the enclosing scope, children evaluated inside
+    # the new scope, source spans of the new scope). Decorators, defaults,
+    # annotations, bases and a comprehension's first iterable belong to the
+    # enclosing scope; parameter names belong to the new one.
+    outer: list[ast.AST] = []
+    inner: list[ast.AST] = []
+    spans: list[Span] = []
+    if isinstance(node, FUNCTION_NODES):
+        arguments = node.args
+        outer.extend(arguments.defaults)
+        outer.extend(default for default in arguments.kw_defaults if default)
+        params = [
+            *arguments.posonlyargs,
+            *arguments.args,
+            *([arguments.vararg] if arguments.vararg else []),
+            *arguments.kwonlyargs,
+            *([arguments.kwarg] if arguments.kwarg else []),
+        ]
+        for param in params:
+            if param.annotation is not None:
+                outer.append(param.annotation)
+            start = (param.lineno, param.col_offset)
+            spans.append((start, (start[0], start[1] + len(param.arg.encode("utf8")))))
+        if isinstance(node, ast.Lambda):
+            inner.append(node.body)
+        else:
+            outer.extend(node.decorator_list)
+            if node.returns is not None:
+                outer.append(node.returns)
+            inner.extend(node.body)
+    elif isinstance(node, ast.ClassDef):
+        outer.extend(node.decorator_list)
+        outer.extend(node.bases)
+        outer.extend(node.keywords)
+        inner.extend(node.body)
+    else:
+        generators = node.generators  # type: ignore[attr-defined]
+        outer.append(generators[0].iter)
+        if isinstance(node, ast.DictComp):
+            inner.extend((node.key, node.value))
+        else:
+            inner.append(node.elt)  # type: ignore[attr-defined]
+        for index, generator in enumerate(generators):
+            inner.append(generator.target)
+            inner.extend(generator.ifs)
+            if index > 0:
+                inner.append(generator.iter)
+    spans.extend(node_span(child) for child in inner)
+    return (outer, inner, spans)
+
+
+class ModuleScopes:
+    # ast gives every scope's source regions, symtable how each scope binds
+    # a name; together they answer which binding the name at a position
+    # refers to. Raises SyntaxError/ValueError for code it cannot analyze.
+
+    def __init__(self, content: str) -> None:
+        self.lines = content.split("\n")
+        self.tree = ast.parse(content)
+        table = symtable.symtable(content, "<module>", "exec")
+        self.module = Scope(None, None, table, [((0, 0), (len(self.lines) + 1, 0))])
+        self.scopes: list[Scope] = []
+        self.keyword_args: set[Position] = set()
+        # `a.b` in `from a.b import c`: from the statement start up to the
+        # first imported name.
+        self.module_paths: list[Span] = []
+        self._visit(self.tree, self.module)
+        self.scopes.sort(key=lambda scope: -scope.depth)
+
+    def _visit(self, node: ast.AST, scope: Scope) -> None:
+        if isinstance(node, ast.ImportFrom):
+            first = node.names[0]
+            end = (
+                (first.lineno, first.col_offset)
+                if hasattr(first, "lineno")
+                else node_span(node)[1]
+            )
+            self.module_paths.append(((node.lineno, node.col_offset), end))
+        if isinstance(node, ast.keyword) and node.arg is not None:
+            line = getattr(node, "lineno", None)
+            if line is not None:
+                self.keyword_args.add((line, node.col_offset))
+        key = scope_key(node)
+        tables = scope.children.get(key) if key is not None else None
+        if key is None or (not tables and isinstance(node, COMPREHENSION_NODES)):
+            # Not a scope, or a comprehension the compiler inlined.
+            for child in ast.iter_child_nodes(node):
+                self._visit(child, scope)
+            return
+        if not tables:
+            raise ValueError(f"no symbol table for scope {key}")
+        outer, inner, spans = split_scope(node)
+        nested = Scope(node, scope, tables.pop(0), spans)
+        self.scopes.append(nested)
+        for child in outer:
+            self._visit(child, scope)
+        for child in inner:
+            self._visit(child, nested)
+
+    def byte_position(self, line: int, col: int) -> Position:
+        text = self.lines[line - 1] if 0 < line <= len(self.lines) else ""
+        return (line, len(text[:col].encode("utf8")))
+
+    def scope_at(self, line: int, col: int) -> Scope:
+        position = self.byte_position(line, col)
+        for scope in self.scopes:
+            if scope.contains(position):
+                return scope
+        return self.module
+
+    def binding_at(self, line: int, col: int, name: str) -> Binding:
+        if keyword.iskeyword(name):
+            return BINDING_UNBOUND
+        return self.resolve(self.scope_at(line, col), name)
+
+    def keyword_parameter(self, scope: Scope, name: str) -> bool:
+        # Whether `name` is a parameter of scope's function that a caller
+        # can pass by keyword: `f(name=...)` may then appear in any file.
+        node = scope.node
+        if not isinstance(node, FUNCTION_NODES):
+            return False
+        arguments = node.args
+        return any(
+            param.arg == name for param in (*arguments.args, *arguments.kwonlyargs)
+        )
+
+    def resolve(self, scope: Scope, name: str) -> Binding:
+        current: Scope | None = scope
+        while current is not None and current.parent is not None:
+            try:
+                symbol = current.table.lookup(name)
+            except KeyError:
+                current = current.parent
+                continue
+            if symbol.is_global():
+                break
+            if symbol.is_local():
+                return BINDING_CLASS if current.is_class else current
+            current = current.parent
+            if symbol.is_free():
+                # Free names skip class bodies on their way out.
+                while current is not None and current.is_class:
+                    current = current.parent
+        try:
+            symbol = self.module.table.lookup(name)
+        except KeyError:
+            return BINDING_UNBOUND
+        if symbol.is_assigned() or symbol.is_imported():
+            return BINDING_MODULE
+        return BINDING_UNBOUND
+
+    def module_origin(self, name: str) -> tuple[str, str | None]:
+        # How the module-level `name` is bound: (ORIGIN_FROM, module) for an
+        # un-aliased `from module import name`, (ORIGIN_MODULE, None) when it
+        # names an imported module, else (ORIGIN_DEFINED, None).
+        pending: list[ast.AST] = list(reversed(self.tree.body))
+        while pending:
+            node = pending.pop()
+            if isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    if alias.name == name and alias.asname is None:
+                        return (ORIGIN_FROM, "." * node.level + (node.module or ""))
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if (alias.asname or alias.name.split(".")[0]) == name:
+                        return (ORIGIN_MODULE, None)
+            elif not isinstance(
+                node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            ):
+                pending.extend(
+                    reversed(
+                        [
+                            child
+                            for child in ast.iter_child_nodes(node)
+                            if isinstance(child, (ast.stmt, ast.excepthandler))
+                        ]
+                    )
+                )
+        return (ORIGIN_DEFINED, None)
+
+    def references(
+        self, occurrences: Iterable[Occurrence], name: str, binding: Binding
+    ) -> list[Occurrence]:
+        # The occurrences of `name` that refer to binding. Attribute leaves
+        # are kept, flagged, for module-level bindings only; keyword-argument
+        # names and `from <module>` paths never refer to it.
+        found: list[Occurrence] = []
+        for line, col, is_attribute in occurrences:
+            position = self.byte_position(line, col)
+            if any(start <= position < end for start, end in self.module_paths):
+                continue
+            if is_attribute:
+                if binding == BINDING_MODULE:
+                    found.append((line, col, True))
+                continue
+            if position in self.keyword_args:
+                continue
+            resolved = self.resolve(self.scope_at(line, col), name)
+            if binding == BINDING_MODULE:
+                if isinstance(resolved, Scope) or resolved == BINDING_CLASS:
+                    continue
+            elif resolved is not binding:
+                continue
+            found.append((line, col, False))
+        return found
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, NamedTuple
+
+from .semantic_stream import ResolvedPaths
+
+OP_SAFE_DELETE_REPORT = "safe-delete-report"
+# Definitions with more references than this are not candidates.
+MAX_REFERENCES = 1
+
+
+class Definition(NamedTuple):
+    # One top-level definition site. `rel` is the repo-relative path as the
+    # index stores it, turned into a Path only if the site is reported; line
+    # and column are 1-based.
+    symbol: str
+    rel: str
+    line: int
+    column: int
+
+
+def occurrence_count(bucket: dict[str, list[int]], stride: int) -> int:
+    # Occurrences of one name across the repo from its postings bucket
+    # ({rel: flat postings}), without materializing a single match.
+    return sum(len(flat) for flat in bucket.values()) // stride
+
+
+def rank_candidates(
+    definitions: Iterable[Definition],
+    references: Callable[[str], int],
+    entry_points: re.Pattern[str],
+) -> list[tuple[int, Definition]]:
+    # (references, definition) for every definition referenced at most
+    # MAX_REFERENCES times, unreferenced first, then by location. Each name
+    # is counted once however many definitions share it; names a runtime or
+    # test runner calls by convention are never candidates.
+    counts: dict[str, int] = {}
+    ranked: list[tuple[int, Definition]] = []
+    for definition in definitions:
+        symbol = definition.symbol
+        if entry_points.fullmatch(symbol):
+            continue
+        count = counts.get(symbol)
+        if count is None:
+            count = counts[symbol] = max(references(symbol), 0)
+        if count <= MAX_REFERENCES:
+            ranked.append((count, definition))
+    ranked.sort(key=lambda item: (item[0], item[1].rel, item[1].line, item[1].column))
+    return ranked
+
+
+def build_report_payload(
+    backend: str,
+    language: str,
+    definitions: int,
+    ranked: list[tuple[int, Definition]],
+    max_results: int,
+    repo_root: Path,
+) -> dict:
+    paths = ResolvedPaths()
+    candidates = [
+        {
+            "symbol": definition.symbol,
+            "file": paths[repo_root / definition.rel],
+            "line": definition.line,
+            "column": definition.column,
+            "references": count,
+            "safeToDelete": count == 0,
+            "confidence": "high" if count == 0 else "medium",
+        }
+        for count, definition in islice(ranked, max_results)
+    ]
+    return {
+        "operation": OP_SAFE_DELETE_REPORT,
+        "mode": "analysis",
+        "backend": backend,
+        "language": language,
+        "summary": {
+            "definitions": definitions,
+            "candidates": len(ranked),
+            "unreferenced": sum(1 for count, _ in ranked if count == 0),
+            "emittedCandidates": len(candidates),
+            "truncated": len(ranked) > len(candidates),
+            "repoRoot": str(repo_root.resolve()),
+        },
+        "candidates": candidates,
+    }
@@ -0,0 +1,508 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import secrets
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from .semantic_parallel import ordered_map
+from .semantic_text import write_text_atomic
+
+INDEX_DIR = Path(".sbk") / "semantic-index"
+INDEX_SCHEMA = 2
+# The change log is folded back into the snapshot once it grows past this
+# share of the snapshot's size (and past a floor, so small indexes are not
+# rewritten on every edit).
+COMPACT_RATIO = 0.5
+COMPACT_MIN_SIZE = 64 * 1024
+
+# Timestamps on some filesystems are coarse (FAT: 2s). A file whose mtime
+# falls this close to the previous snapshot may have been rewritten with the
+# same size and mtime, so its content hash is re-checked instead of trusted.
+RACY_WINDOW_NS = 2_000_000_000
+
+# A scanner maps decoded file content to {symbol: flat int postings}. The
+# posting layout is owned by the backend; the store only persists it.
+Scanner = Callable[[str], dict[str, list[int]]]
+# Decides whether a repo-relative posix path belongs to the index.
+PathFilter = Callable[[str], bool]
+
+
+@dataclass
+class RefreshStats:
+    scanned: int = 0
+    reused: int = 0
+    removed: int = 0
+
+
+@dataclass
+class RefreshPlan:
+    # What a refresh re-reads (check) and forgets (drop), and the git state
+    # and snapshot time it records. Worked out from stat calls alone, so a
+    # resident session plans outside its request lock and applies under it.
+    check: list[str]
+    drop: list[str]
+    head: str | None
+    dirty: set[str] | None
+    snapshot_ns: int | None = None
+    reused: int = 0
+
+    def empty(self) -> bool:
+        return not self.check and not self.drop
+
+
+def decode_source(raw: bytes) -> str:
+    # Same newline translation as Path.read_text, so offsets stay comparable.
+    text = raw.decode("utf8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def read_and_scan(
+    task: tuple[str, str | None, Scanner]
+) -> tuple[str, dict[str, list[int]] | None] | None:
+    # Worker step of a refresh: returns None for unreadable files, a None
+    # symbol table when the content hash still matches, else fresh postings.
+    path, known_digest, scanner = task
+    try:
+        raw = Path(path).read_bytes()
+    except OSError:
+        return None
+    digest = hashlib.sha1(raw).hexdigest()
+    if digest == known_digest:
+        return (digest, None)
+    try:
+        symbols = scanner(decode_source(raw))
+    except Exception:  # noqa: BLE001
+        # Undecodable files are skipped by the scanners; remember them as
+        # empty so they are not re-read until they change.
+        symbols = {}
+    return (digest, symbols)
+
+
+def index_path(repo_root: Path, name: str) -> Path:
+    return repo_root / INDEX_DIR / f"{name}.json"
+
+
+def log_path(repo_root: Path, name: str) -> Path:
+    return repo_root / INDEX_DIR / f"{name}.log"
+
+
+def run_git(repo_root: Path, args: list[str]) -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=repo_root,
+            capture_output=True,
+            text=True,
+            encoding="utf8",
+            errors="replace",
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def git_head(repo_root: Path) -> str | None:
+    output = run_git(repo_root, ["rev-parse", "--verify", "-q", "HEAD"])
+    if output is None:
+        return None
+    return output.strip() or None
+
+
+def git_changed_paths(repo_root: Path, since: str) -> set[str] | None:
+    # Committed, staged and unstaged changes since `since`, plus untracked
+    # files; paths are relative to repo_root even inside a larger checkout.
+    diff = run_git(
+        repo_root,
+        ["diff", "--name-only", "--no-renames", "--relative", "-z", since, "--"],
+    )
+    if diff is None:
+        return None
+    untracked = run_git(
+        repo_root, ["ls-files", "--others", "--exclude-standard", "-z"]
+    )
+    if untracked is None:
+        return None
+    return {item for item in (diff + untracked).split("\0") if item}
+
+
+class GitSnapshot:
+    # HEAD and the changed paths since a commit, read once and shared by the
+    # stores one refresh plans together.
+    def __init__(self, repo_root: Path) -> None:
+        self.repo_root = repo_root
+        self.head = git_head(repo_root)
+        self.changes: dict[str, set[str] | None] = {}
+
+    def changed_since(self, commit: str) -> set[str] | None:
+        if commit not in self.changes:
+            self.changes[commit] = git_changed_paths(self.repo_root, commit)
+        return self.changes[commit]
+
+
+class SymbolIndexStore:
+    # Persisted as a snapshot (<name>.json) plus an append-only change log
+    # (<name>.log). A save appends one record per file changed since the
+    # last save and one record with the git state, so an edit costs a few
+    # log lines instead of a dump of every file and posting. Once the log
+    # outgrows its limit, the next save writes a fresh snapshot and drops
+    # the log. The log's header names the snapshot generation it extends; a
+    # log left over from another snapshot, or cut short by a crash, is
+    # ignored from that point and compacted away. Each record holds a file's
+    # full entry, so replaying one is always safe.
+    def __init__(
+        self, repo_root: Path, name: str, scanner: Scanner, scanner_version: str
+    ) -> None:
+        self.repo_root = repo_root
+        self.name = name
+        self.scanner = scanner
+        self.scanner_version = scanner_version
+        self.path = index_path(repo_root, name)
+        self.log_path = log_path(repo_root, name)
+        self.files: dict[str, dict] = {}
+        self.postings: dict[str, dict[str, list[int]]] = {}
+        self.snapshot_ns = 0
+        self.commit: str | None = None
+        self.dirty_paths: list[str] = []
+        self.dirty = False
+        self.changed: set[str] = set()
+        self.generation: str | None = None
+        self.snapshot_size = 0
+        self.log_size = 0
+        self.compact = True
+
+    def load(self) -> None:
+        try:
+            raw = self.path.read_text(encoding="utf8")
+            data = json.loads(raw)
+        except (OSError, ValueError):
+            return
+        if (
+            data.get("schema") != INDEX_SCHEMA
+            or data.get("scanner") != self.scanner_version
+        ):
+            self.dirty = True
+            return
+        self.files = data.get("files", {})
+        self.postings = data.get("postings", {})
+        self._apply_state(data)
+        self.generation = data.get("generation")
+        self.snapshot_size = len(raw)
+        self.compact = False
+        self._replay()
+        self.changed.clear()
+        self.dirty = self.compact
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            ignore_file = self.path.parent / ".gitignore"
+            if not ignore_file.exists():
+                ignore_file.write_text("*\n", encoding="utf8")
+            records = "" if self.compact else self._change_records()
+            limit = max(self.snapshot_size * COMPACT_RATIO, COMPACT_MIN_SIZE)
+            if self.compact or self.log_size + len(records) > limit:
+                self._write_snapshot()
+            else:
+                self._append_log(records)
+        except OSError:
+            # The index is an accelerator only; a read-only checkout still
+            # answers queries from the in-memory refresh.
+            return
+        self.changed.clear()
+        self.dirty = False
+
+    def _state(self) -> dict:
+        return {
+            "snapshotNs": self.snapshot_ns,
+            "commit": self.commit,
+            "dirtyPaths": self.dirty_paths,
+        }
+
+    def _apply_state(self, data: dict) -> None:
+        self.snapshot_ns = int(data.get("snapshotNs", 0))
+        self.commit = data.get("commit")
+        self.dirty_paths = list(data.get("dirtyPaths", []))
+
+    def _replay(self) -> None:
+        try:
+            lines = self.log_path.read_text(encoding="utf8").splitlines()
+        except OSError:
+            return
+        self.log_size = sum(len(line) + 1 for line in lines)
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if header.get("generation") != self.generation:
+            self.compact = True
+            return
+        for line in lines[1:]:
+            try:
+                self._apply_record(json.loads(line))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                # Torn by a crash mid-append: keep what came before.
+                self.compact = True
+                return
+
+    def _apply_record(self, record: dict) -> None:
+        if "state" in record:
+            self._apply_state(record["state"])
+            return
+        rel, entry, postings = record["file"], record["entry"], record["postings"]
+        self._drop(rel)
+        if entry is not None:
+            self._store_entry(rel, entry, postings)
+
+    def _change_records(self) -> str:
+        lines = []
+        for rel in sorted(self.changed):
+            entry = self.files.get(rel)
+            postings = (
+                {symbol: self.postings[symbol][rel] for symbol in entry["symbols"]}
+                if entry is not None
+                else None
+            )
+            lines.append(
+                json.dumps(
+                    {"file": rel, "entry": entry, "postings": postings},
+                    separators=(",", ":"),
+                )
+            )
+        lines.append(json.dumps({"state": self._state()}, separators=(",", ":")))
+        return "".join(line + "\n" for line in lines)
+
+    def _append_log(self, records: str) -> None:
+        with self.log_path.open("a", encoding="utf8", newline="\n") as handle:
+            if handle.tell() == 0:
+                header = json.dumps({"generation": self.generation})
+                records = header + "\n" + records
+            handle.write(records)
+        self.log_size += len(records)
+
+    def _write_snapshot(self) -> None:
+        generation = secrets.token_hex(8)
+        payload = {
+            "schema": INDEX_SCHEMA,
+            "scanner": self.scanner_version,
+            "generation": generation,
+            **self._state(),
+            "files": self.files,
+            "postings": self.postings,
+        }
+        text = json.dumps(payload, separators=(",", ":"))
+        write_text_atomic(self.path, text)
+        self.generation = generation
+        self.snapshot_size = len(text)
+        self.compact = False
+        try:
+            self.log_path.unlink()
+        except FileNotFoundError:
+            pass
+        self.log_size = 0
+
+    def relative(self, file: Path) -> str:
+        return file.relative_to(self.repo_root).as_posix()
+
+    def refresh(self, files: list[Path], jobs: int = 1) -> RefreshStats:
+        return self.apply(self.plan(files), jobs)
+
+    def refresh_from_git(
+        self, accept: PathFilter, jobs: int = 1
+    ) -> RefreshStats | None:
+        # Returns None when the index has no usable git baseline and the
+        # caller must fall back to refresh().
+        plan = self.plan_from_git(accept)
+        if plan is None:
+            return None
+        return self.apply(plan, jobs)
+
+    def plan(
+        self, files: list[Path], git: GitSnapshot | None = None
+    ) -> RefreshPlan:
+        # Stat every file of the tree against its entry. Nothing is changed,
+        # so a resident session can plan while requests read the store.
+        git = git or GitSnapshot(self.repo_root)
+        snapshot_ns = time.time_ns()
+        entries = self.files.copy()
+        plan = RefreshPlan([], [], git.head, None, snapshot_ns)
+        walked: set[str] = set()
+        for file in files:
+            rel = self.relative(file)
+            walked.add(rel)
+            self._plan_file(plan, rel, entries.get(rel))
+        plan.drop.extend(rel for rel in entries if rel not in walked)
+        if git.head is not None:
+            plan.dirty = git.changed_since(git.head)
+        return plan
+
+    def plan_from_git(
+        self, accept: PathFilter, git: GitSnapshot | None = None
+    ) -> RefreshPlan | None:
+        # Stat only what git reports as changed since the indexed commit, plus
+        # whatever was dirty back then. None without a usable baseline.
+        commit = self.commit
+        if commit is None or not self.files:
+            return None
+        git = git or GitSnapshot(self.repo_root)
+        if git.head is None:
+            return None
+        changed = git.changed_since(commit)
+        if changed is None:
+            return None
+        dirty = changed if git.head == commit else git.changed_since(git.head)
+        plan = RefreshPlan([], [], git.head, dirty)
+        for rel in sorted(changed.union(self.dirty_paths)):
+            entry = self.files.get(rel)
+            if accept(rel):
+                self._plan_file(plan, rel, entry)
+            elif entry is not None:
+                plan.drop.append(rel)
+        return plan
+
+    def _plan_file(self, plan: RefreshPlan, rel: str, entry: dict | None) -> None:
+        try:
+            st = (self.repo_root / rel).stat()
+        except OSError:
+            if entry is not None:
+                plan.drop.append(rel)
+            return
+        if entry is not None and self._stat_matches(entry, st):
+            plan.reused += 1
+        else:
+            plan.check.append(rel)
+
+    def apply(self, plan: RefreshPlan, jobs: int = 1) -> RefreshStats:
+        # Files in plan.check are stat'ed again, so a plan that went stale
+        # between planning and applying only costs a re-check.
+        stats = RefreshStats(reused=plan.reused)
+        seen = self._refresh_files(
+            [(rel, self.repo_root / rel) for rel in plan.check], stats, jobs
+        )
+        gone = [rel for rel in plan.check if rel not in seen] + plan.drop
+        for rel in gone:
+            if rel in self.files:
+                self._drop(rel)
+                stats.removed += 1
+        if plan.snapshot_ns is not None:
+            self.snapshot_ns = plan.snapshot_ns
+        self._record_git_state(plan.head, plan.dirty)
+        return stats
+
+    def lookup(self, symbol: str) -> list[tuple[Path, list[int]]]:
+        bucket = self.postings.get(symbol, {})
+        hits = [(self.repo_root / rel, flat) for rel, flat in bucket.items()]
+        hits.sort(key=lambda item: str(item[0]))
+        return hits
+
+    def _refresh_files(
+        self, candidates: list[tuple[str, Path]], stats: RefreshStats, jobs: int
+    ) -> set[str]:
+        # Stat checks run serially; reading, hashing and scanning the files
+        # that may have changed fan out over `jobs` worker processes.
+        seen: set[str] = set()
+        pending: list[tuple[str, os.stat_result]] = []
+        for rel, file in candidates:
+            try:
+                st = file.stat()
+            except OSError:
+                continue
+            entry = self.files.get(rel)
+            if entry is not None and self._stat_matches(entry, st):
+                stats.reused += 1
+                seen.add(rel)
+                continue
+            pending.append((rel, st))
+
+        tasks = [
+            (
+                str(self.repo_root / rel),
+                self.files[rel]["sha1"] if rel in self.files else None,
+                self.scanner,
+            )
+            for rel, _ in pending
+        ]
+        for (rel, st), result in zip(pending, ordered_map(read_and_scan, tasks, jobs)):
+            if result is None:
+                continue
+            seen.add(rel)
+            digest, symbols = result
+            if symbols is None:
+                entry = self.files[rel]
+                if (entry["mtime"], entry["size"]) != (st.st_mtime_ns, st.st_size):
+                    entry["mtime"] = st.st_mtime_ns
+                    entry["size"] = st.st_size
+                    self.changed.add(rel)
+                    self.dirty = True
+                stats.reused += 1
+                continue
+            self._drop(rel)
+            self._store(rel, st, digest, symbols)
+            stats.scanned += 1
+        return seen
+
+    def _record_git_state(self, head: str | None, dirty: set[str] | None) -> None:
+        if head is None:
+            commit, dirty_paths = None, []
+        else:
+            commit, dirty_paths = head, sorted(dirty or [])
+        if commit != self.commit or dirty_paths != self.dirty_paths:
+            self.commit = commit
+            self.dirty_paths = dirty_paths
+            self.dirty = True
+
+    def _stat_matches(self, entry: dict, st: os.stat_result) -> bool:
+        return (
+            entry["mtime"] == st.st_mtime_ns
+            and entry["size"] == st.st_size
+            and entry["mtime"] < self.snapshot_ns - RACY_WINDOW_NS
+        )
+
+    def _store(
+        self,
+        rel: str,
+        st: os.stat_result,
+        digest: str,
+        symbols: dict[str, list[int]],
+    ) -> None:
+        entry = {
+            "mtime": st.st_mtime_ns,
+            "size": st.st_size,
+            "sha1": digest,
+            "symbols": sorted(symbols),
+        }
+        self._store_entry(rel, entry, symbols)
+        self.changed.add(rel)
+        self.dirty = True
+
+    def _store_entry(
+        self, rel: str, entry: dict, symbols: dict[str, list[int]]
+    ) -> None:
+        self.files[rel] = entry
+        for symbol, flat in symbols.items():
+            self.postings.setdefault(symbol, {})[rel] = flat
+
+    def _drop(self, rel: str) -> None:
+        entry = self.files.pop(rel, None)
+        if entry is None:
+            return
+        for symbol in entry["symbols"]:
+            bucket = self.postings.get(symbol)
+            if bucket is None:
+                continue
+            bucket.pop(rel, None)
+            if not bucket:
+                del self.postings[symbol]
+        self.changed.add(rel)
+        self.dirty = True
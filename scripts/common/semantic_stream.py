@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO, TypeVar
+
+T = TypeVar("T")
+
+# --stream writes NDJSON: one "header" record, one "reference" record per
+# reference as soon as it is found, then one "summary" record with the
+# counts the buffered payload reports. Rename has no reference list and
+# writes its usual payload as a single "result" record.
+RECORD_HEADER = "header"
+RECORD_REFERENCE = "reference"
+RECORD_SUMMARY = "summary"
+RECORD_RESULT = "result"
+
+
+class ResolvedPaths(dict):
+    # Path -> str(path.resolve()), resolved once per file rather than once
+    # per reference.
+    def __missing__(self, file: Path) -> str:
+        resolved = str(file.resolve())
+        self[file] = resolved
+        return resolved
+
+
+def write_record(out: TextIO, kind: str, fields: dict) -> None:
+    out.write(json.dumps({"type": kind, **fields}) + "\n")
+
+
+def first_or_none(items: Iterable[T]) -> tuple[T | None, Iterator[T]]:
+    # Peek a lazy sequence: (first item or None, iterator over all items).
+    iterator = iter(items)
+    first = next(iterator, None)
+    if first is None:
+        return (None, iterator)
+
+    def replay() -> Iterator[T]:
+        yield first
+        yield from iterator
+
+    return (first, replay())
+
+
+class ReferenceStream:
+    # Emits references while the caller is still finding them, keeping only
+    # per-file state; the first max_results references are written, the rest
+    # are only counted, as in the buffered payload. Every written record is
+    # flushed: stdout to a pipe is block-buffered, and the next reference
+    # may be a long scan away.
+    def __init__(self, out: TextIO, max_results: int) -> None:
+        self.out = out
+        self.max_results = max_results
+        self.paths = ResolvedPaths()
+        self.total = 0
+        self.emitted = 0
+
+    def header(self, fields: dict) -> None:
+        write_record(self.out, RECORD_HEADER, fields)
+        self.out.flush()
+
+    def reference(self, file: Path, fields: dict) -> None:
+        self.total += 1
+        path = self.paths[file]
+        if self.emitted < self.max_results:
+            write_record(self.out, RECORD_REFERENCE, {"file": path, **fields})
+            self.out.flush()
+            self.emitted += 1
+
+    def summary(self, fields: dict) -> None:
+        write_record(
+            self.out,
+            RECORD_SUMMARY,
+            {
+                "totalReferences": self.total,
+                "emittedReferences": self.emitted,
+                "truncated": self.total > self.emitted,
+                "touchedFiles": len(set(self.paths.values())),
+                **fields,
+            },
+        )
+        self.out.flush()
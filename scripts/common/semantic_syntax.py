@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import importlib
+from functools import lru_cache
+from importlib import metadata
+from typing import Any, Iterator
+
+from .semantic_text import LineIndex
+
+try:
+    from tree_sitter import Language, Parser
+except ImportError:  # optional: without it the regex scanner is used
+    Language = None
+    Parser = None
+
+# Grammar package per backend language (pip names: tree-sitter-go, ...).
+GRAMMAR_MODULES = {
+    "go": "tree_sitter_go",
+    "java": "tree_sitter_java",
+    "rust": "tree_sitter_rust",
+}
+SCANNER_VERSION = "syntax-names/1"
+# Postings are flat [offset, line, column, declaration, ...] quadruples.
+POSTING_STRIDE = 4
+# A name is a declaration when it fills the "name" field of a node of one of
+# these kinds: Go `function_declaration` / `type_spec`, Java
+# `variable_declarator` / `formal_parameter`, Rust `struct_item` /
+# `enum_variant`, ... Calls, selectors and paths also have "name" fields but
+# none of these suffixes.
+DECLARATION_SUFFIXES = (
+    "_declaration",
+    "_declarator",
+    "_spec",
+    "_elem",
+    "_item",
+    "_variant",
+    "_constant",
+    "_parameter",
+    "_definition",
+)
+
+
+@lru_cache(maxsize=None)
+def load_parser(language: str) -> Any | None:
+    # None when tree-sitter or the language's grammar is not installed (or
+    # is too old for the Language/Parser constructor API); callers then use
+    # the regex scanner. Cached per process, so each worker loads it once.
+    module_name = GRAMMAR_MODULES.get(language)
+    if Parser is None or module_name is None:
+        return None
+    try:
+        module = importlib.import_module(module_name)
+        return Parser(Language(module.language()))
+    except (ImportError, AttributeError, TypeError, ValueError):
+        return None
+
+
+def scanner_version(language: str) -> str:
+    # Index files record the grammar versions: upgrading one re-indexes.
+    parts = [SCANNER_VERSION]
+    for dist in ("tree-sitter", GRAMMAR_MODULES[language].replace("_", "-")):
+        try:
+            parts.append(f"{dist}/{metadata.version(dist)}")
+        except metadata.PackageNotFoundError:
+            parts.append(f"{dist}/unknown")
+    return " ".join(parts)
+
+
+def iter_names(tree: Any) -> Iterator[tuple[int, int, bool]]:
+    # (start byte, end byte, is declaration) of every identifier leaf, in
+    # source order. Comments and string literals are separate node kinds, so
+    # words inside them never show up here.
+    cursor = tree.walk()
+    parents: list[str] = []
+    while True:
+        node = cursor.node
+        if node.child_count == 0:
+            start = node.start_byte
+            end = node.end_byte
+            if node.is_named and node.type.endswith("identifier") and end > start:
+                yield (
+                    start,
+                    end,
+                    cursor.field_name == "name"
+                    and bool(parents)
+                    and parents[-1].endswith(DECLARATION_SUFFIXES),
+                )
+        elif cursor.goto_first_child():
+            parents.append(node.type)
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return
+            parents.pop()
+
+
+def syntax_identifiers(language: str, content: str) -> dict[str, list[int]]:
+    # Same offsets and columns as the regex scanner (characters of the
+    # newline-translated text), from a single parse of the file.
+    parser = load_parser(language)
+    if parser is None:
+        raise ValueError(f"no tree-sitter grammar installed for '{language}'")
+    raw = content.encode("utf8")
+    ascii_only = len(raw) == len(content)
+    lines = LineIndex(content)
+    postings: dict[str, list[int]] = {}
+    byte_pos = 0
+    char_pos = 0
+    for start, end, declaration in iter_names(parser.parse(raw)):
+        if ascii_only:
+            offset = start
+        else:
+            char_pos += len(raw[byte_pos:start].decode("utf8"))
+            byte_pos = start
+            offset = char_pos
+        line, column = lines.line_col(offset)
+        postings.setdefault(raw[start:end].decode("utf8"), []).extend(
+            (offset, line, column, int(declaration))
+        )
+    return postings
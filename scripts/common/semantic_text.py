@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable
+
+
+class LineIndex:
+    # Line-start table for one file's content, built once and bisected, so
+    # offset <-> (line, column) conversions cost O(log lines) per lookup.
+    # Lines are "\n"-terminated, matching tokenize and the match scanners.
+    __slots__ = ("length", "starts", "trailing_newline")
+
+    def __init__(self, content: str) -> None:
+        starts = [0]
+        find = content.find
+        pos = find("\n")
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find("\n", pos + 1)
+        self.length = len(content)
+        self.starts = starts
+        self.trailing_newline = content.endswith("\n")
+
+    def line_count(self) -> int:
+        # Same count as str.splitlines(): no phantom line after a final "\n".
+        if self.length == 0:
+            return 0
+        return len(self.starts) - (1 if self.trailing_newline else 0)
+
+    def line_length(self, line: int) -> int:
+        # Length of a 1-based line including its terminator.
+        end = self.starts[line] if line < len(self.starts) else self.length
+        return end - self.starts[line - 1]
+
+    def line_start(self, line: int) -> int:
+        return self.starts[line - 1]
+
+    def line_col(self, offset: int) -> tuple[int, int]:
+        # 1-based line and column for a clamped character offset.
+        offset = min(max(offset, 0), self.length)
+        index = bisect_right(self.starts, offset) - 1
+        return (index + 1, offset - self.starts[index] + 1)
+
+
+def splice_spans(
+    content: str, spans: Iterable[tuple[int, int]], replacement: str
+) -> str:
+    # Assemble the output in one pass over the sorted spans instead of
+    # re-copying the whole string once per edit.
+    pieces: list[str] = []
+    cursor = 0
+    for start, end in sorted(spans):
+        if start < cursor:
+            raise ValueError(f"overlapping edit spans at offset {start}")
+        pieces.append(content[cursor:start])
+        pieces.append(replacement)
+        cursor = end
+    pieces.append(content[cursor:])
+    return "".join(pieces)
+
+
+class RewrittenFiles:
+    # Files a rename has already rewritten, by device and inode. A symlink or
+    # hard link to one of them already shows the new content, so splicing
+    # its spans (taken from the old content) again would corrupt the file.
+    __slots__ = ("seen",)
+
+    def __init__(self) -> None:
+        self.seen: set[tuple[int, int]] = set()
+
+    def add(self, path: Path) -> bool:
+        # False when `path` names a file rewritten earlier in this run.
+        try:
+            st = path.stat()
+        except OSError:
+            return True
+        key = (st.st_dev, st.st_ino)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    # Write next to the target and rename over it, so an interrupted rewrite
+    # leaves either the old or the new file, never a truncated one. A
+    # symlink is resolved first so the rename replaces its target, not the
+    # link. A file with other hard links is rewritten in place instead:
+    # renaming over it would detach the other names from the new content.
+    path = path.resolve()
+    try:
+        links = path.stat().st_nlink
+    except OSError:
+        links = 1
+    if links > 1:
+        with path.open("w", encoding="utf8") as handle:
+            handle.write(text)
+        return
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Iterable
+
+from .semantic_store import run_git
+
+SOURCE_SCAN = "scan"
+SOURCE_GIT = "git"
+
+
+def glob_to_regex(pattern: str) -> str:
+    # gitignore glob -> regex over a "/"-separated relative path.
+    out: list[str] = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if ch == "*":
+            out.append("[^/]*")
+        elif ch == "?":
+            out.append("[^/]")
+        elif ch == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(ch))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif ch == "\\" and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRule:
+    __slots__ = ("base", "regex", "negate", "dir_only", "basename_only")
+
+    def __init__(self, base: str, line: str) -> None:
+        self.negate = line.startswith("!")
+        if self.negate:
+            line = line[1:]
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        # Without an inner "/" a pattern matches the name at any depth.
+        self.basename_only = "/" not in line
+        line = line.lstrip("/")
+        self.base = base
+        self.regex = re.compile(glob_to_regex(line) + r"\Z")
+
+    def matches(self, rel: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel.startswith(self.base + "/"):
+                return False
+            rel = rel[len(self.base) + 1 :]
+        if self.basename_only:
+            rel = rel.rsplit("/", 1)[-1]
+        return self.regex.match(rel) is not None
+
+
+def parse_ignore_file(path: Path, base: str) -> list[IgnoreRule]:
+    try:
+        text = path.read_text(encoding="utf8", errors="replace")
+    except OSError:
+        return []
+    rules: list[IgnoreRule] = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("\\#") or line.startswith("\\!"):
+            line = line[1:]
+        rules.append(IgnoreRule(base, line))
+    return rules
+
+
+def exclude_rules(root: Path) -> tuple[str, list[IgnoreRule]]:
+    # The repo-wide excludes git applies beneath every .gitignore, lowest
+    # precedence first: core.excludesFile, then .git/info/exclude. Their
+    # patterns are relative to the work tree top, so the root's path below
+    # it is returned as a prefix. Outside a work tree there are none.
+    output = run_git(
+        root, ["rev-parse", "--show-prefix", "--git-path", "info/exclude"]
+    )
+    if output is None:
+        return ("", [])
+    lines = output.splitlines()
+    if len(lines) < 2:
+        return ("", [])
+    prefix, info = lines[0], Path(lines[1])
+    configured = run_git(root, ["config", "--path", "--get", "core.excludesFile"])
+    if configured is not None and configured.strip():
+        user_file = Path(configured.strip())
+    else:
+        config_home = os.environ.get("XDG_CONFIG_HOME")
+        base = Path(config_home) if config_home else Path.home() / ".config"
+        user_file = base / "git" / "ignore"
+    rules: list[IgnoreRule] = []
+    for path in (user_file, info):
+        rules.extend(parse_ignore_file(root / path, ""))
+    return (prefix, rules)
+
+
+class SourceTree:
+    # Enumerates a backend's source files under one root. "scan" walks with
+    # os.scandir, pruning ignored directories before descending and applying
+    # .gitignore files along the way (over git's info/exclude and the user's
+    # core.excludesFile, as git does); "git" asks `git ls-files` instead and
+    # falls back to "scan" outside a work tree. Both keep the sorted-by-path
+    # order the backends rely on for deterministic output.
+    def __init__(
+        self,
+        root: Path,
+        suffixes: Iterable[str],
+        ignore_dirs: set[str],
+        source: str = SOURCE_SCAN,
+    ) -> None:
+        self.root = root
+        self.suffixes = tuple(suffixes)
+        self.ignore_dirs = ignore_dirs
+        self.source = source
+        self.rules: dict[str, list[IgnoreRule]] = {}
+        self.excludes: tuple[str, list[IgnoreRule]] | None = None
+
+    def files(self) -> list[Path]:
+        rels = self._git_files() if self.source == SOURCE_GIT else None
+        if rels is None:
+            rels = self._scan_files()
+        files = [self.root / rel for rel in rels]
+        files.sort(key=lambda item: str(item))
+        return files
+
+    def accepts(self, rel: str) -> bool:
+        # Same verdict the walk would reach for a repo-relative posix path.
+        if not rel.endswith(self.suffixes):
+            return False
+        parts = rel.split("/")
+        if any(part in self.ignore_dirs for part in parts[:-1]):
+            return False
+        if self.source == SOURCE_GIT:
+            return True
+        for depth in range(1, len(parts)):
+            if self._ignored("/".join(parts[:depth]), True):
+                return False
+        return not self._ignored(rel, False)
+
+    def _rules_for(self, rel_dir: str) -> list[IgnoreRule]:
+        rules = self.rules.get(rel_dir)
+        if rules is None:
+            directory = self.root / rel_dir if rel_dir else self.root
+            rules = parse_ignore_file(directory / ".gitignore", rel_dir)
+            self.rules[rel_dir] = rules
+        return rules
+
+    def _ignored(self, rel: str, is_dir: bool) -> bool:
+        # Repo-wide excludes, then rules from shallower .gitignore files
+        # first; the last match wins.
+        if self.excludes is None:
+            self.excludes = exclude_rules(self.root)
+        prefix, excludes = self.excludes
+        verdict = False
+        for rule in excludes:
+            if rule.matches(prefix + rel, is_dir):
+                verdict = not rule.negate
+        parts = rel.split("/")
+        for depth in range(len(parts)):
+            for rule in self._rules_for("/".join(parts[:depth])):
+                if rule.matches(rel, is_dir):
+                    verdict = not rule.negate
+        return verdict
+
+    def _scan_files(self) -> list[str]:
+        found: list[str] = []
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            directory = self.root / rel_dir if rel_dir else self.root
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in self.ignore_dirs:
+                            continue
+                        if not self._ignored(rel, True):
+                            pending.append(rel)
+                        continue
+                    if not entry.name.endswith(self.suffixes):
+                        continue
+                    if entry.is_file() and not self._ignored(rel, False):
+                        found.append(rel)
+                except OSError:
+                    continue
+        return found
+
+    def _git_files(self) -> list[str] | None:
+        listed = run_git(
+            self.root,
+            ["ls-files", "--cached", "--others", "--exclude-standard", "-z"],
+        )
+        deleted = run_git(self.root, ["ls-files", "--deleted", "-z"])
+        if listed is None or deleted is None:
+            return None
+        gone = set(deleted.split("\0"))
+        return [
+            rel
+            for rel in dict.fromkeys(listed.split("\0"))
+            if rel and rel not in gone and self.accepts(rel)
+        ]
@@ -331,6 +331,21 @@ function Get-MinimalPresetFiles {
     "scripts/semantic-rename.ts",
     "scripts/semantic-index.py",
     "scripts/semantic-python.py",
+    "scripts/common/__init__.py",
+    "scripts/common/semantic_batch.py",
+    "scripts/common/semantic_daemon.py",
+    "scripts/common/semantic_engine.py",
+    "scripts/common/semantic_matches.py",
+    "scripts/common/semantic_namecache.py",
+    "scripts/common/semantic_parallel.py",
+    "scripts/common/semantic_prefilter.py",
+    "scripts/common/semantic_pyscope.py",
+    "scripts/common/semantic_report.py",
+    "scripts/common/semantic_store.py",
+    "scripts/common/semantic_stream.py",
+    "scripts/common/semantic_syntax.py",
+    "scripts/common/semantic_text.py",
+    "scripts/common/semantic_walk.py",
     "scripts/common/sbk-runtime.ps1",
     "scripts/common/verify-telemetry.ps1",
     "scripts/verify-fast.ps1",
@@ -15,6 +15,15 @@ function Show-Usage {
   Write-Host "  rename --file <path> --line <n> --column <n> --new-name <name> [--dry-run] [--adapter <name>] [--target-repo-root <path>]"
   Write-Host "  reference-map --file <path> --line <n> --column <n> [--max-results <n>] [--adapter <name>] [--target-repo-root <path>]"
   Write-Host "  safe-delete-candidates --file <path> --line <n> --column <n> [--max-results <n>] [--adapter <name>] [--target-repo-root <path>]"
+  Write-Host ""
+  Write-Host "Index options (python/go/java/rust backends):"
+  Write-Host "  --index-refresh stat|git   stat re-checks every file; git re-checks only files changed since the last indexed commit"
+  Write-Host "  --jobs <n>                  worker processes for file scanning (default 1)"
+  Write-Host "  --file-source scan|git      scan walks the tree honoring .gitignore; git lists files with git ls-files"
+  Write-Host "  --parser regex|tree-sitter  go/java/rust: tree-sitter matches syntax-tree identifiers only (falls back to regex without a grammar)"
+  Write-Host ""
+  Write-Host "A resident backend started with 'python scripts/semantic-python.py --serve --targetRepoRoot <repo>'"
+  Write-Host "(or semantic-index.py) answers requests over its socket; otherwise each call spawns the backend."
 }
 
 function Resolve-TargetRepoRoot {
@@ -47,6 +56,108 @@ function Get-PythonRuntimeCommand {
   return $null
 }
 
+function Invoke-SemanticDaemonRequest {
+  param(
+    [Parameter(Mandatory = $true)][ValidateSet("semantic-python", "semantic-index")][string]$Backend,
+    [Parameter(Mandatory = $true)][string]$TargetRepoRoot,
+    [Parameter(Mandatory = $true)][string]$Method,
+    [Parameter(Mandatory = $true)][hashtable]$Params,
+    [Parameter(Mandatory = $true)][hashtable]$Options
+  )
+
+  # Returns $null when no daemon is reachable, or when it was started with
+  # other options than the caller asked for, so the caller spawns the backend.
+  $infoPath = Join-Path $TargetRepoRoot (".sbk\semantic-daemon\{0}.json" -f $Backend)
+  if (-not (Test-Path $infoPath -PathType Leaf)) {
+    return $null
+  }
+  if ($null -eq ("System.Net.Sockets.UnixDomainSocketEndPoint" -as [type])) {
+    return $null
+  }
+  try {
+    $info = Get-Content -Path $infoPath -Raw -Encoding UTF8 | ConvertFrom-Json
+  }
+  catch {
+    return $null
+  }
+  $socketPath = [string](Get-SbkPropertyValue -Object $info -Name "socket")
+  if ([string]::IsNullOrWhiteSpace($socketPath)) {
+    return $null
+  }
+  $daemonOptions = Get-SbkPropertyValue -Object $info -Name "options"
+  if ($null -eq $daemonOptions) {
+    return $null
+  }
+  foreach ($key in $Options.Keys) {
+    $daemonValue = Get-SbkPropertyValue -Object $daemonOptions -Name $key
+    if ([string]$daemonValue -ne [string]$Options[$key]) {
+      return $null
+    }
+  }
+
+  $socket = New-Object System.Net.Sockets.Socket(
+    [System.Net.Sockets.AddressFamily]::Unix,
+    [System.Net.Sockets.SocketType]::Stream,
+    [System.Net.Sockets.ProtocolType]::Unspecified
+  )
+  try {
+    try {
+      $socket.Connect((New-Object System.Net.Sockets.UnixDomainSocketEndPoint($socketPath)))
+    }
+    catch {
+      return $null
+    }
+    $stream = New-Object System.Net.Sockets.NetworkStream($socket, $true)
+    $encoding = New-Object System.Text.UTF8Encoding($false)
+    $writer = New-Object System.IO.StreamWriter($stream, $encoding)
+    $reader = New-Object System.IO.StreamReader($stream, $encoding)
+    $request = [ordered]@{
+      jsonrpc = "2.0"
+      id = 1
+      method = $Method
+      params = $Params
+    }
+    $writer.Write(($request | ConvertTo-Json -Depth 5 -Compress) + "`n")
+    $writer.Flush()
+    $reply = $reader.ReadLine()
+  }
+  finally {
+    $socket.Dispose()
+  }
+
+  if ([string]::IsNullOrWhiteSpace($reply)) {
+    throw "$Backend daemon closed the connection without a reply"
+  }
+  $response = $reply | ConvertFrom-Json
+  $rpcError = Get-SbkPropertyValue -Object $response -Name "error"
+  if ($null -ne $rpcError) {
+    throw ("{0} daemon failed: {1}" -f $Backend, $rpcError.message)
+  }
+  return (Get-SbkPropertyValue -Object $response -Name "result")
+}
+
+function Get-SemanticDaemonParams {
+  param(
+    [Parameter(Mandatory = $true)][string]$File,
+    [Parameter(Mandatory = $true)][int]$Line,
+    [Parameter(Mandatory = $true)][int]$Column,
+    [Parameter(Mandatory = $true)][bool]$DryRun,
+    [Parameter(Mandatory = $true)][int]$MaxResults
+  )
+
+  if (-not (Test-Path -LiteralPath $File -PathType Leaf)) {
+    return $null
+  }
+  $params = @{
+    file = (Resolve-Path -LiteralPath $File).Path
+    line = $Line
+    column = $Column
+    maxResults = $MaxResults
+    dryRun = $DryRun
+  }
+  return $params
+}
+
 function Invoke-NodeTsSemanticOperation {
   param(
     [Parameter(Mandatory = $true)][ValidateSet("rename", "reference-map", "safe-delete-candidates")][string]$Operation,
@@ -114,9 +225,37 @@ function Invoke-PythonSemanticOperation {
     [Parameter(Mandatory = $true)][int]$Column,
     [string]$NewName = "",
     [Parameter(Mandatory = $true)][bool]$DryRun,
-    [Parameter(Mandatory = $true)][int]$MaxResults
+    [Parameter(Mandatory = $true)][int]$MaxResults,
+    [string]$IndexRefresh = "stat",
+    [int]$Jobs = 1,
+    [string]$FileSource = "scan"
   )
 
+  $daemonParams = Get-SemanticDaemonParams `
+    -File $File `
+    -Line $Line `
+    -Column $Column `
+    -DryRun $DryRun `
+    -MaxResults $MaxResults
+  if ($null -ne $daemonParams) {
+    if ($Operation -eq "rename") {
+      $daemonParams.newName = $NewName
+    }
+    $daemonResult = Invoke-SemanticDaemonRequest `
+      -Backend "semantic-python" `
+      -TargetRepoRoot $TargetRepoRoot `
+      -Method $Operation `
+      -Params $daemonParams `
+      -Options @{
+        indexRefresh = $IndexRefresh
+        jobs = $Jobs
+        fileSource = $FileSource
+      }
+    if ($null -ne $daemonResult) {
+      return $daemonResult
+    }
+  }
+
   $runtime = Get-PythonRuntimeCommand
   if ($null -eq $runtime) {
     throw "python runtime unavailable: install python/py/uv"
@@ -141,7 +280,13 @@ function Invoke-PythonSemanticOperation {
       "--column",
       "$Column",
       "--maxResults",
-      "$MaxResults"
+      "$MaxResults",
+      "--indexRefresh",
+      $IndexRefresh,
+      "--jobs",
+      "$Jobs",
+      "--fileSource",
+      $FileSource
     )
   )
   if ($Operation -eq "rename") {
@@ -169,9 +314,40 @@ function Invoke-IndexedSemanticOperation {
     [Parameter(Mandatory = $true)][int]$Column,
     [string]$NewName = "",
     [Parameter(Mandatory = $true)][bool]$DryRun,
-    [Parameter(Mandatory = $true)][int]$MaxResults
+    [Parameter(Mandatory = $true)][int]$MaxResults,
+    [string]$IndexRefresh = "stat",
+    [int]$Jobs = 1,
+    [string]$FileSource = "scan",
+    [string]$Parser = "regex"
   )
 
+  $daemonParams = Get-SemanticDaemonParams `
+    -File $File `
+    -Line $Line `
+    -Column $Column `
+    -DryRun $DryRun `
+    -MaxResults $MaxResults
+  if ($null -ne $daemonParams) {
+    if ($Operation -eq "rename") {
+      $daemonParams.newName = $NewName
+    }
+    $daemonParams.language = $Language
+    $daemonResult = Invoke-SemanticDaemonRequest `
+      -Backend "semantic-index" `
+      -TargetRepoRoot $TargetRepoRoot `
+      -Method $Operation `
+      -Params $daemonParams `
+      -Options @{
+        indexRefresh = $IndexRefresh
+        jobs = $Jobs
+        fileSource = $FileSource
+        parser = $Parser
+      }
+    if ($null -ne $daemonResult) {
+      return $daemonResult
+    }
+  }
+
   $runtime = Get-PythonRuntimeCommand
   if ($null -eq $runtime) {
     throw "python runtime unavailable: install python/py/uv for symbol-index backend"
@@ -198,7 +374,15 @@ function Invoke-IndexedSemanticOperation {
       "--column",
       "$Column",
       "--maxResults",
-      "$MaxResults"
+      "$MaxResults",
+      "--indexRefresh",
+      $IndexRefresh,
+      "--jobs",
+      "$Jobs",
+      "--fileSource",
+      $FileSource,
+      "--parser",
+      $Parser
     )
   )
   if ($Operation -eq "rename") {
@@ -273,6 +457,10 @@ $column = 0
 $newName = ""
 $dryRun = $false
 $maxResults = 200
+$indexRefresh = "stat"
+$jobs = 1
+$fileSource = "scan"
+$parser = "regex"
 
 for ($i = 0; $i -lt $rest.Count; $i++) {
   $token = [string]$rest[$i]
@@ -325,6 +513,30 @@ for ($i = 0; $i -lt $rest.Count; $i++) {
       if (($i + 1) -lt $rest.Count) { $maxResults = [int]$rest[$i + 1]; $i++ }
       continue
     }
+    "--index-refresh" {
+      if (($i + 1) -lt $rest.Count) { $indexRefresh = [string]$rest[$i + 1]; $i++ }
+      continue
+    }
+    "--indexRefresh" {
+      if (($i + 1) -lt $rest.Count) { $indexRefresh = [string]$rest[$i + 1]; $i++ }
+      continue
+    }
+    "--jobs" {
+      if (($i + 1) -lt $rest.Count) { $jobs = [int]$rest[$i + 1]; $i++ }
+      continue
+    }
+    "--file-source" {
+      if (($i + 1) -lt $rest.Count) { $fileSource = [string]$rest[$i + 1]; $i++ }
+      continue
+    }
+    "--fileSource" {
+      if (($i + 1) -lt $rest.Count) { $fileSource = [string]$rest[$i + 1]; $i++ }
+      continue
+    }
+    "--parser" {
+      if (($i + 1) -lt $rest.Count) { $parser = [string]$rest[$i + 1]; $i++ }
+      continue
+    }
   }
 }
 
@@ -340,6 +552,18 @@ if ($operation -eq "rename" -and [string]::IsNullOrWhiteSpace($newName)) {
 if ($maxResults -le 0) {
   throw "max-results must be a positive integer"
 }
+if ($indexRefresh -notin @("stat", "git")) {
+  throw "index-refresh must be 'stat' or 'git'"
+}
+if ($jobs -le 0) {
+  throw "jobs must be a positive integer"
+}
+if ($fileSource -notin @("scan", "git")) {
+  throw "file-source must be 'scan' or 'git'"
+}
+if ($parser -notin @("regex", "tree-sitter")) {
+  throw "parser must be 'regex' or 'tree-sitter'"
+}
 
 $targetRepoRoot = Resolve-TargetRepoRoot -Path $targetRepoRootRaw
 $runtime = Get-SbkRuntimeContext `
@@ -394,7 +618,10 @@ try {
         -Column $column `
         -NewName $newName `
         -DryRun $dryRun `
-        -MaxResults $maxResults
+        -MaxResults $maxResults `
+        -IndexRefresh $indexRefresh `
+        -Jobs $jobs `
+        -FileSource $fileSource
     }
     "go" {
       $result = Invoke-IndexedSemanticOperation `
@@ -406,7 +633,11 @@ try {
         -Column $column `
         -NewName $newName `
         -DryRun $dryRun `
-        -MaxResults $maxResults
+        -MaxResults $maxResults `
+        -IndexRefresh $indexRefresh `
+        -Jobs $jobs `
+        -FileSource $fileSource `
+        -Parser $parser
     }
     "java" {
       $result = Invoke-IndexedSemanticOperation `
@@ -418,7 +649,11 @@ try {
         -Column $column `
         -NewName $newName `
         -DryRun $dryRun `
-        -MaxResults $maxResults
+        -MaxResults $maxResults `
+        -IndexRefresh $indexRefresh `
+        -Jobs $jobs `
+        -FileSource $fileSource `
+        -Parser $parser
     }
     "rust" {
       $result = Invoke-IndexedSemanticOperation `
@@ -430,7 +665,11 @@ try {
         -Column $column `
         -NewName $newName `
         -DryRun $dryRun `
-        -MaxResults $maxResults
+        -MaxResults $maxResults `
+        -IndexRefresh $indexRefresh `
+        -Jobs $jobs `
+        -FileSource $fileSource `
+        -Parser $parser
     }
     default {
       throw "no semantic backend registered for adapter '$($runtime.adapter)'"
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+# (seconds, peak RSS bytes or None, parsed backend output)
+Run = tuple[float, Optional[int], dict]
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+LANGUAGES = ["go", "java", "rust", "python"]
+RESULTS_VERSION = 1
+
+SCENARIO_COLD = "reference-map-cold"
+SCENARIO_WARM = "reference-map-warm"
+SCENARIO_DIRECT = "reference-map-direct"
+SCENARIO_DRY_RUN = "rename-dry-run"
+SCENARIO_APPLY = "rename-apply"
+
+# Differences below this many seconds are timer noise, never a regression.
+NOISE_FLOOR_SECONDS = 0.05
+# Timings are only comparable between runs over identically generated repos.
+COMPARABLE_CONFIG = ["files", "linesPerFile", "symbolDensity", "seed", "jobs"]
+
+
+@dataclass(frozen=True)
+class LanguageTemplate:
+    # Every generated file is one function whose body lines are either a
+    # reference to the benchmark symbol or a filler assignment; file 0 also
+    # defines the symbol, on the line and column recorded in `target`.
+    path: Callable[[int], str]
+    header: Callable[[int], str]
+    definition: str
+    opening: Callable[[int], str]
+    reference: str
+    filler: Callable[[int, int], str]
+    footer: str
+    symbol: str
+    renamed: str
+    target: tuple[int, int]
+    extra_files: dict[str, str]
+
+
+TEMPLATES: dict[str, LanguageTemplate] = {
+    "go": LanguageTemplate(
+        path=lambda index: f"pkg{index % 16}/file{index}.go",
+        header=lambda index: f"package pkg{index % 16}\n\n",
+        definition="func BenchTarget() {}\n\n",
+        opening=lambda index: f"func work{index}() {{\n",
+        reference="\tBenchTarget()\n",
+        filler=lambda index, line: f"\tvalue{index}x{line} := {line}\n",
+        footer="}\n",
+        symbol="BenchTarget",
+        renamed="BenchRenamed",
+        target=(3, 6),
+        extra_files={},
+    ),
+    "java": LanguageTemplate(
+        path=lambda index: f"src/main/java/bench/File{index}.java",
+        header=lambda index: f"package bench;\n\npublic class File{index} {{\n",
+        definition="  static void benchTarget() {}\n\n",
+        opening=lambda index: "  static void work() {\n",
+        reference="    File0.benchTarget();\n",
+        filler=lambda index, line: f"    int value{index}x{line} = {line};\n",
+        footer="  }\n}\n",
+        symbol="benchTarget",
+        renamed="benchRenamed",
+        target=(4, 15),
+        extra_files={},
+    ),
+    "rust": LanguageTemplate(
+        path=lambda index: f"src/m{index}.rs",
+        header=lambda index: "",
+        definition="pub fn bench_target() {}\n\n",
+        opening=lambda index: f"pub fn work{index}() {{\n",
+        reference="    crate::m0::bench_target();\n",
+        filler=lambda index, line: f"    let value_{index}_{line} = {line};\n",
+        footer="}\n",
+        symbol="bench_target",
+        renamed="bench_renamed",
+        target=(1, 8),
+        extra_files={},
+    ),
+    "python": LanguageTemplate(
+        path=lambda index: f"bench/m{index}.py",
+        header=lambda index: (
+            "" if index == 0 else "from bench.m0 import bench_target\n\n"
+        ),
+        definition="def bench_target():\n    return 0\n\n\n",
+        opening=lambda index: f"def work{index}():\n",
+        reference="    bench_target()\n",
+        filler=lambda index, line: f"    value_{index}_{line} = {line}\n",
+        footer="    return None\n",
+        symbol="bench_target",
+        renamed="bench_renamed",
+        target=(1, 5),
+        extra_files={"bench/__init__.py": ""},
+    ),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the semantic backends on generated repositories."
+    )
+    parser.add_argument(
+        "--languages",
+        default=",".join(LANGUAGES),
+        help=f"comma-separated subset of {','.join(LANGUAGES)}",
+    )
+    parser.add_argument("--files", default=200, type=int, help="files per repository")
+    parser.add_argument(
+        "--linesPerFile", default=200, type=int, help="function body lines per file"
+    )
+    parser.add_argument(
+        "--symbolDensity",
+        default=0.02,
+        type=float,
+        help="fraction of body lines that reference the benchmark symbol",
+    )
+    parser.add_argument(
+        "--repeat", default=3, type=int, help="timed runs per warm scenario"
+    )
+    parser.add_argument("--seed", default=1, type=int)
+    parser.add_argument(
+        "--jobs", default=1, type=int, help="passed through to the backends"
+    )
+    parser.add_argument(
+        "--workDir", help="where to generate repositories (default: a temp dir)"
+    )
+    parser.add_argument(
+        "--output",
+        default=".metrics/semantic-bench.json",
+        help="results file",
+    )
+    parser.add_argument(
+        "--baseline", help="earlier results file to compare against"
+    )
+    parser.add_argument(
+        "--maxRegression",
+        default=0.2,
+        type=float,
+        help="with --baseline, fail when a scenario is slower by more than this ratio",
+    )
+    return parser
+
+
+def generate_repo(
+    root: Path,
+    language: str,
+    files: int,
+    lines_per_file: int,
+    density: float,
+    seed: int,
+) -> dict:
+    # Deterministic for a given seed; returns the repository's statistics.
+    template = TEMPLATES[language]
+    rng = random.Random(f"{seed}:{language}")
+    if root.exists():
+        shutil.rmtree(root)
+    total_bytes = 0
+    references = 0
+    for rel, content in template.extra_files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf8")
+    for index in range(files):
+        parts = [template.header(index)]
+        if index == 0:
+            parts.append(template.definition)
+        parts.append(template.opening(index))
+        for line in range(lines_per_file):
+            if rng.random() < density:
+                parts.append(template.reference)
+            else:
+                parts.append(template.filler(index, line))
+        parts.append(template.footer)
+        content = "".join(parts)
+        references += content.count(template.symbol)
+        path = root / template.path(index)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf8")
+        total_bytes += len(content.encode("utf8"))
+    return {
+        "files": files,
+        "linesPerFile": lines_per_file,
+        "symbolDensity": density,
+        "bytes": total_bytes,
+        # Every occurrence: definition, imports and generated references.
+        "expectedReferences": references,
+    }
+
+
+def backend_command(
+    language: str, repo: Path, operation: str, jobs: int, extra: list[str]
+) -> list[str]:
+    template = TEMPLATES[language]
+    line, column = template.target
+    if language == "python":
+        command = [sys.executable, str(SCRIPTS_DIR / "semantic-python.py")]
+    else:
+        command = [
+            sys.executable,
+            str(SCRIPTS_DIR / "semantic-index.py"),
+            "--language",
+            language,
+        ]
+    return command + [
+        "--operation",
+        operation,
+        "--file",
+        str(repo / template.path(0)),
+        "--line",
+        str(line),
+        "--column",
+        str(column),
+        "--targetRepoRoot",
+        str(repo),
+        "--jobs",
+        str(jobs),
+        *extra,
+    ]
+
+
+def run_backend(command: list[str]) -> Run:
+    # Peak RSS is None where the platform cannot report a child's own peak.
+    with tempfile.TemporaryFile() as output:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, stdout=output, stderr=subprocess.STDOUT)
+        peak: int | None = None
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in KiB on Linux and in bytes on macOS.
+            scale = 1 if sys.platform == "darwin" else 1024
+            peak = usage.ru_maxrss * scale
+        else:
+            process.wait()
+        elapsed = time.perf_counter() - started
+        output.seek(0)
+        text = output.read().decode("utf8", errors="replace")
+    if process.returncode != 0:
+        raise ValueError(f"backend failed ({process.returncode}): {text.strip()}")
+    return (elapsed, peak, json.loads(text))
+
+
+def scenario_result(
+    language: str,
+    scenario: str,
+    runs: list[Run],
+    repo_stats: dict,
+) -> dict:
+    seconds = [run[0] for run in runs]
+    peaks = [run[1] for run in runs if run[1] is not None]
+    median = statistics.median(seconds)
+    payload = runs[-1][2]
+    references = payload.get("summary", {}).get("totalReferences")
+    if references is None:
+        references = payload.get("touchedLocations")
+    return {
+        "language": language,
+        "scenario": scenario,
+        "runs": [round(value, 4) for value in seconds],
+        "seconds": round(median, 4),
+        "peakRssMb": round(max(peaks) / (1024 * 1024), 1) if peaks else None,
+        "references": references,
+        "filesPerSecond": round(repo_stats["files"] / median, 1),
+        "mbPerSecond": round(repo_stats["bytes"] / (1024 * 1024) / median, 2),
+    }
+
+
+def bench_language(
+    language: str, repo: Path, args: argparse.Namespace, repo_stats: dict
+) -> list[dict]:
+    template = TEMPLATES[language]
+
+    def run(operation: str, extra: list[str]) -> Run:
+        return run_backend(
+            backend_command(language, repo, operation, args.jobs, extra)
+        )
+
+    def repeat(operation: str, extra: list[str]) -> list[Run]:
+        return [run(operation, extra) for _ in range(args.repeat)]
+
+    shutil.rmtree(repo / ".sbk", ignore_errors=True)
+    results = [
+        scenario_result(
+            language, SCENARIO_COLD, [run("reference-map", [])], repo_stats
+        ),
+        scenario_result(
+            language, SCENARIO_WARM, repeat("reference-map", []), repo_stats
+        ),
+        scenario_result(
+            language,
+            SCENARIO_DRY_RUN,
+            repeat("rename", ["--newName", template.renamed, "--dryRun"]),
+            repo_stats,
+        ),
+    ]
+    # Each apply renames the symbol and the next one renames it back, so the
+    # tree ends as generated and every run edits the same locations.
+    applies = []
+    for index in range(args.repeat * 2):
+        new_name = template.renamed if index % 2 == 0 else template.symbol
+        applies.append(run("rename", ["--newName", new_name]))
+    results.append(scenario_result(language, SCENARIO_APPLY, applies, repo_stats))
+    direct = repeat("reference-map", ["--noIndex"])
+    results.append(scenario_result(language, SCENARIO_DIRECT, direct, repo_stats))
+    expected = repo_stats["expectedReferences"]
+    for result in results:
+        if result["references"] != expected:
+            raise ValueError(
+                f"{language} {result['scenario']}: found {result['references']} "
+                f"references, expected {expected}"
+            )
+    return results
+
+
+def compare(results: list[dict], baseline: dict, max_regression: float) -> list[str]:
+    # Scenarios slower than the baseline by more than max_regression (and by
+    # more than timer noise).
+    previous = {
+        (item["language"], item["scenario"]): item["seconds"]
+        for item in baseline.get("results", [])
+    }
+    regressions = []
+    for item in results:
+        before = previous.get((item["language"], item["scenario"]))
+        if before is None or before <= 0:
+            continue
+        ratio = item["seconds"] / before
+        item["baselineSeconds"] = before
+        item["ratio"] = round(ratio, 3)
+        if (
+            ratio > 1 + max_regression
+            and item["seconds"] - before > NOISE_FLOOR_SECONDS
+        ):
+            regressions.append(
+                f"{item['language']} {item['scenario']}: "
+                f"{before:.3f}s -> {item['seconds']:.3f}s ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    languages = [item.strip() for item in args.languages.split(",") if item.strip()]
+    unknown = sorted(set(languages) - set(LANGUAGES))
+    if unknown:
+        raise ValueError(f"unsupported languages: {', '.join(unknown)}")
+    if args.files <= 0 or args.linesPerFile <= 0 or args.repeat <= 0:
+        raise ValueError("files, linesPerFile and repeat must be positive integers")
+    if not 0 <= args.symbolDensity <= 1:
+        raise ValueError("symbolDensity must be between 0 and 1")
+    config = {
+        "languages": languages,
+        "files": args.files,
+        "linesPerFile": args.linesPerFile,
+        "symbolDensity": args.symbolDensity,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "jobs": args.jobs,
+    }
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf8"))
+        previous = baseline.get("config", {})
+        differing = [
+            key for key in COMPARABLE_CONFIG if previous.get(key) != config[key]
+        ]
+        if differing:
+            raise ValueError(
+                f"baseline {args.baseline} used different {', '.join(differing)}"
+            )
+
+    owned_dir = None
+    if args.workDir is None:
+        owned_dir = tempfile.mkdtemp(prefix="sbk-semantic-bench-")
+        work_dir = Path(owned_dir)
+    else:
+        work_dir = Path(args.workDir)
+    results: list[dict] = []
+    repos: dict[str, dict] = {}
+    try:
+        for language in languages:
+            repo = work_dir / language
+            repo_stats = generate_repo(
+                repo,
+                language,
+                args.files,
+                args.linesPerFile,
+                args.symbolDensity,
+                args.seed,
+            )
+            repos[language] = repo_stats
+            for result in bench_language(language, repo, args, repo_stats):
+                results.append(result)
+                peak = result["peakRssMb"]
+                print(
+                    f"[semantic-bench] {language:<6} {result['scenario']:<22} "
+                    f"{result['seconds']:8.3f}s  "
+                    f"{'-' if peak is None else f'{peak:.1f} MB':>9}  "
+                    f"{result['filesPerSecond']:>10.1f} files/s"
+                )
+    finally:
+        if owned_dir is not None:
+            shutil.rmtree(owned_dir, ignore_errors=True)
+
+    regressions = (
+        compare(results, baseline, args.maxRegression) if baseline is not None else []
+    )
+    report = {
+        "version": RESULTS_VERSION,
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "repos": repos,
+        "results": results,
+        "regressions": regressions,
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf8")
+    print(f"[semantic-bench] results: {output}")
+    if regressions:
+        for line in regressions:
+            print(f"[semantic-bench] regression: {line}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:  # noqa: BLE001
+        print(f"[semantic-bench] {exc}")
+        raise SystemExit(1) from exc
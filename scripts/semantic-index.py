@@ -3,66 +3,170 @@
 from __future__ import annotations
 
 import argparse
+import codecs
 import json
+import mmap
 import re
+import sys
 from dataclasses import dataclass
+from functools import partial
+from itertools import groupby, islice
 from pathlib import Path
+from typing import Callable, Iterator, TextIO
+
+from common import semantic_daemon
+from common.semantic_batch import run_batch
+from common.semantic_engine import (
+    DEFINITION_PREFIX,
+    LANGUAGES,
+    REFRESH_GIT,
+    REFRESH_STAT,
+    SemanticEngine,
+)
+from common.semantic_matches import MatchRow, MatchTable
+from common.semantic_parallel import ordered_imap
+from common.semantic_prefilter import WordFilterStore
+from common.semantic_report import (
+    OP_SAFE_DELETE_REPORT,
+    Definition,
+    build_report_payload,
+    occurrence_count,
+    rank_candidates,
+)
+from common.semantic_store import SymbolIndexStore, decode_source
+from common.semantic_stream import (
+    RECORD_RESULT,
+    ReferenceStream,
+    ResolvedPaths,
+    first_or_none,
+    write_record,
+)
+from common.semantic_syntax import (
+    POSTING_STRIDE as SYNTAX_STRIDE,
+    load_parser,
+    scanner_version,
+    syntax_identifiers,
+)
+from common.semantic_text import (
+    LineIndex,
+    RewrittenFiles,
+    splice_spans,
+    write_text_atomic,
+)
+from common.semantic_walk import SOURCE_GIT, SOURCE_SCAN
 
 
 OP_RENAME = "rename"
 OP_REFERENCE = "reference-map"
 OP_SAFE_DELETE = "safe-delete-candidates"
+OPERATIONS = [OP_RENAME, OP_REFERENCE, OP_SAFE_DELETE, OP_SAFE_DELETE_REPORT]
+DAEMON_BACKEND = "semantic-index"
+SYMBOL_BACKEND = "symbol-index"
+SYNTAX_BACKEND = "syntax-index"
 
-LANGUAGE_EXTENSIONS = {
-    "go": [".go"],
-    "java": [".java"],
-    "rust": [".rs"],
-}
-
-IGNORE_PARTS = {
-    ".git",
-    "node_modules",
-    ".venv",
-    ".metrics",
-    ".trellis",
-    ".codex",
-    ".agents",
-    ".claude",
-    "dist",
-    "build",
-    "target",
-}
-
-IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
-
-
-@dataclass(frozen=True)
-class MatchRef:
-    file: Path
-    start: int
-    end: int
-    line: int
-    column: int
+PARSER_REGEX = "regex"
+PARSER_TREE_SITTER = "tree-sitter"
 
+# Languages this front end answers for; the engine owns their extensions.
+INDEX_LANGUAGES = ["go", "java", "rust"]
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(
+IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+INDEX_STRIDE = 3
+WORD_BYTES_RE = re.compile(rb"[A-Za-z_][A-Za-z0-9_]*")
+PREFILTER_VERSION = "identifier-bytes/1"
+
+# Byte-level scanning of mapped files: a lone "\r" changes line numbering
+# after newline translation, so such files take the decoded path instead.
+LONE_CR_RE = re.compile(rb"\r(?!\n)")
+NON_ASCII_RE = re.compile(rb"[\x80-\xff]")
+# Everything except UTF-8 continuation bytes; deleting these leaves one byte
+# per character that a multi-byte sequence adds beyond its first.
+NON_CONTINUATION_BYTES = bytes(b for b in range(256) if not 0x80 <= b <= 0xBF)
+SPAN_CHUNK = 1 << 20
+
+
+def build_parser(
+    parser_class: type[argparse.ArgumentParser] = argparse.ArgumentParser,
+) -> argparse.ArgumentParser:
+    parser = parser_class(
         description="Deterministic symbol-index semantic backend for Go/Java/Rust."
     )
     parser.add_argument(
         "--operation",
-        choices=[OP_RENAME, OP_REFERENCE, OP_SAFE_DELETE],
+        choices=OPERATIONS,
         default=OP_RENAME,
     )
-    parser.add_argument("--language", choices=["go", "java", "rust"], required=True)
-    parser.add_argument("--file", required=True)
-    parser.add_argument("--line", required=True, type=int)
-    parser.add_argument("--column", required=True, type=int)
+    parser.add_argument("--language", choices=INDEX_LANGUAGES)
+    parser.add_argument("--file")
+    parser.add_argument("--line", type=int)
+    parser.add_argument("--column", type=int)
     parser.add_argument("--newName")
     parser.add_argument("--targetRepoRoot", default=".")
     parser.add_argument("--dryRun", action="store_true")
     parser.add_argument("--maxResults", default=200, type=int)
-    return parser.parse_args()
+    parser.add_argument(
+        "--noIndex",
+        action="store_true",
+        help="scan files directly instead of using the persistent symbol index",
+    )
+    parser.add_argument(
+        "--noPrefilter",
+        action="store_true",
+        help="with --noIndex, read every file rather than check per-file word filters",
+    )
+    parser.add_argument(
+        "--indexRefresh",
+        choices=[REFRESH_STAT, REFRESH_GIT],
+        default=REFRESH_STAT,
+        help="stat: re-check every file; git: re-check only files git reports changed",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=[PARSER_REGEX, PARSER_TREE_SITTER],
+        default=PARSER_REGEX,
+        help=(
+            "tree-sitter: match syntax-tree identifiers only (no comments or "
+            "strings); falls back to regex when no grammar is installed"
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        default=1,
+        type=int,
+        help="worker processes for file scanning (output is identical to --jobs 1)",
+    )
+    parser.add_argument(
+        "--fileSource",
+        choices=[SOURCE_SCAN, SOURCE_GIT],
+        default=SOURCE_SCAN,
+        help="scan: walk the tree, honoring .gitignore; git: use git ls-files",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write NDJSON records, emitting references as they are found",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="PATH",
+        help="answer JSONL requests from PATH ('-' for stdin), one result line each",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="run as a resident daemon answering JSON-RPC requests on a Unix socket",
+    )
+    parser.add_argument(
+        "--watchInterval",
+        default=2.0,
+        type=float,
+        help="seconds between background index refreshes in --serve mode",
+    )
+    return parser
+
+
+def parse_args() -> argparse.Namespace:
+    return build_parser().parse_args()
 
 
 def validate_identifier(value: str) -> None:
@@ -70,31 +174,22 @@ def validate_identifier(value: str) -> None:
         raise ValueError(f"identifier '{value}' is invalid")
 
 
-def line_col_to_offset(content: str, line: int, column_1_based: int) -> int:
+def line_col_to_offset(lines: LineIndex, line: int, column_1_based: int) -> int:
     if line <= 0 or column_1_based <= 0:
         raise ValueError("line and column must be positive integers")
-    lines = content.splitlines(keepends=True)
-    if line > len(lines):
-        raise ValueError(f"line {line} exceeds file line count {len(lines)}")
-    line_text = lines[line - 1]
-    if column_1_based > len(line_text) + 1:
+    line_count = lines.line_count()
+    if line > line_count:
+        raise ValueError(f"line {line} exceeds file line count {line_count}")
+    line_length = lines.line_length(line)
+    if column_1_based > line_length + 1:
         raise ValueError(
-            f"column {column_1_based} exceeds line length {len(line_text) + 1}"
+            f"column {column_1_based} exceeds line length {line_length + 1}"
         )
-    return sum(len(lines[i]) for i in range(line - 1)) + (column_1_based - 1)
+    return lines.line_start(line) + (column_1_based - 1)
 
 
-def offset_to_line_col(content: str, offset: int) -> tuple[int, int]:
-    line = 1
-    col = 1
-    limit = min(max(offset, 0), len(content))
-    for idx in range(limit):
-        if content[idx] == "\n":
-            line += 1
-            col = 1
-        else:
-            col += 1
-    return (line, col)
+def offset_to_line_col(lines: LineIndex, offset: int) -> tuple[int, int]:
+    return lines.line_col(offset)
 
 
 def is_word_char(ch: str) -> bool:
@@ -124,59 +219,447 @@ def resolve_symbol_at(content: str, offset: int) -> str:
     return symbol
 
 
-def iter_language_files(root: Path, language: str) -> list[Path]:
-    extensions = LANGUAGE_EXTENSIONS[language]
-    files: list[Path] = []
-    for ext in extensions:
-        for candidate in root.rglob(f"*{ext}"):
-            if any(part in IGNORE_PARTS for part in candidate.parts):
-                continue
-            files.append(candidate)
-    files.sort(key=lambda item: str(item))
-    return files
-
-
-def collect_matches(symbol: str, files: list[Path]) -> list[MatchRef]:
-    pattern = re.compile(rf"\b{re.escape(symbol)}\b")
-    refs: list[MatchRef] = []
-    for file in files:
-        try:
-            content = file.read_text(encoding="utf8")
-        except Exception:
-            continue
-        for match in pattern.finditer(content):
-            line, column = offset_to_line_col(content, match.start())
-            refs.append(
-                MatchRef(
-                    file=file,
-                    start=match.start(),
-                    end=match.end(),
-                    line=line,
-                    column=column,
-                )
+def trie_alternation(words: list[str]) -> str:
+    # Regex alternation shaped as a prefix trie ("get(?:Name|Value)" instead of
+    # "getName|getValue"), so the engine tests each shared prefix once.
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        terminal = "" in node
+        branches = [
+            re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            if len(branches) == 1 and len(branches[0]) > 1:
+                body = "(?:" + body + ")"
+            body += "?"
+        return body
+
+    return emit(trie)
+
+
+@dataclass(frozen=True)
+class SymbolPatterns:
+    # `text` is the authoritative `\b`-bounded matcher. `raw` runs over the
+    # undecoded bytes, where `\b` only knows ASCII word characters, so it
+    # finds a superset of the lines `text` can match on; only those lines
+    # get decoded.
+    text: re.Pattern[str]
+    raw: re.Pattern[bytes]
+
+
+def symbols_pattern(symbols: list[str]) -> SymbolPatterns:
+    alternation = trie_alternation(sorted(set(symbols)))
+    raw = alternation.encode("ascii")
+    return SymbolPatterns(
+        text=re.compile(rf"\b(?:{alternation})\b"),
+        raw=re.compile(rb"\b(?:" + raw + rb")\b"),
+    )
+
+
+def span_stats(view: mmap.mmap, start: int, end: int, crlf: bool) -> tuple[int, int]:
+    # (newlines, characters after newline translation) in view[start:end],
+    # counted in bounded chunks so no full copy of the file is made.
+    newlines = 0
+    chars = 0
+    for chunk_start in range(start, end, SPAN_CHUNK):
+        chunk = view[chunk_start : min(chunk_start + SPAN_CHUNK, end)]
+        newlines += chunk.count(b"\n")
+        chars += len(chunk) - len(chunk.translate(None, NON_CONTINUATION_BYTES))
+        if crlf:
+            chars -= chunk.count(b"\r")
+    return (newlines, chars)
+
+
+def is_utf8(view: mmap.mmap) -> bool:
+    decoder = codecs.getincrementaldecoder("utf8")()
+    try:
+        for chunk_start in range(0, len(view), SPAN_CHUNK):
+            decoder.decode(view[chunk_start : chunk_start + SPAN_CHUNK])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def scan_file_symbols(
+    patterns: SymbolPatterns, file: Path
+) -> dict[str, MatchTable]:
+    # Map the file and let the bytes regex find candidate lines; offsets and
+    # columns are still character positions in the newline-translated text,
+    # exactly as the decoded scan reports them.
+    try:
+        with file.open("rb") as handle:
+            if file.stat().st_size == 0:
+                return {}
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                return scan_mapped_symbols(patterns, file, view)
+    except (OSError, ValueError):
+        return scan_text_symbols(patterns.text, file)
+
+
+def scan_mapped_symbols(
+    patterns: SymbolPatterns, file: Path, view: mmap.mmap
+) -> dict[str, MatchTable]:
+    hit = patterns.raw.search(view)
+    if hit is None:
+        return {}
+    if LONE_CR_RE.search(view) is not None:
+        return scan_text_symbols(patterns.text, file)
+    if NON_ASCII_RE.search(view) is not None and not is_utf8(view):
+        return {}
+    crlf = view.find(b"\r") != -1
+
+    refs: dict[str, MatchTable] = {}
+    line = 1
+    cursor = 0
+    char_base = 0
+    while hit is not None:
+        newline = view.rfind(b"\n", cursor, hit.start())
+        line_start = cursor if newline == -1 else newline + 1
+        skipped_lines, skipped_chars = span_stats(view, cursor, line_start, crlf)
+        line += skipped_lines
+        char_base += skipped_chars
+        line_end = view.find(b"\n", hit.start())
+        line_end = len(view) if line_end == -1 else line_end + 1
+        text = view[line_start:line_end].decode("utf8")
+        if crlf:
+            text = text.replace("\r\n", "\n")
+        for match in patterns.text.finditer(text):
+            refs.setdefault(match.group(), MatchTable()).add(
+                file, line, match.start() + 1, char_base + match.start()
             )
+        line += 1
+        char_base += len(text)
+        cursor = line_end
+        hit = patterns.raw.search(view, cursor)
+    return refs
+
+
+def scan_text_symbols(
+    pattern: re.Pattern[str], file: Path
+) -> dict[str, MatchTable]:
+    try:
+        content = file.read_text(encoding="utf8")
+    except Exception:
+        return {}
+    refs: dict[str, MatchTable] = {}
+    lines = LineIndex(content)
+    for match in pattern.finditer(content):
+        line, column = offset_to_line_col(lines, match.start())
+        refs.setdefault(match.group(), MatchTable()).add(
+            file, line, column, match.start()
+        )
+    return refs
+
+
+def collect_matches_multi(
+    symbols: list[str], files: list[Path], jobs: int = 1
+) -> dict[str, MatchTable]:
+    # One read and one regex pass per file for every requested symbol; each
+    # symbol's matches come back in the same order iter_matches yields.
+    refs = {symbol: MatchTable() for symbol in symbols}
+    if not symbols:
+        return refs
+    scan = partial(scan_file_symbols, symbols_pattern(symbols))
+    for file_refs in ordered_imap(scan, files, jobs):
+        for symbol, matches in file_refs.items():
+            refs[symbol].merge(matches)
     return refs
 
 
+def iter_matches(symbol: str, files: list[Path], jobs: int = 1) -> Iterator[MatchRow]:
+    # Matches of one symbol, yielded file by file as the scan proceeds.
+    scan = partial(scan_file_symbols, symbols_pattern([symbol]))
+    for file_refs in ordered_imap(scan, files, jobs):
+        matches = file_refs.get(symbol)
+        if matches is not None:
+            yield from matches.rows()
+
+
+def scan_file_syntax(
+    language: str, symbols: tuple[str, ...], file: Path
+) -> dict[str, MatchTable]:
+    # Direct-scan counterpart of the syntax index: one parse per file.
+    try:
+        content = decode_source(file.read_bytes())
+    except (OSError, UnicodeDecodeError):
+        return {}
+    postings = syntax_identifiers(language, content)
+    refs: dict[str, MatchTable] = {}
+    for symbol in symbols:
+        flat = postings.get(symbol)
+        if flat:
+            refs[symbol] = add_postings(MatchTable(), file, flat, SYNTAX_STRIDE)
+    return refs
+
+
+def collect_syntax_matches(
+    language: str, symbols: list[str], files: list[Path], jobs: int = 1
+) -> dict[str, MatchTable]:
+    refs = {symbol: MatchTable() for symbol in symbols}
+    if not symbols:
+        return refs
+    scan = partial(scan_file_syntax, language, tuple(symbols))
+    for file_refs in ordered_imap(scan, files, jobs):
+        for symbol, matches in file_refs.items():
+            refs[symbol].merge(matches)
+    return refs
+
+
+def iter_syntax_matches(
+    language: str, symbol: str, files: list[Path], jobs: int = 1
+) -> Iterator[MatchRow]:
+    scan = partial(scan_file_syntax, language, (symbol,))
+    for file_refs in ordered_imap(scan, files, jobs):
+        matches = file_refs.get(symbol)
+        if matches is not None:
+            yield from matches.rows()
+
+
+def index_words(raw: bytes) -> set[bytes]:
+    # Prefilter words: ASCII identifier runs of the raw bytes, a superset of
+    # the spans `\b{symbol}\b` can match. The direct matcher never reports
+    # anything in files that are not valid UTF-8.
+    raw.decode("utf8")
+    return set(WORD_BYTES_RE.findall(raw))
+
+
+def open_syntax_index(language: str, repo_root: Path) -> SymbolIndexStore:
+    store = SymbolIndexStore(
+        repo_root,
+        f"syntax-{language}",
+        partial(syntax_identifiers, language),
+        scanner_version(language),
+    )
+    store.load()
+    return store
+
+
+class IndexSession:
+    # Source of matches for one repo root. The CLI uses a session per run;
+    # batches and the daemon keep one alive so the index shards (or, with
+    # --noIndex, the file walk) are built once and reused until invalidated.
+    # Walking and regex indexing belong to the engine shared with the Python
+    # backend; the session adds the syntax indexes and word filters.
+    def __init__(
+        self,
+        repo_root: Path,
+        refresh_mode: str,
+        jobs: int,
+        use_index: bool = True,
+        file_source: str = SOURCE_SCAN,
+        use_prefilter: bool = True,
+        parser: str = PARSER_REGEX,
+    ) -> None:
+        self.repo_root = repo_root
+        self.refresh_mode = refresh_mode
+        self.jobs = jobs
+        self.use_index = use_index
+        self.file_source = file_source
+        self.use_prefilter = use_prefilter
+        self.parser = parser
+        self.engine = SemanticEngine(repo_root, refresh_mode, jobs, file_source)
+        self.stores: dict[str, SymbolIndexStore] = {}
+        self.filters: dict[str, WordFilterStore] = {}
+        self.fresh: set[str] = set()
+        self.filtered: set[str] = set()
+        self.prefetched: dict[tuple[str, str], MatchTable] = {}
+
+    def invalidate(self) -> None:
+        # The tree may have changed: re-check it on the next lookup.
+        self.engine.invalidate()
+        self.fresh.clear()
+        self.filtered.clear()
+        self.prefetched.clear()
+
+    def structural(self, language: str) -> bool:
+        # tree-sitter was asked for and its grammar for the language loads.
+        return self.parser == PARSER_TREE_SITTER and load_parser(language) is not None
+
+    def backend(self, language: str) -> str:
+        return SYNTAX_BACKEND if self.structural(language) else SYMBOL_BACKEND
+
+    def syntax_store(self, language: str) -> SymbolIndexStore:
+        store = self.stores.get(language)
+        if store is None:
+            store = open_syntax_index(language, self.repo_root)
+            self.stores[language] = store
+        if language not in self.fresh:
+            self.engine.refresh_store(store, language)
+            self.fresh.add(language)
+        return store
+
+    def postings(self, language: str, symbol: str) -> list[tuple[Path, list[int]]]:
+        # A symbol's indexed postings, per file, from the index in use.
+        if self.structural(language):
+            return self.syntax_store(language).lookup(symbol)
+        return self.engine.lookup(language, symbol)
+
+    def indexed_files(self, language: str) -> int:
+        if self.structural(language):
+            return len(self.syntax_store(language).files)
+        return len(self.engine.shard(language).files)
+
+    def poll(self, walk: bool) -> Callable[[], None] | None:
+        # Daemon refresh: plans outside the request lock, applies under it.
+        stores = self.stores.copy()
+        stale = any(language not in self.fresh for language in stores)
+        extra = [(store, language) for language, store in stores.items()]
+        apply = self.engine.poll(extra, walk or stale)
+        if apply is None and not stale:
+            return None
+
+        def settle() -> None:
+            if apply is not None:
+                apply()
+            self.fresh.update(stores)
+
+        return settle
+
+    def language_files(self, language: str) -> list[Path]:
+        return self.engine.files(language)
+
+    def candidate_files(self, language: str, symbols: list[str]) -> list[Path]:
+        # Direct scans only read files whose word filter may hold a symbol.
+        files = self.language_files(language)
+        if not self.use_prefilter:
+            return files
+        store = self.filters.get(language)
+        if store is None:
+            store = WordFilterStore(
+                self.repo_root, f"words-{language}", index_words, PREFILTER_VERSION
+            )
+            store.load()
+            self.filters[language] = store
+        if language not in self.filtered:
+            store.refresh(files, self.jobs)
+            store.save()
+            self.filtered.add(language)
+        return store.candidates(symbols)
+
+    def prefetch(self, language: str, symbols: list[str]) -> None:
+        # Without an index, scan the tree once for every symbol a batch will
+        # ask about; indexed lookups are already one dictionary probe each.
+        if self.use_index or not symbols:
+            return
+        files = self.candidate_files(language, symbols)
+        if self.structural(language):
+            matches = collect_syntax_matches(language, symbols, files, self.jobs)
+        else:
+            matches = collect_matches_multi(symbols, files, self.jobs)
+        for symbol, refs in matches.items():
+            self.prefetched[(language, symbol)] = refs
+
+    def find_matches(self, language: str, symbol: str) -> MatchTable:
+        self.require_sources(language)
+        if self.use_index:
+            return lookup_matches(
+                self.postings(language, symbol), self.posting_stride(language)
+            )
+        prefetched = self.prefetched.get((language, symbol))
+        if prefetched is not None:
+            return prefetched
+        files = self.candidate_files(language, [symbol])
+        if self.structural(language):
+            return collect_syntax_matches(language, [symbol], files, self.jobs)[symbol]
+        return collect_matches_multi([symbol], files, self.jobs)[symbol]
+
+    def stream_matches(self, language: str, symbol: str) -> Iterator[MatchRow]:
+        # find_matches row by row; a direct scan yields each file's matches
+        # as soon as that file has been read.
+        self.require_sources(language)
+        if self.use_index:
+            return iter_lookup_matches(
+                self.postings(language, symbol), self.posting_stride(language)
+            )
+        prefetched = self.prefetched.get((language, symbol))
+        if prefetched is not None:
+            return prefetched.rows()
+        files = self.candidate_files(language, [symbol])
+        if self.structural(language):
+            return iter_syntax_matches(language, symbol, files, self.jobs)
+        return iter_matches(symbol, files, self.jobs)
+
+    def posting_stride(self, language: str) -> int:
+        return SYNTAX_STRIDE if self.structural(language) else INDEX_STRIDE
+
+    def require_sources(self, language: str) -> None:
+        if self.use_index:
+            source_count = self.indexed_files(language)
+        else:
+            source_count = len(self.language_files(language))
+        if source_count == 0:
+            raise ValueError(
+                f"no source files found for language '{language}' "
+                f"under {self.repo_root}"
+            )
+
+
+def add_postings(
+    refs: MatchTable, file: Path, flat: list[int], stride: int
+) -> MatchTable:
+    # Regex postings are [offset, line, column] triples; syntax postings add
+    # a declaration bit, carried as the row flag.
+    declarations = stride == SYNTAX_STRIDE
+    for idx in range(0, len(flat), stride):
+        refs.add(
+            file,
+            flat[idx + 1],
+            flat[idx + 2],
+            flat[idx],
+            declarations and flat[idx + 3] == 1,
+        )
+    return refs
+
+
+def lookup_matches(
+    hits: list[tuple[Path, list[int]]], stride: int = INDEX_STRIDE
+) -> MatchTable:
+    refs = MatchTable()
+    for file, flat in hits:
+        add_postings(refs, file, flat, stride)
+    return refs
+
+
+def iter_lookup_matches(
+    hits: list[tuple[Path, list[int]]], stride: int = INDEX_STRIDE
+) -> Iterator[MatchRow]:
+    declarations = stride == SYNTAX_STRIDE
+    for file, flat in hits:
+        for idx in range(0, len(flat), stride):
+            yield MatchRow(
+                file,
+                flat[idx + 1],
+                flat[idx + 2],
+                flat[idx],
+                declarations and flat[idx + 3] == 1,
+            )
+
+
 def rewrite_files(
-    refs: list[MatchRef], replacement: str, dry_run: bool
+    refs: MatchTable, symbol: str, replacement: str, dry_run: bool
 ) -> tuple[int, int]:
-    by_file: dict[Path, list[MatchRef]] = {}
-    for ref in refs:
-        by_file.setdefault(ref.file, []).append(ref)
-
+    # A file's matches are contiguous in the table: one group per file.
     touched_files = 0
     touched_locations = 0
-    for file, file_refs in by_file.items():
+    rewritten = RewrittenFiles()
+    for file, file_refs in groupby(refs.rows(), key=lambda ref: ref.file):
+        spans = [(ref.offset, ref.offset + len(symbol)) for ref in file_refs]
         touched_files += 1
-        touched_locations += len(file_refs)
-        if dry_run:
+        touched_locations += len(spans)
+        if dry_run or not rewritten.add(file):
             continue
         content = file.read_text(encoding="utf8")
-        updated = content
-        for ref in sorted(file_refs, key=lambda item: item.start, reverse=True):
-            updated = updated[: ref.start] + replacement + updated[ref.end :]
-        file.write_text(updated, encoding="utf8")
+        write_text_atomic(file, splice_spans(content, spans, replacement))
     return (touched_files, touched_locations)
 
 
@@ -187,12 +670,27 @@ def build_reference_payload(
     target_file: Path,
     line: int,
     column: int,
-    refs: list[MatchRef],
+    refs: MatchTable,
     max_results: int,
     repo_root: Path,
+    declarations: bool = False,
 ) -> dict:
-    emitted = refs[:max_results]
-    touched_files = {str(item.file.resolve()) for item in refs}
+    # declarations: the syntax index knows which matches declare the symbol.
+    paths = ResolvedPaths()
+    touched_files = {paths[file] for file in refs.files}
+    references = [
+        reference_fields(item, declarations, {"file": paths[item.file]})
+        for item in islice(refs.rows(), max_results)
+    ]
+    summary = {
+        "totalReferences": len(refs),
+        "emittedReferences": len(references),
+        "truncated": len(refs) > len(references),
+        "touchedFiles": len(touched_files),
+        "repoRoot": str(repo_root.resolve()),
+    }
+    if declarations:
+        summary["declarations"] = refs.flagged()
     return {
         "operation": operation,
         "mode": "analysis",
@@ -203,29 +701,25 @@ def build_reference_payload(
             "line": line,
             "column": column,
         },
-        "summary": {
-            "totalReferences": len(refs),
-            "emittedReferences": len(emitted),
-            "truncated": len(refs) > len(emitted),
-            "touchedFiles": len(touched_files),
-            "repoRoot": str(repo_root.resolve()),
-        },
-        "references": [
-            {
-                "file": str(item.file.resolve()),
-                "line": item.line,
-                "column": item.column,
-            }
-            for item in emitted
-        ],
+        "summary": summary,
+        "references": references,
     }
 
 
-def build_safe_delete_payload(base_payload: dict, refs: list[MatchRef]) -> dict:
-    safe_to_delete = len(refs) <= 1
-    confidence = "high" if safe_to_delete else ("medium" if len(refs) <= 3 else "low")
-    payload = dict(base_payload)
-    payload["candidate"] = {
+def reference_fields(ref: MatchRow, declarations: bool, fields: dict) -> dict:
+    fields["line"] = ref.line
+    fields["column"] = ref.column
+    if declarations:
+        fields["declaration"] = ref.flag
+    return fields
+
+
+def safe_delete_candidate(reference_count: int) -> dict:
+    safe_to_delete = reference_count <= 1
+    confidence = (
+        "high" if safe_to_delete else ("medium" if reference_count <= 3 else "low")
+    )
+    return {
         "safeToDelete": safe_to_delete,
         "confidence": confidence,
         "rationale": (
@@ -234,45 +728,110 @@ def build_safe_delete_payload(base_payload: dict, refs: list[MatchRef]) -> dict:
             else "symbol has multiple references in language index"
         ),
     }
+
+
+def build_safe_delete_payload(base_payload: dict, refs: MatchTable) -> dict:
+    payload = dict(base_payload)
+    payload["candidate"] = safe_delete_candidate(len(refs))
     return payload
 
 
-def main() -> None:
-    args = parse_args()
-    if args.operation == OP_RENAME and not args.newName:
-        raise ValueError("rename requires --newName")
-    if args.newName:
-        validate_identifier(args.newName)
-    if args.maxResults <= 0:
-        raise ValueError("maxResults must be a positive integer")
+def iter_definitions(store: SymbolIndexStore) -> Iterator[Definition]:
+    # Every top-level definition in a regex shard, in one pass over its keys.
+    for key, bucket in store.postings.items():
+        if not key.startswith(DEFINITION_PREFIX):
+            continue
+        symbol = key[len(DEFINITION_PREFIX) :]
+        for rel, flat in bucket.items():
+            for idx in range(0, len(flat), INDEX_STRIDE):
+                yield Definition(symbol, rel, flat[idx + 1], flat[idx + 2])
+
+
+def build_safe_delete_report(args: argparse.Namespace, session: IndexSession) -> dict:
+    # Definitions come from the regex shard. References are the name's other
+    # occurrences: with the syntax index, those not flagged as declarations;
+    # otherwise every indexed occurrence less the definition sites.
+    if not session.use_index:
+        raise ValueError(
+            f"{OP_SAFE_DELETE_REPORT} reads the symbol index; drop --noIndex"
+        )
+    language = args.language
+    session.require_sources(language)
+    shard = session.engine.shard(language)
+    definitions = list(iter_definitions(shard))
+    if session.structural(language):
+        postings = session.syntax_store(language).postings
+
+        def references(symbol: str) -> int:
+            bucket = postings.get(symbol, {})
+            declared = sum(sum(flat[3::SYNTAX_STRIDE]) for flat in bucket.values())
+            return occurrence_count(bucket, SYNTAX_STRIDE) - declared
+
+    else:
+
+        def references(symbol: str) -> int:
+            return occurrence_count(
+                shard.postings.get(symbol, {}), INDEX_STRIDE
+            ) - occurrence_count(
+                shard.postings.get(DEFINITION_PREFIX + symbol, {}), INDEX_STRIDE
+            )
+
+    ranked = rank_candidates(
+        definitions, references, LANGUAGES[language].entry_points
+    )
+    return build_report_payload(
+        session.backend(language),
+        language,
+        len(definitions),
+        ranked,
+        args.maxResults,
+        session.repo_root,
+    )
+
 
+def request_symbol(args: argparse.Namespace) -> str:
     target = Path(args.file)
     if not target.exists():
         raise ValueError(f"file not found: {target}")
+    content = target.read_text(encoding="utf8")
+    offset = line_col_to_offset(LineIndex(content), args.line, args.column)
+    return resolve_symbol_at(content, offset)
 
-    repo_root = Path(args.targetRepoRoot)
-    if not repo_root.exists():
-        raise ValueError(f"targetRepoRoot does not exist: {repo_root}")
 
-    content = target.read_text(encoding="utf8")
-    offset = line_col_to_offset(content, args.line, args.column)
-    symbol = resolve_symbol_at(content, offset)
+def check_request(args: argparse.Namespace) -> None:
+    if args.language is None:
+        raise ValueError("--language is required")
+    # The report covers the whole repo rather than one position.
+    positional = args.operation != OP_SAFE_DELETE_REPORT
+    if positional and (args.file is None or args.line is None or args.column is None):
+        raise ValueError("--file, --line and --column are required")
+    if args.operation == OP_RENAME and not args.newName:
+        raise ValueError("rename requires --newName")
+    if args.newName:
+        validate_identifier(args.newName)
+    if args.maxResults <= 0:
+        raise ValueError("maxResults must be a positive integer")
 
-    files = iter_language_files(repo_root, args.language)
-    if len(files) == 0:
-        raise ValueError(
-            f"no source files found for language '{args.language}' under {repo_root}"
-        )
 
-    refs = collect_matches(symbol, files)
+def run_operation(args: argparse.Namespace, session: IndexSession) -> dict:
+    check_request(args)
+    if args.operation == OP_SAFE_DELETE_REPORT:
+        return build_safe_delete_report(args, session)
+    target = Path(args.file)
+    symbol = request_symbol(args)
+    refs = session.find_matches(args.language, symbol)
     if len(refs) == 0:
         raise ValueError("no references found for selected symbol")
 
-    backend = "symbol-index"
+    backend = session.backend(args.language)
 
     if args.operation == OP_RENAME:
-        touched_files, touched_locations = rewrite_files(refs, args.newName, args.dryRun)
-        payload = {
+        touched_files, touched_locations = rewrite_files(
+            refs, symbol, args.newName, args.dryRun
+        )
+        if not args.dryRun:
+            session.invalidate()
+        return {
             "operation": OP_RENAME,
             "mode": "dry-run" if args.dryRun else "apply",
             "backend": backend,
@@ -287,8 +846,6 @@ def main() -> None:
             "touchedFiles": touched_files,
             "touchedLocations": touched_locations,
         }
-        print(json.dumps(payload, indent=2))
-        return
 
     reference_payload = build_reference_payload(
         args.operation,
@@ -299,14 +856,146 @@ def main() -> None:
         args.column,
         refs,
         args.maxResults,
-        repo_root,
+        session.repo_root,
+        session.structural(args.language),
     )
     if args.operation == OP_REFERENCE:
-        print(json.dumps(reference_payload, indent=2))
+        return reference_payload
+    return build_safe_delete_payload(reference_payload, refs)
+
+
+def stream_operation(
+    args: argparse.Namespace, session: IndexSession, out: TextIO
+) -> None:
+    # --stream: same data as run_operation, written as NDJSON records while
+    # references are still being found.
+    if args.operation in (OP_RENAME, OP_SAFE_DELETE_REPORT):
+        write_record(out, RECORD_RESULT, run_operation(args, session))
         return
+    check_request(args)
+    target = Path(args.file)
+    symbol = request_symbol(args)
+    first, refs = first_or_none(session.stream_matches(args.language, symbol))
+    if first is None:
+        raise ValueError("no references found for selected symbol")
 
-    safe_payload = build_safe_delete_payload(reference_payload, refs)
-    print(json.dumps(safe_payload, indent=2))
+    declarations = session.structural(args.language)
+    stream = ReferenceStream(out, args.maxResults)
+    stream.header(
+        {
+            "operation": args.operation,
+            "mode": "analysis",
+            "backend": session.backend(args.language),
+            "symbol": symbol,
+            "from": {
+                "file": str(target.resolve()),
+                "line": args.line,
+                "column": args.column,
+            },
+        }
+    )
+    declared = 0
+    for ref in refs:
+        stream.reference(ref.file, reference_fields(ref, declarations, {}))
+        declared += ref.flag
+    summary: dict = {"repoRoot": str(session.repo_root.resolve())}
+    if declarations:
+        summary["declarations"] = declared
+    if args.operation == OP_SAFE_DELETE:
+        summary["candidate"] = safe_delete_candidate(stream.total)
+    stream.summary(summary)
+
+
+def serve(args: argparse.Namespace, session: IndexSession) -> None:
+    if not session.use_index:
+        raise ValueError("--serve keeps the symbol index warm; drop --noIndex")
+    if args.language is not None:
+        session.indexed_files(args.language)
+
+    def handle(method: str, params: dict) -> dict:
+        request = semantic_daemon.request_args(
+            build_parser, method, params, session.repo_root
+        )
+        return run_operation(request, session)
+
+    semantic_daemon.serve(
+        session.repo_root,
+        DAEMON_BACKEND,
+        set(OPERATIONS),
+        handle,
+        session.poll,
+        args.watchInterval,
+        {
+            "indexRefresh": args.indexRefresh,
+            "jobs": args.jobs,
+            "fileSource": args.fileSource,
+            "parser": args.parser,
+        },
+    )
+
+
+def run_batch_requests(args: argparse.Namespace, session: IndexSession) -> None:
+    # Requests without a "language" key use --language from the command line.
+    def prepare(requests: list[argparse.Namespace]) -> None:
+        wanted: dict[str, set[str]] = {}
+        for request in requests:
+            if request.language is None:
+                request.language = args.language
+            if request.language is None or request.file is None:
+                continue
+            if request.line is None or request.column is None:
+                continue
+            try:
+                symbol = request_symbol(request)
+            except Exception:  # noqa: BLE001
+                # Reported when the request itself runs.
+                continue
+            wanted.setdefault(request.language, set()).add(symbol)
+        for language, symbols in sorted(wanted.items()):
+            session.prefetch(language, sorted(symbols))
+
+    failures = run_batch(
+        args.batch,
+        build_parser,
+        session.repo_root,
+        lambda request: run_operation(request, session),
+        sys.stdout,
+        prepare,
+    )
+    if failures:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    args = parse_args()
+    if args.jobs <= 0:
+        raise ValueError("jobs must be a positive integer")
+    if args.stream and (args.serve or args.batch is not None):
+        raise ValueError("--stream applies to single requests, not --batch or --serve")
+
+    repo_root = Path(args.targetRepoRoot)
+    if not repo_root.exists():
+        raise ValueError(f"targetRepoRoot does not exist: {repo_root}")
+
+    session = IndexSession(
+        repo_root,
+        args.indexRefresh,
+        args.jobs,
+        use_index=not args.noIndex,
+        file_source=args.fileSource,
+        use_prefilter=not args.noPrefilter,
+        parser=args.parser,
+    )
+    if args.serve:
+        serve(args, session)
+        return
+    if args.batch is not None:
+        run_batch_requests(args, session)
+        return
+    if args.stream:
+        stream_operation(args, session, sys.stdout)
+        return
+    print(json.dumps(run_operation(args, session), indent=2))
 
 
 if __name__ == "__main__":
@@ -3,52 +3,165 @@
 from __future__ import annotations
 
 import argparse
-import io
 import json
 import keyword
-import tokenize
+import sys
 from dataclasses import dataclass
+from functools import partial
+from itertools import groupby, islice
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, TextIO
+
+from common import semantic_daemon
+from common.semantic_batch import run_batch
+from common.semantic_engine import (
+    LANGUAGES,
+    PYTHON_NAMES_VERSION,
+    REFRESH_GIT,
+    REFRESH_STAT,
+    SemanticEngine,
+    index_name_tokens,
+)
+from common.semantic_matches import MatchRow, MatchTable
+from common.semantic_namecache import NameTable, NameTableCache
+from common.semantic_parallel import ordered_imap
+from common.semantic_prefilter import WordFilterStore
+from common.semantic_pyscope import (
+    BINDING_MODULE,
+    DEF_PREFIX,
+    ORIGIN_MODULE,
+    ModuleScopes,
+    Occurrence,
+    Scope,
+    index_module_bindings,
+    related_files,
+)
+from common.semantic_report import (
+    OP_SAFE_DELETE_REPORT,
+    Definition,
+    build_report_payload,
+    occurrence_count,
+    rank_candidates,
+)
+from common.semantic_store import SymbolIndexStore, decode_source
+from common.semantic_stream import (
+    RECORD_RESULT,
+    ReferenceStream,
+    ResolvedPaths,
+    first_or_none,
+    write_record,
+)
+from common.semantic_text import (
+    LineIndex,
+    RewrittenFiles,
+    splice_spans,
+    write_text_atomic,
+)
+from common.semantic_walk import SOURCE_GIT, SOURCE_SCAN
 
 
 Operation = str
 
+OPERATIONS = [
+    "rename",
+    "reference-map",
+    "safe-delete-candidates",
+    OP_SAFE_DELETE_REPORT,
+]
+DAEMON_BACKEND = "semantic-python"
 
-@dataclass(frozen=True)
-class TokenEdit:
-    start_line: int
-    start_col: int
-    end_line: int
-    end_col: int
+IMPORTS_SCANNER_VERSION = "python-imports/1"
+
+SCOPE_LOCAL = "local"
+SCOPE_MODULE = "module"
+SCOPE_UNRESOLVED = "unresolved"
 
 
 @dataclass(frozen=True)
-class TokenLocation:
-    file: Path
+class TokenEdit:
     start_line: int
     start_col: int
     end_line: int
     end_col: int
-    is_attribute: bool
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(
+def build_parser(
+    parser_class: type[argparse.ArgumentParser] = argparse.ArgumentParser,
+) -> argparse.ArgumentParser:
+    parser = parser_class(
         description="Deterministic Python semantic backend for SBK."
     )
     parser.add_argument(
         "--operation",
         default="rename",
-        choices=["rename", "reference-map", "safe-delete-candidates"],
+        choices=OPERATIONS,
     )
-    parser.add_argument("--file", required=True)
-    parser.add_argument("--line", required=True, type=int)
-    parser.add_argument("--column", required=True, type=int)
+    parser.add_argument("--file")
+    parser.add_argument("--line", type=int)
+    parser.add_argument("--column", type=int)
     parser.add_argument("--newName")
     parser.add_argument("--targetRepoRoot", default=".")
     parser.add_argument("--dryRun", action="store_true")
     parser.add_argument("--maxResults", default=200, type=int)
-    return parser.parse_args()
+    parser.add_argument(
+        "--noIndex",
+        action="store_true",
+        help="tokenize files directly instead of using the persistent token index",
+    )
+    parser.add_argument(
+        "--noPrefilter",
+        action="store_true",
+        help="with --noIndex, read every file rather than check per-file word filters",
+    )
+    parser.add_argument(
+        "--indexRefresh",
+        choices=[REFRESH_STAT, REFRESH_GIT],
+        default=REFRESH_STAT,
+        help="stat: re-check every file; git: re-check only files git reports changed",
+    )
+    parser.add_argument(
+        "--jobs",
+        default=1,
+        type=int,
+        help="worker processes for tokenizing (output is identical to --jobs 1)",
+    )
+    parser.add_argument(
+        "--noScope",
+        action="store_true",
+        help="match every same-named token instead of resolving the binding's scope",
+    )
+    parser.add_argument(
+        "--fileSource",
+        choices=[SOURCE_SCAN, SOURCE_GIT],
+        default=SOURCE_SCAN,
+        help="scan: walk the tree, honoring .gitignore; git: use git ls-files",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write NDJSON records, emitting references as they are found",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="PATH",
+        help="answer JSONL requests from PATH ('-' for stdin), one result line each",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="run as a resident daemon answering JSON-RPC requests on a Unix socket",
+    )
+    parser.add_argument(
+        "--watchInterval",
+        default=2.0,
+        type=float,
+        help="seconds between background index refreshes in --serve mode",
+    )
+    return parser
+
+
+def parse_args() -> argparse.Namespace:
+    return build_parser().parse_args()
 
 
 def validate_new_name(new_name: str) -> None:
@@ -58,169 +171,354 @@ def validate_new_name(new_name: str) -> None:
         raise ValueError(f"newName '{new_name}' cannot be a Python keyword")
 
 
-def line_col_to_offset(content: str, line: int, col: int) -> int:
+def line_col_to_offset(lines: LineIndex, line: int, col: int) -> int:
     if line <= 0 or col < 0:
         raise ValueError("line/column must be positive values")
-    lines = content.splitlines(keepends=True)
-    if line > len(lines):
-        raise ValueError(f"line {line} exceeds file line count {len(lines)}")
-    line_text = lines[line - 1]
-    if col > len(line_text):
-        raise ValueError(f"column {col} exceeds line length {len(line_text)}")
-    return sum(len(lines[i]) for i in range(line - 1)) + col
+    line_count = lines.line_count()
+    if line > line_count:
+        raise ValueError(f"line {line} exceeds file line count {line_count}")
+    line_length = lines.line_length(line)
+    if col > line_length:
+        raise ValueError(f"column {col} exceeds line length {line_length}")
+    return lines.line_start(line) + col
 
 
-def offset_to_line_col(content: str, offset: int) -> tuple[int, int]:
+def offset_to_line_col(lines: LineIndex, offset: int) -> tuple[int, int]:
     if offset < 0:
         return (1, 1)
-    line = 1
-    col = 1
-    limit = min(offset, len(content))
-    for idx in range(limit):
-        if content[idx] == "\n":
-            line += 1
-            col = 1
-        else:
-            col += 1
-    return (line, col)
-
-
-def tokenize_file(path: Path) -> list[tokenize.TokenInfo]:
-    content = path.read_text(encoding="utf8")
-    return list(tokenize.generate_tokens(io.StringIO(content).readline))
-
-
-def pick_symbol(tokens: list[tokenize.TokenInfo], line: int, column_1_based: int) -> str:
-    column = max(0, column_1_based - 1)
-    for token in tokens:
-        if token.type != tokenize.NAME:
-            continue
-        start_line, start_col = token.start
-        end_line, end_col = token.end
-        if start_line != line:
-            continue
-        if start_col <= column < end_col:
-            return token.string
-    raise ValueError(
-        "unable to resolve Python symbol at target location; place cursor on an identifier"
+    return lines.line_col(offset)
+
+
+def pick_symbol(
+    table: NameTable, line: int, column_1_based: int
+) -> tuple[str, int, bool]:
+    # (name, start col, is_attribute) of the NAME token under the cursor.
+    hit = table.at(line, max(0, column_1_based - 1))
+    if hit is None:
+        raise ValueError(
+            "unable to resolve Python symbol at target location; "
+            "place cursor on an identifier"
+        )
+    return hit
+
+
+def name_cache(repo_root: Path) -> NameTableCache:
+    # NAME-token tables keyed by content hash: repeat scans of unchanged
+    # content skip Python's tokenizer, with or without the token index.
+    return NameTableCache(
+        repo_root, "python-names", index_name_tokens, PYTHON_NAMES_VERSION
     )
 
 
-def is_attribute_leaf(tokens: list[tokenize.TokenInfo], index: int) -> bool:
-    probe = index - 1
-    while probe >= 0:
-        candidate = tokens[probe]
-        if candidate.type in (
-            tokenize.INDENT,
-            tokenize.DEDENT,
-            tokenize.NL,
-            tokenize.NEWLINE,
-            tokenize.COMMENT,
-            tokenize.ENCODING,
-            tokenize.ENDMARKER,
-        ):
-            probe -= 1
-            continue
-        return candidate.string == "."
-    return False
+def read_name_table(cache: NameTableCache, file: Path) -> tuple[str, NameTable] | None:
+    try:
+        raw = file.read_bytes()
+    except OSError:
+        return None
+    return cache.table(raw)
 
 
-def collect_locations(
-    tokens: list[tokenize.TokenInfo], symbol: str, file: Path
-) -> list[TokenLocation]:
-    locations: list[TokenLocation] = []
-    for index, token in enumerate(tokens):
-        if token.type != tokenize.NAME or token.string != symbol:
-            continue
-        locations.append(
-            TokenLocation(
-                file=file,
-                start_line=token.start[0],
-                start_col=token.start[1],
-                end_line=token.end[0],
-                end_col=token.end[1],
-                is_attribute=is_attribute_leaf(tokens, index),
-            )
-        )
-    return locations
+def scan_file_locations(
+    cache: NameTableCache, symbol: str, file: Path
+) -> tuple[str | None, MatchTable]:
+    # (content digest, locations); the digest is None for unreadable files.
+    entry = read_name_table(cache, file)
+    if entry is None:
+        return (None, MatchTable())
+    digest, table = entry
+    return (digest, occurrence_table(file, table.occurrences(symbol)))
 
 
-def iter_python_files(root: Path) -> list[Path]:
-    ignore_dirs = {
-        ".git",
-        "node_modules",
-        ".venv",
-        ".mypy_cache",
-        ".pytest_cache",
-        ".metrics",
-        ".trellis",
-        ".codex",
-        ".agents",
-        ".claude",
-        "dist",
-        "build",
-        "target",
-    }
-    files: list[Path] = []
-    for candidate in root.rglob("*.py"):
-        if any(part in ignore_dirs for part in candidate.parts):
-            continue
-        files.append(candidate)
-    files.sort(key=lambda item: str(item))
-    return files
+def iter_project_locations(
+    files: list[Path],
+    symbol: str,
+    cache: NameTableCache,
+    jobs: int = 1,
+    prune: bool = False,
+) -> Iterator[MatchRow]:
+    # Locations file by file as the scan proceeds. With prune (files is the
+    # whole tree), cached tables for content that no longer exists are
+    # dropped once the scan completes.
+    digests: list[str] = []
+    scan = partial(scan_file_locations, cache, symbol)
+    for digest, locations in ordered_imap(scan, files, jobs):
+        if digest is not None:
+            digests.append(digest)
+        yield from locations.rows()
+    if prune:
+        cache.retain(digests)
+
+
+def name_words(cache: NameTableCache, raw: bytes) -> list[bytes]:
+    # Prefilter words are exactly the file's NAME tokens, via the table cache.
+    return [name.encode("utf8") for name in cache.table(raw)[1].names]
+
+
+def occurrence_table(file: Path, occurrences: Iterable[Occurrence]) -> MatchTable:
+    # Python locations: `column` is the 0-based token column and `flag`
+    # marks attribute access.
+    locations = MatchTable()
+    for line, col, is_attribute in occurrences:
+        locations.add(file, line, col, flag=is_attribute)
+    return locations
 
 
-def collect_project_locations(root: Path, symbol: str) -> list[TokenLocation]:
-    all_locations: list[TokenLocation] = []
-    for file in iter_python_files(root):
+def scan_module_references(
+    cache: NameTableCache, symbol: str, file: Path
+) -> MatchTable:
+    # References to a module-level binding of `symbol` in one related file.
+    # Files ast cannot analyze keep every matching token, as before scoping.
+    try:
+        raw = file.read_bytes()
+    except OSError:
+        return MatchTable()
+    occurrences = cache.table(raw)[1].occurrences(symbol)
+    if not occurrences:
+        return MatchTable()
+    try:
+        scopes = ModuleScopes(decode_source(raw))
+        occurrences = scopes.references(occurrences, symbol, BINDING_MODULE)
+    except (SyntaxError, ValueError, RecursionError):
+        pass
+    return occurrence_table(file, occurrences)
+
+
+def open_import_graph(repo_root: Path) -> SymbolIndexStore:
+    # Per-file module bindings and imports only: small enough to keep even
+    # with --noIndex, where it spares tokenizing files that cannot see a
+    # module-level symbol.
+    store = SymbolIndexStore(
+        repo_root, "python-imports", index_module_bindings, IMPORTS_SCANNER_VERSION
+    )
+    store.load()
+    return store
+
+
+class IndexSession:
+    # Source of token locations for one repo root. The CLI uses a session per
+    # run; batches and the daemon keep one alive so the token index (or, with
+    # --noIndex, the file walk) is built once and reused until invalidated.
+    # Walking and NAME-token indexing belong to the engine shared with the
+    # Go/Java/Rust backend; the session adds the import graph and caches.
+    def __init__(
+        self,
+        repo_root: Path,
+        refresh_mode: str,
+        jobs: int,
+        use_index: bool = True,
+        file_source: str = SOURCE_SCAN,
+        use_prefilter: bool = True,
+    ) -> None:
+        self.repo_root = repo_root
+        self.refresh_mode = refresh_mode
+        self.jobs = jobs
+        self.use_index = use_index
+        self.file_source = file_source
+        self.use_prefilter = use_prefilter
+        self.engine = SemanticEngine(repo_root, refresh_mode, jobs, file_source)
+        self.imports: SymbolIndexStore | None = None
+        self.filter: WordFilterStore | None = None
+        self.names = name_cache(repo_root)
+        self.imports_fresh = False
+        self.filter_fresh = False
+
+    def invalidate(self) -> None:
+        # The tree may have changed: re-check it on the next lookup.
+        self.engine.invalidate()
+        self.imports_fresh = False
+        self.filter_fresh = False
+
+    def poll(self, walk: bool) -> Callable[[], None] | None:
+        # Daemon refresh: plans outside the request lock, applies under it.
+        extra = [] if self.imports is None else [(self.imports, "python")]
+        stale = bool(extra) and not self.imports_fresh
+        apply = self.engine.poll(extra, walk or stale)
+        if apply is None and not stale:
+            return None
+
+        def settle() -> None:
+            if apply is not None:
+                apply()
+            self.imports_fresh = self.imports is not None
+
+        return settle
+
+    def refresh_imports(self) -> None:
+        if self.imports is None:
+            self.imports = open_import_graph(self.repo_root)
+        self.engine.refresh_store(self.imports, "python")
+        self.imports_fresh = True
+
+    def prune_names(self) -> None:
+        # Once a request has added name tables, drop those for content the
+        # import graph (every Python file in the tree, by the same content
+        # sha1) no longer lists. Queries that never scan the whole tree, as
+        # in index mode, would otherwise keep every version they tokenized.
+        if not self.names.added:
+            return
+        if not self.imports_fresh:
+            self.refresh_imports()
+        graph = self.imports
+        assert graph is not None
+        self.names.retain(entry["sha1"] for entry in graph.files.values())
+
+    def candidate_files(self, symbol: str) -> list[Path]:
+        # Direct scans only read files whose word filter may hold the symbol.
+        files = self.engine.files("python")
+        if not self.use_prefilter:
+            return files
+        if self.filter is None:
+            self.filter = WordFilterStore(
+                self.repo_root,
+                "python-words",
+                partial(name_words, self.names),
+                PYTHON_NAMES_VERSION,
+            )
+            self.filter.load()
+        if not self.filter_fresh:
+            self.filter.refresh(files, self.jobs)
+            if self.filter.dirty:
+                self.names.retain(self.filter.digests())
+            self.filter.save()
+            self.filter_fresh = True
+        return self.filter.candidates([symbol])
+
+    def find_locations(self, symbol: str) -> Iterator[MatchRow]:
+        # Repo-wide matches, produced lazily in output order.
+        if not self.use_index:
+            return iter_project_locations(
+                self.candidate_files(symbol),
+                symbol,
+                self.names,
+                self.jobs,
+                prune=not self.use_prefilter,
+            )
+        return iter_lookup_locations(self.engine.lookup("python", symbol))
+
+    def relative(self, file: Path) -> str | None:
         try:
-            tokens = tokenize_file(file)
-        except Exception:
-            continue
-        all_locations.extend(collect_locations(tokens, symbol, file))
-    return all_locations
+            return file.resolve().relative_to(self.repo_root.resolve()).as_posix()
+        except ValueError:
+            return None
+
+    def module_files(
+        self, target_rel: str, symbol: str, origin: str | None
+    ) -> tuple[list[Path], int]:
+        # Files to tokenize for the module-level `symbol` bound in target_rel:
+        # the import graph's candidates, less those a token index that is
+        # already loaded and fresh shows never mention the name (loading it
+        # just for this costs more than tokenizing a few candidates). Also
+        # returns the candidate count.
+        if not self.imports_fresh:
+            self.refresh_imports()
+        graph = self.imports
+        assert graph is not None
+
+        def file_keys(rel: str) -> list[str]:
+            return graph.files[rel]["symbols"]
+
+        rels = related_files(graph.postings, file_keys, target_rel, symbol, origin)
+        rels.add(target_rel)
+        candidates = len(rels)
+        shard = self.engine.loaded("python")
+        if shard is not None:
+            hits = shard.postings.get(symbol, {})
+            rels = {rel for rel in rels if rel in hits or rel == target_rel}
+        return (sorted((self.repo_root / rel for rel in rels), key=str), candidates)
+
+
+def resolve_scope(
+    session: IndexSession,
+    target: Path,
+    content: str,
+    table: NameTable,
+    cursor: tuple[int, int],
+    symbol: str,
+) -> tuple[Iterable[MatchRow] | None, dict]:
+    # Narrows the matches to the binding under the cursor: a function-scope
+    # name resolves within its own file, a module-level name across the
+    # files its import graph connects. Attributes, class members, imported
+    # modules, builtins, parameters callers may pass by keyword and
+    # unparsable code return None and keep repo-wide token matching.
+    # Module-level matches are produced lazily.
+    unresolved: tuple[Iterable[MatchRow] | None, dict] = (
+        None,
+        {"kind": SCOPE_UNRESOLVED},
+    )
+    try:
+        scopes = ModuleScopes(content)
+    except (SyntaxError, ValueError, RecursionError):
+        return unresolved
+    line, col = cursor
+    if scopes.byte_position(line, col) in scopes.keyword_args:
+        return unresolved
+    binding = scopes.binding_at(line, col, symbol)
+    if isinstance(binding, Scope):
+        if scopes.keyword_parameter(binding, symbol):
+            return unresolved
+        local = occurrence_table(
+            target, scopes.references(table.occurrences(symbol), symbol, binding)
+        )
+        return (local.rows(), {"kind": SCOPE_LOCAL, "candidateFiles": 1})
+    if binding != BINDING_MODULE:
+        return unresolved
+    origin_kind, origin = scopes.module_origin(symbol)
+    target_rel = session.relative(target)
+    if origin_kind == ORIGIN_MODULE or target_rel is None:
+        return unresolved
+    files, candidates = session.module_files(target_rel, symbol, origin)
+    scan = partial(scan_module_references, session.names, symbol)
+    locations = (
+        location
+        for file_locations in ordered_imap(scan, files, session.jobs)
+        for location in file_locations.rows()
+    )
+    return (locations, {"kind": SCOPE_MODULE, "candidateFiles": candidates})
+
+
+def iter_lookup_locations(hits: list[tuple[Path, list[int]]]) -> Iterator[MatchRow]:
+    for file, flat in hits:
+        for idx in range(0, len(flat), 3):
+            yield MatchRow(file, flat[idx], flat[idx + 1], 0, bool(flat[idx + 2]))
 
 
 def apply_edits(content: str, edits: list[TokenEdit], replacement: str) -> str:
+    lines = LineIndex(content)
     prepared = []
     for edit in edits:
-        start = line_col_to_offset(content, edit.start_line, edit.start_col)
-        end = line_col_to_offset(content, edit.end_line, edit.end_col)
+        start = line_col_to_offset(lines, edit.start_line, edit.start_col)
+        end = line_col_to_offset(lines, edit.end_line, edit.end_col)
         prepared.append((start, end))
-    prepared.sort(key=lambda item: item[0], reverse=True)
-
-    next_content = content
-    for start, end in prepared:
-        next_content = next_content[:start] + replacement + next_content[end:]
-    return next_content
+    return splice_spans(content, prepared, replacement)
 
 
 def rewrite_locations(
-    locations: list[TokenLocation], replacement: str, dry_run: bool
+    locations: MatchTable, symbol: str, replacement: str, dry_run: bool
 ) -> tuple[int, int]:
-    by_file: dict[Path, list[TokenEdit]] = {}
-    for loc in locations:
-        if loc.is_attribute:
-            continue
-        by_file.setdefault(loc.file, []).append(
-            TokenEdit(
-                start_line=loc.start_line,
-                start_col=loc.start_col,
-                end_line=loc.end_line,
-                end_col=loc.end_col,
-            )
-        )
-
+    # A file's locations are contiguous in the table: one group per file.
     touched_files = 0
     touched_locations = 0
-    for file, edits in by_file.items():
+    rewritten = RewrittenFiles()
+    for file, file_locations in groupby(locations.rows(), key=lambda loc: loc.file):
+        edits = [
+            TokenEdit(
+                start_line=loc.line,
+                start_col=loc.column,
+                end_line=loc.line,
+                end_col=loc.column + len(symbol),
+            )
+            for loc in file_locations
+            if not loc.flag
+        ]
+        if not edits:
+            continue
         touched_files += 1
         touched_locations += len(edits)
-        if dry_run:
+        if dry_run or not rewritten.add(file):
             continue
         content = file.read_text(encoding="utf8")
         updated = apply_edits(content, edits, replacement)
-        file.write_text(updated, encoding="utf8")
+        write_text_atomic(file, updated)
     return (touched_files, touched_locations)
 
 
@@ -230,12 +528,21 @@ def to_reference_payload(
     target_file: Path,
     line: int,
     column: int,
-    locations: list[TokenLocation],
+    locations: MatchTable,
     max_results: int,
     repo_root: Path,
 ) -> dict:
-    emitted = locations[:max_results]
-    touched_files = {str(loc.file.resolve()) for loc in locations}
+    paths = ResolvedPaths()
+    touched_files = {paths[file] for file in locations.files}
+    references = [
+        {
+            "file": paths[loc.file],
+            "line": loc.line,
+            "column": loc.column + 1,
+            "isAttribute": loc.flag,
+        }
+        for loc in islice(locations.rows(), max_results)
+    ]
     return {
         "operation": operation,
         "mode": "analysis",
@@ -248,21 +555,13 @@ def to_reference_payload(
         },
         "summary": {
             "totalReferences": len(locations),
-            "emittedReferences": len(emitted),
-            "truncated": len(locations) > len(emitted),
+            "emittedReferences": len(references),
+            "truncated": len(locations) > len(references),
             "touchedFiles": len(touched_files),
-            "attributeReferences": sum(1 for loc in locations if loc.is_attribute),
+            "attributeReferences": locations.flagged(),
             "repoRoot": str(repo_root.resolve()),
         },
-        "references": [
-            {
-                "file": str(loc.file.resolve()),
-                "line": loc.start_line,
-                "column": loc.start_col + 1,
-                "isAttribute": loc.is_attribute,
-            }
-            for loc in emitted
-        ],
+        "references": references,
     }
 
 
@@ -271,13 +570,10 @@ def build_safe_delete_payload(
     target_file: Path,
     line: int,
     column: int,
-    locations: list[TokenLocation],
+    locations: MatchTable,
     max_results: int,
     repo_root: Path,
 ) -> dict:
-    non_attribute = [loc for loc in locations if not loc.is_attribute]
-    safe_to_delete = len(non_attribute) <= 1
-    confidence = "high" if safe_to_delete else ("medium" if len(non_attribute) <= 3 else "low")
     payload = to_reference_payload(
         "safe-delete-candidates",
         symbol,
@@ -288,21 +584,92 @@ def build_safe_delete_payload(
         max_results,
         repo_root,
     )
-    payload["candidate"] = {
+    payload["candidate"] = safe_delete_candidate(len(locations) - locations.flagged())
+    return payload
+
+
+def safe_delete_candidate(non_attribute: int) -> dict:
+    safe_to_delete = non_attribute <= 1
+    confidence = (
+        "high" if safe_to_delete else ("medium" if non_attribute <= 3 else "low")
+    )
+    return {
         "safeToDelete": safe_to_delete,
         "confidence": confidence,
-        "nonAttributeReferences": len(non_attribute),
+        "nonAttributeReferences": non_attribute,
         "rationale": (
             "symbol appears once (or only as attribute usage)"
             if safe_to_delete
             else "symbol has multiple non-attribute references"
         ),
     }
-    return payload
 
 
-def main() -> None:
-    args = parse_args()
+def binding_column(flat: list[int], line: int) -> int:
+    # 1-based column of the first non-attribute NAME token on `line`.
+    for idx in range(0, len(flat), 3):
+        if flat[idx] == line and not flat[idx + 2]:
+            return flat[idx + 1] + 1
+    return 1
+
+
+def build_safe_delete_report(args: argparse.Namespace, session: IndexSession) -> dict:
+    # Definitions are the import graph's module-level bindings, one per name
+    # and file at its first binding line. References are the name's other
+    # NAME tokens, attribute accesses included: `module.name` is how other
+    # modules reach a binding.
+    if not session.use_index:
+        raise ValueError(
+            f"{OP_SAFE_DELETE_REPORT} reads the token index; drop --noIndex"
+        )
+    if args.maxResults <= 0:
+        raise ValueError("maxResults must be a positive integer")
+    if not session.imports_fresh:
+        session.refresh_imports()
+    graph = session.imports
+    assert graph is not None
+    if not graph.files:
+        raise ValueError(f"no python files found under {session.repo_root}")
+    tokens = session.engine.shard("python").postings
+    definitions: list[Definition] = []
+    sites: dict[str, int] = {}
+    for key, bucket in graph.postings.items():
+        if not key.startswith(DEF_PREFIX):
+            continue
+        symbol = key[len(DEF_PREFIX) :]
+        names = tokens.get(symbol, {})
+        for rel, lines in bucket.items():
+            sites[symbol] = sites.get(symbol, 0) + len(lines)
+            definitions.append(
+                Definition(
+                    symbol,
+                    rel,
+                    lines[0],
+                    binding_column(names.get(rel, []), lines[0]),
+                )
+            )
+    ranked = rank_candidates(
+        definitions,
+        lambda symbol: occurrence_count(tokens.get(symbol, {}), 3) - sites[symbol],
+        LANGUAGES["python"].entry_points,
+    )
+    return build_report_payload(
+        "python-token-index",
+        "python",
+        len(definitions),
+        ranked,
+        args.maxResults,
+        session.repo_root,
+    )
+
+
+def locate_request(
+    args: argparse.Namespace, session: IndexSession
+) -> tuple[Path, str, Iterable[MatchRow], dict]:
+    # (target, symbol, lazy locations, scope) shared by the buffered and
+    # streamed outputs.
+    if args.file is None or args.line is None or args.column is None:
+        raise ValueError("--file, --line and --column are required")
     if args.maxResults <= 0:
         raise ValueError("maxResults must be a positive integer")
 
@@ -316,22 +683,38 @@ def main() -> None:
     if not target.exists():
         raise ValueError(f"file not found: {target}")
 
-    repo_root = Path(args.targetRepoRoot)
-    if not repo_root.exists():
-        raise ValueError(f"targetRepoRoot does not exist: {repo_root}")
+    raw = target.read_bytes()
+    content = decode_source(raw)
+    table = session.names.table(raw)[1]
+    symbol, start_col, is_attribute = pick_symbol(table, args.line, args.column)
+    locations = None
+    scope: dict = {"kind": SCOPE_UNRESOLVED}
+    if not args.noScope and not is_attribute:
+        locations, scope = resolve_scope(
+            session, target, content, table, (args.line, start_col), symbol
+        )
+    if locations is None:
+        locations = session.find_locations(symbol)
+    return (target, symbol, locations, scope)
+
 
-    content = target.read_text(encoding="utf8")
-    token_stream = list(tokenize.generate_tokens(io.StringIO(content).readline))
-    symbol = pick_symbol(token_stream, args.line, args.column)
-    locations = collect_project_locations(repo_root, symbol)
+def run_operation(args: argparse.Namespace, session: IndexSession) -> dict:
+    if args.operation == OP_SAFE_DELETE_REPORT:
+        return build_safe_delete_report(args, session)
+    target, symbol, found, scope = locate_request(args, session)
+    locations = MatchTable().extend(found)
     if not locations:
         raise ValueError("no references found for selected symbol")
 
+    operation = args.operation
+    repo_root = session.repo_root
     if operation == "rename":
         touched_files, touched_locations = rewrite_locations(
-            locations, args.newName, args.dryRun
+            locations, symbol, args.newName, args.dryRun
         )
-        payload = {
+        if not args.dryRun:
+            session.invalidate()
+        return {
             "operation": "rename",
             "mode": "dry-run" if args.dryRun else "apply",
             "backend": "python-token-index",
@@ -346,11 +729,10 @@ def main() -> None:
             "touchedLocations": touched_locations,
             "summary": {
                 "projectReferences": len(locations),
-                "attributeReferences": sum(1 for loc in locations if loc.is_attribute),
+                "attributeReferences": locations.flagged(),
             },
+            "scope": scope,
         }
-        print(json.dumps(payload, indent=2))
-        return
 
     if operation == "reference-map":
         payload = to_reference_payload(
@@ -363,8 +745,8 @@ def main() -> None:
             args.maxResults,
             repo_root,
         )
-        print(json.dumps(payload, indent=2))
-        return
+        payload["scope"] = scope
+        return payload
 
     if operation == "safe-delete-candidates":
         payload = build_safe_delete_payload(
@@ -376,12 +758,134 @@ def main() -> None:
             args.maxResults,
             repo_root,
         )
-        print(json.dumps(payload, indent=2))
-        return
+        payload["scope"] = scope
+        return payload
 
     raise ValueError(f"unsupported operation: {operation}")
 
 
+def stream_operation(
+    args: argparse.Namespace, session: IndexSession, out: TextIO
+) -> None:
+    # --stream: same data as run_operation, written as NDJSON records while
+    # references are still being found.
+    if args.operation in ("rename", OP_SAFE_DELETE_REPORT):
+        write_record(out, RECORD_RESULT, run_operation(args, session))
+        return
+    if args.operation not in OPERATIONS:
+        raise ValueError(f"unsupported operation: {args.operation}")
+    target, symbol, found, scope = locate_request(args, session)
+    first, locations = first_or_none(found)
+    if first is None:
+        raise ValueError("no references found for selected symbol")
+
+    stream = ReferenceStream(out, args.maxResults)
+    stream.header(
+        {
+            "operation": args.operation,
+            "mode": "analysis",
+            "backend": "python-token-index",
+            "symbol": symbol,
+            "from": {
+                "file": str(target.resolve()),
+                "line": args.line,
+                "column": args.column,
+            },
+            "scope": scope,
+        }
+    )
+    attribute_references = 0
+    for loc in locations:
+        if loc.flag:
+            attribute_references += 1
+        stream.reference(
+            loc.file,
+            {"line": loc.line, "column": loc.column + 1, "isAttribute": loc.flag},
+        )
+    summary: dict = {
+        "attributeReferences": attribute_references,
+        "repoRoot": str(session.repo_root.resolve()),
+    }
+    if args.operation == "safe-delete-candidates":
+        summary["candidate"] = safe_delete_candidate(
+            stream.total - attribute_references
+        )
+    stream.summary(summary)
+
+
+def serve(args: argparse.Namespace, session: IndexSession) -> None:
+    if not session.use_index:
+        raise ValueError("--serve keeps the token index warm; drop --noIndex")
+
+    def handle(method: str, params: dict) -> dict:
+        request = semantic_daemon.request_args(
+            build_parser, method, params, session.repo_root
+        )
+        try:
+            return run_operation(request, session)
+        finally:
+            session.prune_names()
+
+    semantic_daemon.serve(
+        session.repo_root,
+        DAEMON_BACKEND,
+        set(OPERATIONS),
+        handle,
+        session.poll,
+        args.watchInterval,
+        {
+            "indexRefresh": args.indexRefresh,
+            "jobs": args.jobs,
+            "fileSource": args.fileSource,
+        },
+    )
+
+
+def main() -> None:
+    args = parse_args()
+    if args.jobs <= 0:
+        raise ValueError("jobs must be a positive integer")
+    if args.stream and (args.serve or args.batch is not None):
+        raise ValueError("--stream applies to single requests, not --batch or --serve")
+
+    repo_root = Path(args.targetRepoRoot)
+    if not repo_root.exists():
+        raise ValueError(f"targetRepoRoot does not exist: {repo_root}")
+
+    session = IndexSession(
+        repo_root,
+        args.indexRefresh,
+        args.jobs,
+        use_index=not args.noIndex,
+        file_source=args.fileSource,
+        use_prefilter=not args.noPrefilter,
+    )
+    if args.serve:
+        serve(args, session)
+        return
+    if args.batch is not None:
+        try:
+            failures = run_batch(
+                args.batch,
+                build_parser,
+                repo_root,
+                lambda request: run_operation(request, session),
+                sys.stdout,
+            )
+        finally:
+            session.prune_names()
+        if failures:
+            raise SystemExit(1)
+        return
+    try:
+        if args.stream:
+            stream_operation(args, session, sys.stdout)
+            return
+        print(json.dumps(run_operation(args, session), indent=2))
+    finally:
+        session.prune_names()
+
+
 if __name__ == "__main__":
     try:
         main()
@@ -0,0 +1,116 @@
+import fs from "node:fs";
+import os from "node:os";
+import path from "node:path";
+import { spawnSync } from "node:child_process";
+import { afterEach } from "vitest";
+
+export type PythonRunner = { command: string; prefixArgs: string[] };
+
+export function run(command: string, args: string[], cwd: string) {
+  return spawnSync(command, args, {
+    cwd,
+    encoding: "utf8",
+    env: { ...process.env },
+  });
+}
+
+export function writeFile(targetPath: string, content: string) {
+  fs.mkdirSync(path.dirname(targetPath), { recursive: true });
+  fs.writeFileSync(targetPath, content, "utf8");
+}
+
+// A small Python project: models.load (with a local `result` in each
+// function), an importer of it, and an unrelated module with its own load.
+export function writePythonRepo(repoDir: string) {
+  writeFile(
+    path.join(repoDir, "models.py"),
+    [
+      "def load(data):",
+      "    result = data",
+      "    return result",
+      "",
+      "",
+      "def helper():",
+      "    result = load(1)",
+      "    return result",
+      "",
+    ].join("\n"),
+  );
+  writeFile(
+    path.join(repoDir, "use.py"),
+    ["from models import load", "", "value = load(2)", "print(value.load)", ""].join("\n"),
+  );
+  writeFile(
+    path.join(repoDir, "other.py"),
+    ["def load():", "    return 0", "", "load()", ""].join("\n"),
+  );
+}
+
+export function git(repoDir: string, args: string[]) {
+  return run("git", args, repoDir);
+}
+
+export function initGitRepo(repoDir: string) {
+  git(repoDir, ["init"]);
+  git(repoDir, ["config", "user.email", "test@example.com"]);
+  git(repoDir, ["config", "user.name", "sbk-test"]);
+  git(repoDir, ["add", "."]);
+  git(repoDir, ["commit", "-m", "init"]);
+}
+
+export function resolvePythonRunner(): PythonRunner | null {
+  const candidates = process.platform === "win32"
+    ? [
+        { command: "python", prefixArgs: [] as string[] },
+        { command: "py", prefixArgs: ["-3"] },
+      ]
+    : [
+        { command: "python3", prefixArgs: [] as string[] },
+        { command: "python", prefixArgs: [] as string[] },
+      ];
+
+  for (const candidate of candidates) {
+    const probe = run(candidate.command, [...candidate.prefixArgs, "--version"], process.cwd());
+    if (probe.status === 0) {
+      return candidate;
+    }
+  }
+
+  return null;
+}
+
+export function runPython(pythonRunner: PythonRunner, args: string[], cwd: string) {
+  return run(pythonRunner.command, [...pythonRunner.prefixArgs, ...args], cwd);
+}
+
+export function runSemanticScript(
+  pythonRunner: PythonRunner,
+  script: string,
+  repoDir: string,
+  args: string[],
+) {
+  return runPython(
+    pythonRunner,
+    [path.join(process.cwd(), "scripts", script), "--targetRepoRoot", repoDir, ...args],
+    repoDir,
+  );
+}
+
+// Call inside a describe block: returns a mkdtemp wrapper whose directories
+// are removed after each test.
+export function useTempDirs() {
+  const tempDirs: string[] = [];
+
+  afterEach(() => {
+    for (const dir of tempDirs) {
+      fs.rmSync(dir, { recursive: true, force: true });
+    }
+    tempDirs.length = 0;
+  });
+
+  return (prefix: string) => {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), prefix));
+    tempDirs.push(dir);
+    return dir;
+  };
+}
@@ -49,6 +49,21 @@ function bootstrapAdapterRepo(repoDir: string) {
   copyFromRepo("scripts/sbk-semantic.ps1", repoDir);
   copyFromRepo("scripts/semantic-python.py", repoDir);
   copyFromRepo("scripts/semantic-index.py", repoDir);
+  copyFromRepo("scripts/common/__init__.py", repoDir);
+  copyFromRepo("scripts/common/semantic_batch.py", repoDir);
+  copyFromRepo("scripts/common/semantic_daemon.py", repoDir);
+  copyFromRepo("scripts/common/semantic_engine.py", repoDir);
+  copyFromRepo("scripts/common/semantic_matches.py", repoDir);
+  copyFromRepo("scripts/common/semantic_namecache.py", repoDir);
+  copyFromRepo("scripts/common/semantic_parallel.py", repoDir);
+  copyFromRepo("scripts/common/semantic_prefilter.py", repoDir);
+  copyFromRepo("scripts/common/semantic_pyscope.py", repoDir);
+  copyFromRepo("scripts/common/semantic_report.py", repoDir);
+  copyFromRepo("scripts/common/semantic_store.py", repoDir);
+  copyFromRepo("scripts/common/semantic_stream.py", repoDir);
+  copyFromRepo("scripts/common/semantic_syntax.py", repoDir);
+  copyFromRepo("scripts/common/semantic_text.py", repoDir);
+  copyFromRepo("scripts/common/semantic_walk.py", repoDir);
   copyFromRepo("scripts/semantic-rename.ts", repoDir);
   copyFromRepo("scripts/common/sbk-runtime.ps1", repoDir);
   copyFromRepo("sbk.config.json", repoDir);
@@ -0,0 +1,1284 @@
+import { createHash } from "node:crypto";
+import fs from "node:fs";
+import net from "node:net";
+import path from "node:path";
+import { spawn } from "node:child_process";
+import { describe, expect, it } from "vitest";
+import type { PythonRunner } from "./fixtures.js";
+import {
+  git,
+  initGitRepo,
+  resolvePythonRunner,
+  runPython,
+  runSemanticScript,
+  useTempDirs,
+  writeFile,
+  writePythonRepo,
+} from "./fixtures.js";
+
+type Request = { file: string; line: number; column: number };
+type Payload = {
+  symbol?: string;
+  references: unknown[];
+  summary: { totalReferences: number };
+  scope?: unknown;
+};
+
+function runBackend(
+  pythonRunner: PythonRunner,
+  script: string,
+  repoDir: string,
+  args: string[],
+) {
+  const result = runSemanticScript(pythonRunner, script, repoDir, args);
+  expect(result.status).toBe(0);
+  return result.stdout;
+}
+
+function requestArgs(request: Request) {
+  return [
+    "--operation",
+    "reference-map",
+    "--file",
+    request.file,
+    "--line",
+    String(request.line),
+    "--column",
+    String(request.column),
+  ];
+}
+
+// What every mode must agree on: the references, their count and the scope.
+function referenceView(payload: Payload) {
+  return {
+    references: payload.references,
+    totalReferences: payload.summary.totalReferences,
+    scope: payload.scope ?? null,
+  };
+}
+
+function referenceMap(
+  pythonRunner: PythonRunner,
+  script: string,
+  repoDir: string,
+  request: Request,
+  modeArgs: string[],
+) {
+  const stdout = runBackend(pythonRunner, script, repoDir, [...requestArgs(request), ...modeArgs]);
+  return referenceView(JSON.parse(stdout));
+}
+
+// Runs one --batch file and returns its output records in order.
+function runBatch(
+  pythonRunner: PythonRunner,
+  script: string,
+  repoDir: string,
+  requests: object[],
+  modeArgs: string[],
+) {
+  const batchPath = path.join(repoDir, "..", `${path.basename(repoDir)}-batch.jsonl`);
+  writeFile(batchPath, requests.map((request) => JSON.stringify(request)).join("\n"));
+  try {
+    const result = runSemanticScript(pythonRunner, script, repoDir, [
+      ...modeArgs,
+      "--batch",
+      batchPath,
+    ]);
+    return {
+      status: result.status,
+      records: result.stdout
+        .split("\n")
+        .filter((line) => line.trim())
+        .map((line) => JSON.parse(line) as { id?: unknown; result?: Payload; error?: string }),
+    };
+  } finally {
+    fs.rmSync(batchPath, { force: true });
+  }
+}
+
+// Folds --stream output (header, references, summary) back into the
+// buffered payload shape.
+function assembleStream(stdout: string) {
+  const records = stdout
+    .split("\n")
+    .filter((line) => line.trim())
+    .map((line) => JSON.parse(line) as Record<string, unknown>);
+  const strip = (record: Record<string, unknown>) =>
+    Object.fromEntries(Object.entries(record).filter(([key]) => key !== "type"));
+  expect(records[0]?.type).toBe("header");
+  expect(records.at(-1)?.type).toBe("summary");
+  expect(records.slice(1, -1).every((record) => record.type === "reference")).toBe(true);
+  return {
+    ...strip(records[0]!),
+    summary: strip(records.at(-1)!),
+    references: records.slice(1, -1).map(strip),
+  };
+}
+
+type RpcReply = {
+  result?: Payload;
+  error?: { code: number; message: string };
+};
+
+function rpc(socketPath: string, method: string, params: Record<string, unknown>) {
+  return new Promise<RpcReply>((resolve, reject) => {
+    const client = net.createConnection(socketPath);
+    let buffer = "";
+    client.setEncoding("utf8");
+    client.on("connect", () => {
+      client.write(`${JSON.stringify({ jsonrpc: "2.0", id: 1, method, params })}\n`);
+    });
+    client.on("data", (chunk: string) => {
+      buffer += chunk;
+      const end = buffer.indexOf("\n");
+      if (end >= 0) {
+        client.end();
+        resolve(JSON.parse(buffer.slice(0, end)) as RpcReply);
+      }
+    });
+    client.on("error", reject);
+  });
+}
+
+async function waitFor(condition: () => boolean, timeoutMs: number) {
+  const deadline = Date.now() + timeoutMs;
+  while (!condition()) {
+    if (Date.now() > deadline) {
+      throw new Error("timed out");
+    }
+    await new Promise((resolve) => setTimeout(resolve, 50));
+  }
+}
+
+function writeGoRepo(repoDir: string) {
+  writeFile(
+    path.join(repoDir, "main.go"),
+    "package main\n\nfunc greet() {}\n\nfunc main() { greet() }\n",
+  );
+  writeFile(path.join(repoDir, "util.go"), "package main\n\nfunc helper() { greet() }\n");
+}
+
+const GREET = { file: "main.go", line: 3, column: 6 };
+// References to greet in the repo writeGoRepo creates.
+const GREET_REFERENCES = 3;
+const GO = ["--language", "go"];
+const LOAD = { file: "models.py", line: 1, column: 5 };
+
+type Scenario = {
+  script: string;
+  baseArgs: string[];
+  request: Request;
+  // A tracked file that references the symbol, a line adding one more
+  // reference to it, and an untracked file with one more reference.
+  tracked: string;
+  addCall: (n: number) => string;
+  newFile: { name: string; content: string };
+};
+
+const GO_SCENARIO: Scenario = {
+  script: "semantic-index.py",
+  baseArgs: GO,
+  request: GREET,
+  tracked: "util.go",
+  addCall: (n) => `\nfunc extra${n}() { greet() }\n`,
+  newFile: { name: "extra.go", content: "package main\n\nfunc more() { greet() }\n" },
+};
+
+const PYTHON_SCENARIO: Scenario = {
+  script: "semantic-python.py",
+  baseArgs: [],
+  request: LOAD,
+  tracked: "use.py",
+  addCall: (n) => `load(${n})\n`,
+  newFile: { name: "extra.py", content: "from models import load\n\nload(5)\n" },
+};
+
+describe("semantic backends", () => {
+  const makeTempDir = useTempDirs();
+
+  it("semantic-index answers from its persistent index and logs edits", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      // Some Windows runners do not include python/py launchers.
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-store-");
+    writeGoRepo(repoDir);
+    const indexDir = path.join(repoDir, ".sbk", "semantic-index");
+
+    const cold = referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, GO);
+    expect(cold.totalReferences).toBe(3);
+    expect(cold).toEqual(
+      referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, [...GO, "--noIndex"]),
+    );
+    const snapshot = fs.readFileSync(path.join(indexDir, "symbol-go.json"), "utf8");
+    expect(referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, GO)).toEqual(cold);
+
+    // An edit is appended to the change log; the snapshot is not rewritten.
+    fs.appendFileSync(path.join(repoDir, "util.go"), "\nfunc extra() { greet() }\n", "utf8");
+    const edited = referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, GO);
+    expect(edited.totalReferences).toBe(4);
+    expect(edited).toEqual(
+      referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, [...GO, "--noIndex"]),
+    );
+    expect(fs.readFileSync(path.join(indexDir, "symbol-go.json"), "utf8")).toBe(snapshot);
+    expect(fs.readFileSync(path.join(indexDir, "symbol-go.log"), "utf8")).toContain("util.go");
+
+    // A torn log tail is dropped and compacted away on the next save.
+    fs.appendFileSync(path.join(indexDir, "symbol-go.log"), '{"file":"util.go","entr', "utf8");
+    fs.rmSync(path.join(repoDir, "util.go"));
+    const removed = referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, GO);
+    expect(removed.totalReferences).toBe(2);
+    expect(removed).toEqual(
+      referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, [...GO, "--noIndex"]),
+    );
+    expect(fs.existsSync(path.join(indexDir, "symbol-go.log"))).toBe(false);
+  }, 60000);
+
+  it("git index refresh follows commits, edits, untracked and deleted files", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    for (const scenario of [GO_SCENARIO, PYTHON_SCENARIO]) {
+      const repoDir = makeTempDir("sbk-index-git-refresh-");
+      writeGoRepo(repoDir);
+      writePythonRepo(repoDir);
+      initGitRepo(repoDir);
+      const trackedPath = path.join(repoDir, scenario.tracked);
+      const totals: number[] = [];
+      const expectRefreshAgrees = () => {
+        const refreshed = referenceMap(
+          pythonRunner,
+          scenario.script,
+          repoDir,
+          scenario.request,
+          [...scenario.baseArgs, "--indexRefresh", "git"],
+        );
+        expect(refreshed).toEqual(
+          referenceMap(pythonRunner, scenario.script, repoDir, scenario.request, [
+            ...scenario.baseArgs,
+            "--noIndex",
+          ]),
+        );
+        totals.push(refreshed.totalReferences);
+      };
+
+      expectRefreshAgrees();
+      fs.appendFileSync(trackedPath, scenario.addCall(1), "utf8");
+      git(repoDir, ["commit", "-qam", "edit"]);
+      expectRefreshAgrees();
+      fs.appendFileSync(trackedPath, scenario.addCall(2), "utf8");
+      expectRefreshAgrees();
+      writeFile(path.join(repoDir, scenario.newFile.name), scenario.newFile.content);
+      expectRefreshAgrees();
+      fs.rmSync(trackedPath);
+      expectRefreshAgrees();
+      git(repoDir, ["checkout", "--", scenario.tracked]);
+      expectRefreshAgrees();
+
+      // Each step moved the count: +1 committed, +1 dirty, up for the
+      // untracked file, down for the deletion, and the checkout restores
+      // the committed file without the dirty line.
+      const [base, committed, dirty, untracked, deleted, restored] = totals as [
+        number,
+        number,
+        number,
+        number,
+        number,
+        number,
+      ];
+      expect([committed, dirty]).toEqual([base + 1, base + 2]);
+      expect(untracked).toBeGreaterThan(dirty);
+      expect(deleted).toBeLessThan(untracked);
+      expect(restored).toBe(untracked - 1);
+    }
+  }, 120000);
+
+  it("reports exact positions and renames every site in a long generated file", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const lineCount = 2000;
+    const cases = [
+      {
+        script: "semantic-index.py",
+        baseArgs: GO,
+        head: ["package main", "", "func greet() {}"],
+        body: (i: number) => `func f${i}() { greet(); x := "é"; greet() }`,
+        request: { file: "gen.go", line: 3, column: 6 },
+        symbol: "greet",
+        renamed: "hello",
+      },
+      {
+        script: "semantic-python.py",
+        baseArgs: [],
+        head: ["def load(x):", "    return x", ""],
+        body: (i: number) => `v${i} = load("é") + load(${i})`,
+        request: { file: "gen.py", line: 1, column: 5 },
+        symbol: "load",
+        renamed: "fetch",
+      },
+    ];
+
+    for (const item of cases) {
+      const repoDir = makeTempDir("sbk-index-positions-");
+      const lines = [...item.head];
+      for (let i = 0; i < lineCount; i += 1) {
+        lines.push(item.body(i));
+      }
+      // No trailing newline: the last line still has a line-start entry.
+      const content = lines.join("\n");
+      writeFile(path.join(repoDir, item.request.file), content);
+
+      const expected: Array<{ line: number; column: number }> = [];
+      lines.forEach((text, index) => {
+        const pattern = new RegExp(`\\b${item.symbol}\\b`, "g");
+        for (const match of text.matchAll(pattern)) {
+          expected.push({ line: index + 1, column: match.index + 1 });
+        }
+      });
+      for (const mode of [[], ["--noIndex"]]) {
+        const view = referenceMap(pythonRunner, item.script, repoDir, item.request, [
+          ...item.baseArgs,
+          ...mode,
+          "--maxResults",
+          String(expected.length),
+        ]);
+        expect(
+          (view.references as Array<{ line: number; column: number }>).map((ref) => ({
+            line: ref.line,
+            column: ref.column,
+          })),
+        ).toEqual(expected);
+      }
+
+      runBackend(pythonRunner, item.script, repoDir, [
+        ...item.baseArgs,
+        "--operation",
+        "rename",
+        "--file",
+        item.request.file,
+        "--line",
+        String(item.request.line),
+        "--column",
+        String(item.request.column),
+        "--newName",
+        item.renamed,
+      ]);
+      expect(fs.readFileSync(path.join(repoDir, item.request.file), "utf8")).toBe(
+        content.replace(new RegExp(`\\b${item.symbol}\\b`, "g"), item.renamed),
+      );
+    }
+  }, 120000);
+
+  it("rewrites renamed files in place of their targets, through links", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner || process.platform === "win32") {
+      // Creating symlinks needs extra privileges on Windows.
+      expect(true).toBe(true);
+      return;
+    }
+
+    const cases = [
+      {
+        script: "semantic-index.py",
+        baseArgs: GO,
+        request: { file: "main.go", line: 3, column: 6 },
+        main: "package main\n\nfunc greet() {}\n\nfunc main() { greet() }\n",
+        shared: "package main\n\nfunc other() { greet() }\n",
+        suffix: ".go",
+        symbol: "greet",
+        renamed: "salutation",
+      },
+      {
+        script: "semantic-python.py",
+        baseArgs: [],
+        request: { file: "main.py", line: 1, column: 5 },
+        main: "def greet():\n    return 1\n\n\ngreet()\n",
+        shared: "from main import greet\n\ngreet()\n",
+        suffix: ".py",
+        symbol: "greet",
+        renamed: "salutation",
+      },
+    ];
+
+    for (const item of cases) {
+      const rootDir = makeTempDir("sbk-index-links-");
+      const repoDir = path.join(rootDir, "repo");
+      const mainPath = path.join(repoDir, `main${item.suffix}`);
+      const sharedPath = path.join(rootDir, "shared", `lib${item.suffix}`);
+      writeFile(mainPath, item.main);
+      writeFile(sharedPath, item.shared);
+      fs.chmodSync(mainPath, 0o755);
+      // A symlink to a file outside the repo, a symlink and a hard link to
+      // a file inside it.
+      fs.symlinkSync(
+        path.join("..", "shared", `lib${item.suffix}`),
+        path.join(repoDir, `lib${item.suffix}`),
+      );
+      fs.symlinkSync(`main${item.suffix}`, path.join(repoDir, `alias${item.suffix}`));
+      fs.linkSync(mainPath, path.join(repoDir, `twin${item.suffix}`));
+
+      runBackend(pythonRunner, item.script, repoDir, [
+        ...item.baseArgs,
+        "--operation",
+        "rename",
+        "--file",
+        item.request.file,
+        "--line",
+        String(item.request.line),
+        "--column",
+        String(item.request.column),
+        "--newName",
+        item.renamed,
+      ]);
+
+      const rename = (text: string) => text.split(item.symbol).join(item.renamed);
+      expect(fs.readFileSync(mainPath, "utf8")).toBe(rename(item.main));
+      expect(fs.readFileSync(sharedPath, "utf8")).toBe(rename(item.shared));
+      expect(fs.lstatSync(path.join(repoDir, `lib${item.suffix}`)).isSymbolicLink()).toBe(true);
+      expect(fs.lstatSync(path.join(repoDir, `alias${item.suffix}`)).isSymbolicLink()).toBe(true);
+      expect(fs.statSync(mainPath).nlink).toBe(2);
+      expect(fs.statSync(mainPath).mode & 0o777).toBe(0o755);
+      // No temp file is left next to a rewritten file.
+      expect(fs.readdirSync(repoDir).filter((name) => name.endsWith(".tmp"))).toEqual([]);
+      expect(fs.readdirSync(path.join(rootDir, "shared"))).toEqual([`lib${item.suffix}`]);
+    }
+  }, 60000);
+
+  it("--jobs output is byte-identical to a serial run", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-jobs-");
+    writeGoRepo(repoDir);
+    writePythonRepo(repoDir);
+    for (let i = 0; i < 40; i += 1) {
+      writeFile(
+        path.join(repoDir, "pkg", `g${i}.go`),
+        `package main\n\nfunc use${i}() { greet(); greet() }\n`,
+      );
+      writeFile(
+        path.join(repoDir, "pkg", `p${i}.py`),
+        `from models import load\n\nv${i} = load(${i})\n`,
+      );
+    }
+
+    const queries = [
+      { script: "semantic-index.py", args: [...GO, ...requestArgs(GREET)] },
+      { script: "semantic-python.py", args: requestArgs(LOAD) },
+      {
+        script: "semantic-python.py",
+        args: [
+          "--operation",
+          "rename",
+          "--file",
+          LOAD.file,
+          "--line",
+          String(LOAD.line),
+          "--column",
+          String(LOAD.column),
+          "--newName",
+          "fetch",
+          "--dryRun",
+        ],
+      },
+    ];
+    const indexDir = path.join(repoDir, ".sbk", "semantic-index");
+    for (const query of queries) {
+      for (const mode of [[], ["--noIndex"], ["--noIndex", "--noPrefilter"]]) {
+        // Cold: the index (or word filters) is built by the worker pool.
+        fs.rmSync(indexDir, { recursive: true, force: true });
+        const serial = runBackend(pythonRunner, query.script, repoDir, [...query.args, ...mode]);
+        fs.rmSync(indexDir, { recursive: true, force: true });
+        for (const jobs of ["2", "4"]) {
+          const parallel = runBackend(pythonRunner, query.script, repoDir, [
+            ...query.args,
+            ...mode,
+            "--jobs",
+            jobs,
+          ]);
+          expect(parallel).toBe(serial);
+        }
+      }
+    }
+  }, 180000);
+
+  it("daemon answers like the CLI and sees edits without waiting for its watcher", async () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner || process.platform === "win32") {
+      // The daemon needs Unix domain sockets.
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-daemon-");
+    writeGoRepo(repoDir);
+    initGitRepo(repoDir);
+    const expected = referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, GO);
+
+    // A watcher interval far beyond the test: edits must be picked up by the
+    // requests themselves.
+    const daemon = spawn(
+      pythonRunner.command,
+      [
+        ...pythonRunner.prefixArgs,
+        path.join(process.cwd(), "scripts", "semantic-index.py"),
+        "--serve",
+        "--targetRepoRoot",
+        repoDir,
+        ...GO,
+        "--watchInterval",
+        "600",
+      ],
+      { cwd: repoDir, stdio: "ignore" },
+    );
+    const exited = new Promise((resolve) => daemon.on("exit", resolve));
+    const infoPath = path.join(repoDir, ".sbk", "semantic-daemon", "semantic-index.json");
+    try {
+      await waitFor(() => fs.existsSync(infoPath), 30000);
+      const info = JSON.parse(fs.readFileSync(infoPath, "utf8")) as {
+        socket: string;
+        options: Record<string, unknown>;
+      };
+      expect(info.options).toEqual({
+        indexRefresh: "stat",
+        jobs: 1,
+        fileSource: "scan",
+        parser: "regex",
+      });
+      const query = { ...GREET, language: "go" };
+
+      const first = await rpc(info.socket, "reference-map", query);
+      expect(referenceView(first.result!)).toEqual(expected);
+
+      fs.appendFileSync(path.join(repoDir, "util.go"), GO_SCENARIO.addCall(1));
+      writeFile(path.join(repoDir, GO_SCENARIO.newFile.name), GO_SCENARIO.newFile.content);
+      const edited = await rpc(info.socket, "reference-map", query);
+      expect(edited.result!.summary.totalReferences).toBe(expected.totalReferences + 2);
+      expect(referenceView(edited.result!)).toEqual(
+        referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, GO),
+      );
+
+      const outside = await rpc(info.socket, "reference-map", { ...query, file: "../main.go" });
+      expect(outside.error?.code).toBe(-32602);
+
+      expect((await rpc(info.socket, "shutdown", {})).result).toEqual({ stopping: true });
+      await exited;
+      expect(fs.existsSync(infoPath)).toBe(false);
+    } finally {
+      daemon.kill();
+    }
+  }, 60000);
+
+  it("batch answers each request like a separate run", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-batch-");
+    writeGoRepo(repoDir);
+    writePythonRepo(repoDir);
+    const cases = [
+      {
+        script: "semantic-index.py",
+        baseArgs: GO,
+        requests: [GREET, { file: "util.go", line: 3, column: 17 }],
+      },
+      {
+        script: "semantic-python.py",
+        baseArgs: [],
+        requests: [LOAD, { file: "use.py", line: 3, column: 9 }],
+      },
+    ];
+    for (const item of cases) {
+      const expected = item.requests.map((request) =>
+        referenceMap(pythonRunner, item.script, repoDir, request, item.baseArgs),
+      );
+      const batch = runBatch(
+        pythonRunner,
+        item.script,
+        repoDir,
+        item.requests.map((request, index) => ({
+          operation: "reference-map",
+          id: index,
+          ...request,
+        })),
+        item.baseArgs,
+      );
+      expect(batch.status).toBe(0);
+      expect(batch.records.map((record) => record.id)).toEqual([0, 1]);
+      expect(batch.records.map((record) => referenceView(record.result!))).toEqual(expected);
+
+      // A failing request is reported in place and does not stop the batch.
+      const failing = runBatch(
+        pythonRunner,
+        item.script,
+        repoDir,
+        [
+          { operation: "reference-map", file: "missing.src", line: 1, column: 1 },
+          { operation: "reference-map", ...item.requests[0] },
+        ],
+        item.baseArgs,
+      );
+      expect(failing.status).toBe(1);
+      expect(typeof failing.records[0]?.error).toBe("string");
+      expect(referenceView(failing.records[1]!.result!)).toEqual(expected[0]);
+    }
+
+    // An applied rename is visible to the requests after it.
+    const renamed = runBatch(
+      pythonRunner,
+      "semantic-python.py",
+      repoDir,
+      [
+        { operation: "rename", ...LOAD, newName: "fetch" },
+        { operation: "reference-map", ...LOAD },
+      ],
+      [],
+    );
+    expect(renamed.status).toBe(0);
+    expect(renamed.records[1]!.result!.symbol).toBe("fetch");
+    expect(referenceView(renamed.records[1]!.result!)).toEqual(
+      referenceMap(pythonRunner, "semantic-python.py", repoDir, LOAD, []),
+    );
+  }, 60000);
+
+  it("a --noIndex batch scans once for all symbols and matches separate runs", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-multi-");
+    // Symbols that prefix one another share branches of the combined pattern.
+    writeFile(
+      path.join(repoDir, "names.go"),
+      [
+        "package main",
+        "",
+        "func get() {}",
+        "func getName() {}",
+        "func getValue() {}",
+        "",
+        "func main() { get(); getName(); getValue(); getName(); getNamed() }",
+        "",
+      ].join("\n"),
+    );
+    writeFile(
+      path.join(repoDir, "more.go"),
+      "package main\n\nfunc getNamed() { get(); getValue() }\n",
+    );
+    const requests = [3, 4, 5].map((line) => ({ file: "names.go", line, column: 6 }));
+    const expected = requests.map((request) =>
+      referenceMap(pythonRunner, "semantic-index.py", repoDir, request, GO),
+    );
+    expect(expected.map((view) => view.totalReferences)).toEqual([3, 3, 3]);
+    const modes = [["--noIndex"], ["--noIndex", "--noPrefilter"], ["--noIndex", "--jobs", "2"]];
+    for (const mode of modes) {
+      const batch = runBatch(
+        pythonRunner,
+        "semantic-index.py",
+        repoDir,
+        requests.map((request) => ({ operation: "reference-map", ...request })),
+        [...GO, ...mode],
+      );
+      expect(batch.status).toBe(0);
+      expect(batch.records.map((record) => referenceView(record.result!))).toEqual(expected);
+    }
+  }, 60000);
+
+  it("the scandir walker honors git's info/exclude and core.excludesFile", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-excludes-");
+    writeGoRepo(repoDir);
+    writeFile(path.join(repoDir, ".gitignore"), "ignored.go\n");
+    initGitRepo(repoDir);
+    const call = "package main\n\nfunc extra() { greet() }\n";
+    for (const name of ["ignored.go", "skipped.go", "local/x.go", "gen/y.gen.go", "kept.go"]) {
+      writeFile(path.join(repoDir, name), call);
+    }
+    writeFile(path.join(repoDir, ".git", "info", "exclude"), "skipped.go\nlocal/\n");
+    const userExcludes = path.join(repoDir, "..", `${path.basename(repoDir)}-excludes`);
+    writeFile(userExcludes, "*.gen.go\n");
+    git(repoDir, ["config", "core.excludesFile", userExcludes]);
+    try {
+      const files = (view: { references: unknown[] }) =>
+        [...new Set((view.references as Array<{ file: string }>).map((ref) => ref.file))]
+          .map((file) => path.relative(repoDir, file).split(path.sep).join("/"))
+          .sort();
+      const scanned = referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, [
+        ...GO,
+        "--noIndex",
+      ]);
+      expect(files(scanned)).toEqual(["kept.go", "main.go", "util.go"]);
+      for (const mode of [[], ["--fileSource", "git"], ["--noIndex", "--fileSource", "git"]]) {
+        expect(
+          referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, [...GO, ...mode]),
+        ).toEqual(scanned);
+      }
+    } finally {
+      fs.rmSync(userExcludes, { force: true });
+    }
+  }, 60000);
+
+  it("the mapped byte scan reports what the decoded index reports", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const baseDir = makeTempDir("sbk-index-mmap-");
+    const writeRepo = (repoDir: string) => {
+      writeGoRepo(repoDir);
+      // Over a mapped chunk (1 MiB) of multibyte lines, with calls on both
+      // sides of the chunk boundary.
+      const lines = ["package main", ""];
+      for (let i = 0; i < 30000; i += 1) {
+        lines.push(
+          i % 7000 === 0 ? `func call${i}() { greet() } // é` : `// é ü padding line ${i}`,
+        );
+      }
+      writeFile(path.join(repoDir, "big.go"), `${lines.join("\n")}\n`);
+      writeFile(
+        path.join(repoDir, "crlf.go"),
+        "package main\r\n\r\n// ünï\r\nfunc a() { greet(); égreet(); greet() }\r\n",
+      );
+      writeFile(
+        path.join(repoDir, "lonecr.go"),
+        "package main\n// old\rmac\nfunc b() { greet() }\n",
+      );
+      fs.writeFileSync(
+        path.join(repoDir, "latin1.go"),
+        Buffer.from("package main\n// caf\xe9\nfunc c() { greet() }\n", "latin1"),
+      );
+    };
+    const indexed = path.join(baseDir, "indexed");
+    const scanned = path.join(baseDir, "scanned");
+    writeRepo(indexed);
+    writeRepo(scanned);
+
+    const expected = referenceMap(pythonRunner, "semantic-index.py", indexed, GREET, GO);
+    // Five calls in big.go, two in crlf.go, one in lonecr.go; none from the
+    // undecodable latin1.go or the non-ASCII identifier.
+    expect(expected.totalReferences).toBe(GREET_REFERENCES + 8);
+    for (const mode of [["--noIndex"], ["--noIndex", "--noPrefilter"]]) {
+      expect(
+        referenceMap(pythonRunner, "semantic-index.py", scanned, GREET, [...GO, ...mode]),
+      ).toEqual(
+        JSON.parse(JSON.stringify(expected).split(indexed).join(scanned)) as typeof expected,
+      );
+    }
+
+    // Renames splice the same offsets, so both trees end up byte-identical.
+    const rename = [...GO, ...requestArgs(GREET).slice(2), "--operation", "rename"];
+    runBackend(pythonRunner, "semantic-index.py", indexed, [...rename, "--newName", "salute"]);
+    runBackend(pythonRunner, "semantic-index.py", scanned, [
+      ...rename,
+      "--newName",
+      "salute",
+      "--noIndex",
+    ]);
+    for (const name of ["main.go", "util.go", "big.go", "crlf.go", "lonecr.go", "latin1.go"]) {
+      const identical = fs
+        .readFileSync(path.join(scanned, name))
+        .equals(fs.readFileSync(path.join(indexed, name)));
+      expect(identical).toBe(true);
+    }
+    expect(fs.readFileSync(path.join(scanned, "crlf.go"), "utf8").replace(/\r\n/g, "\n")).toBe(
+      "package main\n\n// ünï\nfunc a() { salute(); égreet(); salute() }\n",
+    );
+  }, 120000);
+
+  it("python name tables are cached by content, reused and pruned", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-python-names-");
+    writePythonRepo(repoDir);
+    const cacheDir = path.join(repoDir, ".sbk", "semantic-index", "python-names");
+    const entriesFor = (...names: string[]) =>
+      names
+        .map((name) => {
+          const digest = createHash("sha1").update(fs.readFileSync(path.join(repoDir, name)));
+          return `${digest.digest("hex")}.bin`;
+        })
+        .sort();
+    const cached = () => fs.readdirSync(cacheDir).sort();
+
+    // Only the import graph's candidates for models.load get tokenized.
+    const first = referenceMap(pythonRunner, "semantic-python.py", repoDir, LOAD, []);
+    expect(cached()).toEqual(entriesFor("models.py", "use.py"));
+    const written = cached().map((name) => fs.statSync(path.join(cacheDir, name)).mtimeMs);
+
+    expect(referenceMap(pythonRunner, "semantic-python.py", repoDir, LOAD, ["--noIndex"])).toEqual(
+      first,
+    );
+    expect(cached().map((name) => fs.statSync(path.join(cacheDir, name)).mtimeMs)).toEqual(
+      written,
+    );
+
+    // New content gets a new table; the table for the old content is dropped.
+    fs.appendFileSync(path.join(repoDir, "use.py"), "load(3)\n", "utf8");
+    const edited = referenceMap(pythonRunner, "semantic-python.py", repoDir, LOAD, []);
+    expect(edited.totalReferences).toBe(first.totalReferences + 1);
+    expect(cached()).toEqual(entriesFor("models.py", "use.py"));
+    expect(referenceMap(pythonRunner, "semantic-python.py", repoDir, LOAD, ["--noIndex"])).toEqual(
+      edited,
+    );
+  }, 60000);
+
+  it("word prefilters narrow direct scans without losing matches", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-prefilter-");
+    writeGoRepo(repoDir);
+    writePythonRepo(repoDir);
+    for (let i = 0; i < 30; i += 1) {
+      const name = `unrelated${i}`;
+      writeFile(path.join(repoDir, "pkg", `g${i}.go`), `package main\n\nfunc ${name}() {}\n`);
+      writeFile(path.join(repoDir, "pkg", `p${i}.py`), `def ${name}():\n    return ${i}\n`);
+    }
+    // Python module names are narrowed by the import graph; without scope
+    // resolution every file containing the name is scanned, via the filter.
+    const cases = [
+      { script: "semantic-index.py", baseArgs: GO, request: GREET, file: "g7.go" },
+      { script: "semantic-python.py", baseArgs: ["--noScope"], request: LOAD, file: "p7.py" },
+    ];
+    const indexDir = path.join(repoDir, ".sbk", "semantic-index");
+    for (const item of cases) {
+      const query = (mode: string[]) =>
+        referenceMap(pythonRunner, item.script, repoDir, item.request, [
+          ...item.baseArgs,
+          ...mode,
+        ]);
+      const expected = query([]);
+      expect(query(["--noIndex"])).toEqual(expected);
+      expect(query(["--noIndex", "--noPrefilter"])).toEqual(expected);
+
+      // A file whose filter ruled the symbol out is re-checked once edited.
+      const call = item.file.endsWith(".go") ? "\nfunc more7() { greet() }\n" : "load(7)\n";
+      fs.appendFileSync(path.join(repoDir, "pkg", item.file), call);
+      const edited = query(["--noIndex"]);
+      expect(edited.totalReferences).toBe(expected.totalReferences + 1);
+      expect(edited).toEqual(query([]));
+    }
+    expect(fs.readdirSync(indexDir).filter((name) => name.endsWith(".bloom")).sort()).toEqual([
+      "python-words.bloom",
+      "words-go.bloom",
+    ]);
+  }, 60000);
+
+  it("--stream emits the buffered payload as header, references and summary", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-stream-");
+    writeGoRepo(repoDir);
+    writePythonRepo(repoDir);
+    for (const scenario of [GO_SCENARIO, PYTHON_SCENARIO]) {
+      for (const mode of [[], ["--noIndex"], ["--maxResults", "2"]]) {
+        const args = [...scenario.baseArgs, ...requestArgs(scenario.request), ...mode];
+        const buffered = JSON.parse(runBackend(pythonRunner, scenario.script, repoDir, args));
+        const streamed = runBackend(pythonRunner, scenario.script, repoDir, [...args, "--stream"]);
+        expect(assembleStream(streamed)).toEqual(buffered);
+      }
+    }
+  }, 60000);
+
+  it("match tables keep references ordered, unique and truncated consistently", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-matches-");
+    writeGoRepo(repoDir);
+    writeFile(path.join(repoDir, "b.go"), "package main\n\nfunc b() { greet(); greet() }\n");
+    writeFile(path.join(repoDir, "a", "z.go"), "package a\n\nfunc z() {\n\tgreet()\n}\n");
+    for (const mode of [[], ["--noIndex"]]) {
+      const run = (extra: string[]) =>
+        JSON.parse(
+          runBackend(pythonRunner, "semantic-index.py", repoDir, [
+            ...GO,
+            ...requestArgs(GREET),
+            ...mode,
+            ...extra,
+          ]),
+        ) as Payload & {
+          references: Array<{ file: string; line: number; column: number }>;
+          summary: { emittedReferences: number; truncated: boolean; touchedFiles: number };
+        };
+      const full = run([]);
+      const keys = full.references.map((ref) => [ref.file, ref.line, ref.column] as const);
+      const sorted = [...keys].sort(
+        (left, right) =>
+          (left[0] < right[0] ? -1 : left[0] > right[0] ? 1 : 0) ||
+          left[1] - right[1] ||
+          left[2] - right[2],
+      );
+      expect(keys).toEqual(sorted);
+      expect(new Set(keys.map((key) => key.join(":"))).size).toBe(keys.length);
+      expect(full.summary).toMatchObject({
+        totalReferences: GREET_REFERENCES + 3,
+        emittedReferences: GREET_REFERENCES + 3,
+        truncated: false,
+        touchedFiles: 4,
+      });
+
+      const truncated = run(["--maxResults", "2"]);
+      expect(truncated.references).toEqual(full.references.slice(0, 2));
+      expect(truncated.summary).toMatchObject({
+        totalReferences: GREET_REFERENCES + 3,
+        emittedReferences: 2,
+        truncated: true,
+        touchedFiles: 4,
+      });
+    }
+  }, 60000);
+
+  it("the bench harness times every scenario and checks it against a baseline", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const workDir = makeTempDir("sbk-semantic-bench-");
+    type Report = {
+      config: Record<string, unknown>;
+      repos: Record<string, { expectedReferences: number }>;
+      results: Array<{
+        language: string;
+        scenario: string;
+        seconds: number;
+        references: number;
+        baselineSeconds?: number;
+        ratio?: number;
+      }>;
+      regressions: string[];
+    };
+    const bench = (output: string, extra: string[]) =>
+      runPython(
+        pythonRunner,
+        [
+          path.join(process.cwd(), "scripts", "semantic-bench.py"),
+          "--languages",
+          "go,python",
+          "--files",
+          "4",
+          "--linesPerFile",
+          "8",
+          "--repeat",
+          "1",
+          "--workDir",
+          path.join(workDir, "repos"),
+          "--output",
+          path.join(workDir, output),
+          ...extra,
+        ],
+        process.cwd(),
+      );
+    const readReport = (name: string) =>
+      JSON.parse(fs.readFileSync(path.join(workDir, name), "utf8")) as Report;
+
+    expect(bench("first.json", []).status).toBe(0);
+    const first = readReport("first.json");
+    const scenarios = [
+      "reference-map-cold",
+      "reference-map-warm",
+      "rename-dry-run",
+      "rename-apply",
+      "reference-map-direct",
+    ];
+    for (const language of ["go", "python"]) {
+      const results = first.results.filter((item) => item.language === language);
+      expect(results.map((item) => item.scenario)).toEqual(scenarios);
+      // Every scenario found exactly the references the generator planted.
+      for (const item of results) {
+        expect(item.references).toBe(first.repos[language]!.expectedReferences);
+      }
+    }
+
+    // A slower baseline is no regression; each result records the comparison.
+    const baseline = {
+      ...first,
+      results: first.results.map((item) => ({ ...item, seconds: 1000 })),
+    };
+    writeFile(path.join(workDir, "baseline.json"), JSON.stringify(baseline));
+    const compared = bench("second.json", ["--baseline", path.join(workDir, "baseline.json")]);
+    expect(compared.status).toBe(0);
+    const second = readReport("second.json");
+    expect(second.regressions).toEqual([]);
+    for (const item of second.results) {
+      expect(item.baselineSeconds).toBe(1000);
+      expect(item.ratio!).toBeLessThan(1);
+    }
+
+    // Timings from differently generated repos are not comparable.
+    writeFile(
+      path.join(workDir, "other-seed.json"),
+      JSON.stringify({ ...first, config: { ...first.config, seed: 2 } }),
+    );
+    const mismatched = bench("third.json", ["--baseline", path.join(workDir, "other-seed.json")]);
+    expect(mismatched.status).toBe(1);
+    expect(mismatched.stdout).toContain("used different seed");
+  }, 120000);
+
+  it("--parser tree-sitter skips comments and strings, or falls back to regex", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-syntax-");
+    writeFile(
+      path.join(repoDir, "main.go"),
+      [
+        "package main",
+        "",
+        "// greet is called below",
+        "func greet() {}",
+        "",
+        "func main() {",
+        "\tgreet()",
+        '\ts := "greet"',
+        "\t_ = s",
+        "}",
+        "",
+      ].join("\n"),
+    );
+    const request = { file: "main.go", line: 4, column: 6 };
+    const payload = (mode: string[]) =>
+      JSON.parse(
+        runBackend(pythonRunner, "semantic-index.py", repoDir, [
+          ...GO,
+          ...requestArgs(request),
+          ...mode,
+        ]),
+      ) as Payload & { backend: string; references: Array<{ line: number; column: number }> };
+    const regex = payload([]);
+    expect(regex.backend).toBe("symbol-index");
+    expect(regex.summary.totalReferences).toBe(4);
+
+    const syntax = payload(["--parser", "tree-sitter"]);
+    if (syntax.backend !== "syntax-index") {
+      // No tree-sitter grammar for Go here: the regex index answers as before.
+      expect(syntax).toEqual(regex);
+      return;
+    }
+    expect(syntax.references.map((ref) => [ref.line, ref.column])).toEqual([
+      [4, 6],
+      [7, 2],
+    ]);
+    expect(payload(["--parser", "tree-sitter", "--noIndex"])).toEqual(syntax);
+    expect(fs.existsSync(path.join(repoDir, ".sbk", "semantic-index", "syntax-go.json"))).toBe(
+      true,
+    );
+
+    runBackend(pythonRunner, "semantic-index.py", repoDir, [
+      ...GO,
+      ...requestArgs(request).slice(2),
+      "--operation",
+      "rename",
+      "--newName",
+      "salute",
+      "--parser",
+      "tree-sitter",
+    ]);
+    const renamed = fs.readFileSync(path.join(repoDir, "main.go"), "utf8");
+    expect(renamed).toContain("// greet is called below");
+    expect(renamed).toContain("func salute() {}");
+    expect(renamed).toContain('\tsalute()\n\ts := "greet"');
+  }, 60000);
+
+  it("one tree serves every language from its own shard", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-polyglot-");
+    writeGoRepo(repoDir);
+    writeFile(
+      path.join(repoDir, "src", "App.java"),
+      "class App {\n  static void greet() {}\n  void run() { greet(); }\n}\n",
+    );
+    writeFile(path.join(repoDir, "src", "main.rs"), "fn greet() {}\n\nfn main() { greet(); }\n");
+    writeFile(path.join(repoDir, "greet.py"), "def greet():\n    pass\n\n\ngreet()\n");
+    const indexDir = path.join(repoDir, ".sbk", "semantic-index");
+    const shards = () =>
+      fs
+        .readdirSync(indexDir)
+        .filter((name) => name.endsWith(".json"))
+        .sort();
+    const queries = [
+      { language: "go", request: GREET, suffix: ".go", shard: "symbol-go.json" },
+      {
+        language: "java",
+        request: { file: "src/App.java", line: 2, column: 15 },
+        suffix: ".java",
+        shard: "symbol-java.json",
+      },
+      {
+        language: "rust",
+        request: { file: "src/main.rs", line: 1, column: 4 },
+        suffix: ".rs",
+        shard: "symbol-rust.json",
+      },
+    ];
+
+    const written: string[] = [];
+    for (const query of queries) {
+      const view = referenceMap(pythonRunner, "semantic-index.py", repoDir, query.request, [
+        "--language",
+        query.language,
+      ]);
+      // Only the queried language's files answer, and only its shard is built.
+      const files = (view.references as Array<{ file: string }>).map((ref) => ref.file);
+      expect(files.every((file) => file.endsWith(query.suffix))).toBe(true);
+      expect(view.totalReferences).toBeGreaterThanOrEqual(2);
+      written.push(query.shard);
+      expect(shards()).toEqual([...written].sort());
+    }
+    const python = referenceMap(
+      pythonRunner,
+      "semantic-python.py",
+      repoDir,
+      { file: "greet.py", line: 1, column: 5 },
+      [],
+    );
+    expect(python.totalReferences).toBe(2);
+    expect(shards()).toContain("python-imports.json");
+
+    // An edit in one language leaves the other shards untouched.
+    const javaShard = path.join(indexDir, "symbol-java.json");
+    const before = fs.statSync(javaShard).mtimeMs;
+    fs.appendFileSync(path.join(repoDir, "util.go"), GO_SCENARIO.addCall(1));
+    const edited = referenceMap(pythonRunner, "semantic-index.py", repoDir, GREET, GO);
+    expect(edited.totalReferences).toBe(GREET_REFERENCES + 1);
+    expect(fs.statSync(javaShard).mtimeMs).toBe(before);
+    expect(fs.existsSync(path.join(indexDir, "symbol-java.log"))).toBe(false);
+  }, 60000);
+
+  it("safe-delete-report ranks rarely referenced top-level definitions", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-index-safe-delete-");
+    writeFile(
+      path.join(repoDir, "main.go"),
+      [
+        "package main",
+        "",
+        "func greet() {}",
+        "",
+        "func once() {}",
+        "",
+        "type Unused struct{}",
+        "",
+        "func main() { greet(); greet(); once() }",
+        "",
+      ].join("\n"),
+    );
+    writeFile(path.join(repoDir, "lib.go"), "package main\n\nfunc orphan() {}\n");
+    writeFile(path.join(repoDir, "main_test.go"), "package main\n\nfunc TestGreet() {}\n");
+    writeFile(
+      path.join(repoDir, "tools.py"),
+      [
+        "def used():",
+        "    pass",
+        "",
+        "",
+        "def dead():",
+        "    pass",
+        "",
+        "",
+        "def main():",
+        "    used()",
+        "",
+      ].join("\n"),
+    );
+    writeFile(path.join(repoDir, "attr.py"), "import tools\n\ntools.used\n");
+    type Report = {
+      summary: { candidates: number; unreferenced: number; truncated: boolean };
+      candidates: Array<{
+        symbol: string;
+        file: string;
+        references: number;
+        safeToDelete: boolean;
+      }>;
+    };
+    const report = (script: string, extra: string[]) =>
+      JSON.parse(
+        runBackend(pythonRunner, script, repoDir, ["--operation", "safe-delete-report", ...extra]),
+      ) as Report;
+    const ranking = (value: Report) =>
+      value.candidates.map((item) => {
+        const site = `${item.symbol}@${path.basename(item.file)}`;
+        return `${site}:${item.references}:${item.safeToDelete}`;
+      });
+
+    // Unreferenced first, then by file; greet (two calls) and the entry
+    // points main/TestGreet are not listed.
+    const go = report("semantic-index.py", GO);
+    expect(ranking(go)).toEqual([
+      "orphan@lib.go:0:true",
+      "Unused@main.go:0:true",
+      "once@main.go:1:false",
+    ]);
+    expect(go.summary).toMatchObject({ candidates: 3, unreferenced: 2, truncated: false });
+    const python = report("semantic-python.py", []);
+    // used() is called once and read once as tools.used.
+    expect(ranking(python)).toEqual(["dead@tools.py:0:true"]);
+
+    const truncated = report("semantic-index.py", [...GO, "--maxResults", "1"]);
+    expect(ranking(truncated)).toEqual(["orphan@lib.go:0:true"]);
+    expect(truncated.summary).toMatchObject({ candidates: 3, truncated: true });
+
+    // The report reads the index, so it follows edits like any query.
+    fs.appendFileSync(path.join(repoDir, "lib.go"), "\nfunc caller() { orphan() }\n");
+    expect(ranking(report("semantic-index.py", GO))).toEqual([
+      "caller@lib.go:0:true",
+      "Unused@main.go:0:true",
+      "orphan@lib.go:1:false",
+      "once@main.go:1:false",
+    ]);
+  }, 60000);
+});
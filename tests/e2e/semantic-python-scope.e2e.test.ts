@@ -0,0 +1,172 @@
+import fs from "node:fs";
+import path from "node:path";
+import { describe, expect, it } from "vitest";
+import type { PythonRunner } from "./fixtures.js";
+import {
+  resolvePythonRunner,
+  runPython,
+  runSemanticScript,
+  useTempDirs,
+  writeFile,
+  writePythonRepo,
+} from "./fixtures.js";
+
+function runSemanticPython(pythonRunner: PythonRunner, repoDir: string, args: string[]) {
+  const result = runSemanticScript(pythonRunner, "semantic-python.py", repoDir, args);
+  expect(result.status).toBe(0);
+  return JSON.parse(result.stdout);
+}
+
+function referenceMapAt(
+  pythonRunner: PythonRunner,
+  repoDir: string,
+  line: number,
+  column: number,
+  extraArgs: string[] = [],
+  file = "models.py",
+) {
+  return runSemanticPython(pythonRunner, repoDir, [
+    "--operation",
+    "reference-map",
+    "--file",
+    file,
+    "--line",
+    String(line),
+    "--column",
+    String(column),
+    ...extraArgs,
+  ]);
+}
+
+function referenceSites(payload: { references: Array<{ file: string; line: number }> }) {
+  return payload.references.map((ref) => `${path.basename(ref.file)}:${ref.line}`);
+}
+
+function referenceFiles(payload: { references: Array<{ file: string }> }) {
+  return [...new Set(payload.references.map((ref) => path.basename(ref.file)))].sort();
+}
+
+describe("semantic python scope resolution", () => {
+  const makeTempDir = useTempDirs();
+
+  it("renames keyword-argument call sites of a renamed parameter", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      // Some Windows runners do not include python/py launchers.
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-pyscope-kwarg-");
+    writeFile(
+      path.join(repoDir, "models.py"),
+      ["def load(data):", "    return data", ""].join("\n"),
+    );
+    writeFile(
+      path.join(repoDir, "use.py"),
+      ["from models import load", "", "data2 = 1", "print(load(data=data2))", ""].join("\n"),
+    );
+
+    const rename = runSemanticPython(pythonRunner, repoDir, [
+      "--operation",
+      "rename",
+      "--file",
+      "models.py",
+      "--line",
+      "1",
+      "--column",
+      "10",
+      "--newName",
+      "payload",
+    ]);
+    expect(rename.mode).toBe("apply");
+    expect(rename.touchedFiles).toBe(2);
+
+    expect(fs.readFileSync(path.join(repoDir, "models.py"), "utf8")).toContain(
+      "def load(payload):",
+    );
+    expect(fs.readFileSync(path.join(repoDir, "use.py"), "utf8")).toContain(
+      "print(load(payload=data2))",
+    );
+
+    const execute = runPython(pythonRunner, ["use.py"], repoDir);
+    expect(execute.status).toBe(0);
+    expect(execute.stdout.trim()).toBe("1");
+  }, 30000);
+
+  it("keeps each function's locals in their own scope", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-pyscope-local-");
+    writePythonRepo(repoDir);
+
+    const first = referenceMapAt(pythonRunner, repoDir, 2, 5);
+    expect(first.scope).toMatchObject({ kind: "local", candidateFiles: 1 });
+    expect(referenceSites(first)).toEqual(["models.py:2", "models.py:3"]);
+    const second = referenceMapAt(pythonRunner, repoDir, 7, 5);
+    expect(referenceSites(second)).toEqual(["models.py:7", "models.py:8"]);
+    // Indexed and direct scans resolve the same scope.
+    expect(referenceMapAt(pythonRunner, repoDir, 2, 5, ["--noIndex"])).toEqual(first);
+    // --noScope falls back to every token of the name.
+    const unscoped = referenceMapAt(pythonRunner, repoDir, 2, 5, ["--noScope"]);
+    expect(unscoped.scope).toMatchObject({ kind: "unresolved" });
+    expect(unscoped.summary.totalReferences).toBe(4);
+
+    runSemanticPython(pythonRunner, repoDir, [
+      "--operation",
+      "rename",
+      "--file",
+      "models.py",
+      "--line",
+      "2",
+      "--column",
+      "5",
+      "--newName",
+      "value",
+    ]);
+    expect(fs.readFileSync(path.join(repoDir, "models.py"), "utf8")).toBe(
+      [
+        "def load(data):",
+        "    value = data",
+        "    return value",
+        "",
+        "",
+        "def helper():",
+        "    result = load(1)",
+        "    return result",
+        "",
+      ].join("\n"),
+    );
+  }, 30000);
+
+  it("searches a module-level name only in the modules that import it", () => {
+    const pythonRunner = resolvePythonRunner();
+    if (!pythonRunner) {
+      expect(true).toBe(true);
+      return;
+    }
+
+    const repoDir = makeTempDir("sbk-pyscope-imports-");
+    writePythonRepo(repoDir);
+    writeFile(path.join(repoDir, "alias.py"), "import models\n\nmodels.load(4)\n");
+    writeFile(path.join(repoDir, "renamed.py"), "from models import load as fetch\n\nfetch(5)\n");
+
+    const moduleLoad = referenceMapAt(pythonRunner, repoDir, 1, 5);
+    expect(moduleLoad.scope).toEqual({ kind: "module", candidateFiles: 4 });
+    // other.py defines its own `load` and never imports models.
+    expect(referenceFiles(moduleLoad)).toEqual(["alias.py", "models.py", "renamed.py", "use.py"]);
+    expect(referenceMapAt(pythonRunner, repoDir, 1, 5, ["--noIndex"])).toEqual(moduleLoad);
+    const otherLoad = referenceMapAt(pythonRunner, repoDir, 1, 5, [], "other.py");
+    expect(referenceSites(otherLoad)).toEqual(["other.py:1", "other.py:4"]);
+
+    // The import graph follows new importers.
+    writeFile(path.join(repoDir, "late.py"), "from models import load\n\nload(6)\n");
+    const refreshed = referenceMapAt(pythonRunner, repoDir, 1, 5);
+    expect(refreshed.scope).toEqual({ kind: "module", candidateFiles: 5 });
+    expect(referenceSites(refreshed)).toContain("late.py:3");
+  }, 30000);
+});